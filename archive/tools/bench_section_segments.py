@@ -0,0 +1,139 @@
+"""Micro-benchmark for `rt_manual.parse_section_segments`.
+
+Runs the compiled single-scan parser and the previous per-keyword
+implementation over every function-catalog section of a manual, checks that
+both produce identical segments, and reports timings.
+
+Usage (from the `archive/` directory):
+    python -m tools.bench_section_segments --versions-dir ../rtmanual
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+from typing import Iterable
+
+from . import rt_manual
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--versions-dir",
+        type=Path,
+        default=rt_manual.DEFAULT_VERSIONS_DIR,
+        help="Directory containing versioned manuals (default: versions)",
+    )
+    parser.add_argument(
+        "--version",
+        help="Version slug (defaults to latest version directory)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Timing repetitions; the best run is reported (default: 5)",
+    )
+    parser.add_argument(
+        "--all-sections",
+        action="store_true",
+        help="Benchmark every manual section instead of only 17.18.x entries",
+    )
+    return parser.parse_args(list(argv) if argv is not None else None)
+
+
+def legacy_parse_section_segments(content_lines: list[str]) -> dict[str, list[str]]:
+    """The original implementation, kept verbatim as the benchmark baseline."""
+    filtered: list[str] = []
+    for line in content_lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.isdigit():
+            continue
+        if set(stripped) <= {"."}:
+            continue
+        if re.match(r"^\d+\.\d+.*", stripped):
+            continue
+        filtered.append(stripped)
+
+    if not filtered:
+        return {}
+
+    block = " ".join(filtered)
+    block = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", block)
+    block = re.sub(r"(?<=\))(?=[A-Z])", " ", block)
+    block = re.sub(r"\s+", " ", block).strip()
+    segments: dict[str, list[str]] = {}
+
+    positions: list[tuple[int, str]] = []
+    for keyword in rt_manual.SECTION_KEYWORDS:
+        pattern = re.compile(rf"\b{keyword}\b", re.IGNORECASE)
+        for match in pattern.finditer(block):
+            positions.append((match.start(), keyword.lower()))
+
+    if not positions:
+        segments["raw"] = [block]
+        return segments
+
+    positions.sort()
+    for idx, (pos, key) in enumerate(positions):
+        next_pos = positions[idx + 1][0] if idx + 1 < len(positions) else len(block)
+        value = block[pos + len(key) : next_pos].strip()
+        if value:
+            segments.setdefault(key, []).append(value)
+
+    return segments
+
+
+def load_section_contents(version_dir: Path, all_sections: bool) -> list[list[str]]:
+    lines = rt_manual.read_manual_lines(version_dir / "manual.txt")
+    structure = json.loads((version_dir / "manual_structure.json").read_text(encoding="utf-8"))
+    records = rt_manual.load_section_records(structure.get("sections", []))
+    return [
+        rt_manual.section_content(record, records, lines)
+        for record in records
+        if all_sections or record["number"].startswith("17.18.")
+    ]
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(argv)
+    ctx = rt_manual.build_context(args)
+    try:
+        version_dir = rt_manual.discover_version_dir(ctx, args.version)
+        contents = load_section_contents(version_dir, args.all_sections)
+    except Exception as exc:  # pragma: no cover - CLI surface
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+
+    mismatches = sum(
+        1
+        for content in contents
+        if rt_manual.parse_section_segments(content) != legacy_parse_section_segments(content)
+    )
+
+    def run(parser) -> float:
+        timer = timeit.Timer(lambda: [parser(content) for content in contents])
+        return min(timer.repeat(repeat=max(args.repeat, 1), number=1))
+
+    legacy_seconds = run(legacy_parse_section_segments)
+    compiled_seconds = run(rt_manual.parse_section_segments)
+
+    print(f"Version: {version_dir.name}")
+    print(f"Sections: {len(contents)}")
+    print(f"Legacy:   {legacy_seconds * 1000:.2f} ms")
+    print(f"Compiled: {compiled_seconds * 1000:.2f} ms")
+    if compiled_seconds:
+        print(f"Speedup:  {legacy_seconds / compiled_seconds:.2f}x")
+    print(f"Mismatched sections: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
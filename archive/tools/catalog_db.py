@@ -0,0 +1,299 @@
+"""Compact SQLite form of `function_catalog.json` and `manual_structure.json`.
+
+`export_catalog_db` writes every catalog entry as a zlib-compressed JSON row
+keyed by name, with alias and category indexes and an FTS5 table over the
+descriptive text. `CatalogDB` opens the file read-only on first use and fetches only the
+rows a query touches, so looking up a handful of functions no longer parses
+the full JSON documents.
+
+Usage (from the `archive/` directory):
+    python -m tools.rt_manual export-catalog-db
+    python -m tools.catalog_db versions/<version>/function_catalog.sqlite EMA
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import zlib
+from pathlib import Path
+from typing import Iterable
+
+CATALOG_DB_NAME = "function_catalog.sqlite"
+SCHEMA_VERSION = "1"
+FTS_TOKEN_PATTERN = re.compile(r"[#?]?\w+")
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    category TEXT,
+    section TEXT,
+    payload BLOB NOT NULL
+);
+CREATE INDEX entries_name_key ON entries (name_key);
+CREATE INDEX entries_category ON entries (category COLLATE NOCASE);
+CREATE TABLE aliases (alias_key TEXT NOT NULL, entry_id INTEGER NOT NULL);
+CREATE INDEX aliases_key ON aliases (alias_key);
+CREATE TABLE sections (
+    number TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    source_line INTEGER NOT NULL
+);
+CREATE TABLE glossary (
+    term_key TEXT NOT NULL,
+    term TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    source_line INTEGER NOT NULL
+);
+CREATE INDEX glossary_term_key ON glossary (term_key);
+CREATE VIRTUAL TABLE entries_fts USING fts5 (
+    name, title, category, description, notes, example, content=''
+);
+"""
+
+
+def fts_query(text: str) -> str:
+    """Quote each word so user text never trips the FTS5 query syntax."""
+    words = FTS_TOKEN_PATTERN.findall(text)
+    return " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+
+def encode_entry(entry: dict[str, object]) -> bytes:
+    return zlib.compress(
+        json.dumps(entry, separators=(",", ":"), ensure_ascii=False).encode("utf-8"), 9
+    )
+
+
+def decode_entry(payload: bytes) -> dict[str, object]:
+    return json.loads(zlib.decompress(payload))
+
+
+def export_catalog_db(
+    catalog: dict[str, object],
+    structure: dict[str, object] | None,
+    db_path: Path,
+    source_sha256: str,
+) -> bool:
+    """Write the catalog (and optionally the manual structure) to `db_path`.
+
+    Returns False without touching the file when it was already exported from
+    the same source hash.
+    """
+    if db_path.exists():
+        try:
+            with CatalogDB(db_path) as existing:
+                if (
+                    existing.meta("source_sha256") == source_sha256
+                    and existing.meta("schema_version") == SCHEMA_VERSION
+                ):
+                    return False
+        except sqlite3.DatabaseError:
+            pass
+
+    tmp_path = db_path.with_name(db_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        entries = catalog.get("entries", [])
+        for entry_id, entry in enumerate(entries, start=1):
+            conn.execute(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    entry_id,
+                    entry["name"],
+                    entry["name"].lower(),
+                    entry.get("category"),
+                    entry.get("section"),
+                    encode_entry(entry),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO aliases VALUES (?, ?)",
+                [(alias.lower(), entry_id) for alias in entry.get("aliases", [])],
+            )
+            conn.execute(
+                "INSERT INTO entries_fts (rowid, name, title, category, description, notes, example)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry_id,
+                    entry["name"],
+                    entry.get("title") or "",
+                    entry.get("category") or "",
+                    entry.get("description") or "",
+                    entry.get("notes") or "",
+                    entry.get("example") or "",
+                ),
+            )
+
+        if structure is not None:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sections VALUES (?, ?, ?, ?)",
+                [
+                    (item["number"], item["title"], item["depth"], item["source_line"])
+                    for item in structure.get("sections", [])
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO glossary VALUES (?, ?, ?, ?)",
+                [
+                    (item["term"].lower(), item["term"], item["definition"], item["source_line"])
+                    for item in structure.get("glossary", [])
+                ],
+            )
+
+        meta = {
+            "schema_version": SCHEMA_VERSION,
+            "source_sha256": source_sha256,
+            "version": str(catalog.get("version", "")),
+            "generated_at": str(catalog.get("generated_at", "")),
+            "summary": json.dumps(catalog.get("summary", {}), separators=(",", ":")),
+        }
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    tmp_path.replace(db_path)
+    return True
+
+
+class CatalogDB:
+    """Read-only query API over an exported catalog database.
+
+    The connection is opened lazily, so constructing the object is free and a
+    process that never queries never touches the file.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path)
+        self._conn: sqlite3.Connection | None = None
+
+    def __enter__(self) -> CatalogDB:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if not self.db_path.is_file():
+                raise FileNotFoundError(f"Catalog database not found: {self.db_path}")
+            self._conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def meta(self, key: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, name: str) -> dict[str, object] | None:
+        """Return the entry whose name or alias matches `name` case-insensitively."""
+        key = name.strip().lower()
+        row = self.conn.execute(
+            "SELECT payload FROM entries WHERE name_key = ?"
+            " UNION ALL"
+            " SELECT e.payload FROM aliases a JOIN entries e ON e.id = a.entry_id"
+            " WHERE a.alias_key = ?"
+            " LIMIT 1",
+            (key, key),
+        ).fetchone()
+        return decode_entry(row[0]) if row else None
+
+    def by_category(self, category: str) -> list[dict[str, object]]:
+        rows = self.conn.execute(
+            "SELECT payload FROM entries WHERE category = ? COLLATE NOCASE ORDER BY id",
+            (category,),
+        )
+        return [decode_entry(payload) for (payload,) in rows]
+
+    def categories(self) -> list[tuple[str, int]]:
+        rows = self.conn.execute(
+            "SELECT COALESCE(category, 'Uncategorized'), COUNT(*) FROM entries"
+            " GROUP BY 1 ORDER BY 2 DESC, 1"
+        )
+        return [(category, count) for category, count in rows]
+
+    def search(self, text: str, limit: int = 10) -> list[dict[str, object]]:
+        """Rank entries by BM25 over name, title, category and description text."""
+        query = fts_query(text)
+        if not query:
+            return []
+        rows = self.conn.execute(
+            "SELECT e.payload FROM entries_fts f JOIN entries e ON e.id = f.rowid"
+            " WHERE entries_fts MATCH ? ORDER BY bm25(entries_fts, 10.0, 5.0, 1.0, 2.0, 1.0, 1.0)"
+            " LIMIT ?",
+            (query, limit),
+        )
+        return [decode_entry(payload) for (payload,) in rows]
+
+    def section(self, number: str) -> dict[str, object] | None:
+        row = self.conn.execute(
+            "SELECT number, title, depth, source_line FROM sections WHERE number = ?",
+            (number,),
+        ).fetchone()
+        if not row:
+            return None
+        return dict(zip(("number", "title", "depth", "source_line"), row))
+
+    def glossary(self, term: str) -> list[dict[str, object]]:
+        rows = self.conn.execute(
+            "SELECT term, definition, source_line FROM glossary WHERE term_key = ?",
+            (term.strip().lower(),),
+        )
+        return [
+            {"term": term, "definition": definition, "source_line": line}
+            for term, definition, line in rows
+        ]
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Query an exported function catalog")
+    parser.add_argument("db_path", type=Path, help="Path to function_catalog.sqlite")
+    parser.add_argument("name", nargs="?", help="Function name or alias to look up")
+    parser.add_argument("--category", help="List entries in a category")
+    parser.add_argument("--search", help="Full-text search over entry descriptions")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum search results")
+    return parser.parse_args(list(argv) if argv is not None else None)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(argv)
+    try:
+        with CatalogDB(args.db_path) as db:
+            if args.name:
+                entry = db.lookup(args.name)
+                if entry is None:
+                    print(f"No catalog entry named {args.name!r}", file=sys.stderr)
+                    return 1
+                print(json.dumps(entry, indent=2, ensure_ascii=False))
+            if args.category:
+                for entry in db.by_category(args.category):
+                    print(f"{entry['name']}\t{entry.get('description') or ''}")
+            if args.search:
+                for entry in db.search(args.search, limit=args.limit):
+                    print(f"{entry['name']}\t{entry['section']}\t{entry.get('category') or ''}")
+            if not (args.name or args.category or args.search):
+                for category, count in db.categories():
+                    print(f"{count:5d}  {category}")
+    except Exception as exc:  # pragma: no cover - CLI surface
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Token-budgeted assembly of `prompt_assets/function_cheatsheet.md`.
+
+Every catalog entry is rendered to a Markdown block and given a priority
+(how widely samples use it, whether it has an example, whether the grammar
+knows it). Blocks are chosen greedily by priority per token until the budget
+is spent, then the assembled document is counted exactly and trimmed if the
+block boundaries tokenized differently than the parts.
+
+Per-block token counts are cached on disk keyed by tokenizer and text hash,
+so a rebuild only tokenizes blocks whose rendered text actually changed.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable
+
+CHEATSHEET_NAME = "function_cheatsheet.md"
+TOKEN_CACHE_NAME = "token_cache.json"
+CHEATSHEET_HEADER = (
+    "# RealTest Language Cheat Sheet\n\n"
+    "Summaries derived from function_catalog.json; one-liners are truncated for prompt friendliness.\n"
+)
+SUMMARY_LIMIT = 200
+
+
+@dataclass(frozen=True)
+class CheatsheetBlock:
+    name: str
+    text: str
+    priority: float
+    tokens: int
+
+
+@dataclass(frozen=True)
+class CheatsheetResult:
+    text: str
+    tokens: int
+    selected: list[str]
+    skipped: list[str]
+    cache_hits: int
+    cache_misses: int
+
+
+class TokenCache:
+    """On-disk map of "<tokenizer>:<sha256 of text>" to a token count."""
+
+    def __init__(self, path: Path, counter: Callable[[str], int], tokenizer: str) -> None:
+        self.path = path
+        self.counter = counter
+        self.tokenizer = tokenizer
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._counts: dict[str, int] = {}
+        if path.is_file():
+            try:
+                self._counts = json.loads(path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                self._counts = {}
+
+    def count(self, text: str) -> int:
+        key = f"{self.tokenizer}:{sha256(text.encode('utf-8')).hexdigest()}"
+        cached = self._counts.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        tokens = self.counter(text)
+        self._counts[key] = tokens
+        self._dirty = True
+        return tokens
+
+    def save(self) -> None:
+        if self._dirty:
+            self.path.write_text(json.dumps(self._counts, indent=0, sort_keys=True) + "\n", encoding="utf-8")
+            self._dirty = False
+
+
+def truncate(text: str, limit: int = SUMMARY_LIMIT) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+
+
+def render_entry(entry: dict[str, object]) -> str:
+    lines = [f"## {entry['name']}"]
+    if entry.get("category"):
+        lines.append(f"- Category: {entry['category']}")
+    hierarchy = entry.get("hierarchy") or []
+    if hierarchy:
+        lines.append(f"- Manual path: {' > '.join(hierarchy)} / {entry['section']}")
+    if entry.get("description"):
+        lines.append(f"- Summary: {truncate(str(entry['description']))}")
+    samples = entry.get("sample_examples") or []
+    if samples:
+        sample = samples[0]
+        lines.append(f"- Example: `{sample['code']}` ({sample['file']}:{sample['line']})")
+    if entry.get("see_also"):
+        lines.append(f"- See also: {', '.join(entry['see_also'])}")
+    return "\n".join(lines) + "\n"
+
+
+def entry_priority(entry: dict[str, object]) -> float:
+    usage = len(entry.get("sample_usage") or entry.get("sample_examples") or [])
+    priority = 1.0 + 2.0 * math.log1p(usage)
+    if entry.get("sample_examples"):
+        priority += 1.0
+    if entry.get("grammar_match"):
+        priority += 0.5
+    if not entry.get("description"):
+        priority -= 0.5
+    return max(priority, 0.1)
+
+
+def assemble(blocks: list[CheatsheetBlock]) -> str:
+    ordered = sorted(blocks, key=lambda block: block.name.lower())
+    return CHEATSHEET_HEADER + "".join("\n" + block.text for block in ordered)
+
+
+def build_cheatsheet(
+    entries: list[dict[str, object]],
+    budget: int,
+    cache: TokenCache,
+) -> CheatsheetResult:
+    blocks = []
+    for entry in entries:
+        text = render_entry(entry)
+        blocks.append(
+            CheatsheetBlock(
+                name=str(entry["name"]),
+                text=text,
+                priority=entry_priority(entry),
+                # Blocks are joined with a blank line; count it with the block.
+                tokens=cache.count("\n" + text),
+            )
+        )
+
+    remaining = budget - cache.count(CHEATSHEET_HEADER)
+    chosen: list[CheatsheetBlock] = []
+    for block in sorted(blocks, key=lambda item: (-item.priority / max(item.tokens, 1), -item.priority, item.name)):
+        if block.tokens <= remaining:
+            chosen.append(block)
+            remaining -= block.tokens
+
+    # Block sums are an estimate; the assembled text is authoritative.
+    text = assemble(chosen)
+    total = cache.counter(text)
+    by_value = sorted(chosen, key=lambda item: (item.priority, -item.tokens))
+    while total > budget and by_value:
+        chosen.remove(by_value.pop(0))
+        text = assemble(chosen)
+        total = cache.counter(text)
+
+    selected = {block.name for block in chosen}
+    return CheatsheetResult(
+        text=text,
+        tokens=total,
+        selected=sorted(selected, key=str.lower),
+        skipped=sorted((block.name for block in blocks if block.name not in selected), key=str.lower),
+        cache_hits=cache.hits,
+        cache_misses=cache.misses,
+    )
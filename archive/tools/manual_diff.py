@@ -0,0 +1,136 @@
+"""Hash manifests and version-to-version diffs of manual artifacts.
+
+Each version gets a `section_hashes.json` manifest with one content hash per
+section (keyed by its title path, so renumbering alone is not a change) and
+one per catalog entry. A manifest records the size and modification time of
+its source files and is trusted while they match; otherwise the sources are
+hashed, and the manifest is rebuilt only if the hashes changed. Diffing two
+versions therefore compares two small dictionaries without reading either
+manual, and only sections reported as changed ever need their text re-read.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from hashlib import sha256
+from pathlib import Path
+from typing import Callable
+
+MANIFEST_NAME = "section_hashes.json"
+MANIFEST_FORMAT = 2
+
+# Catalog fields derived from the manual; sample snippets and line numbers are
+# excluded because they move without the documented content changing.
+CATALOG_HASH_FIELDS = ("name", "aliases", "category", "description", "example", "notes", "see_also")
+
+
+@dataclass
+class VersionDiff:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+
+
+def text_digest(lines: list[str]) -> str:
+    """Hash section text, ignoring blank lines and bare page numbers."""
+    digest = sha256()
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.isdigit():
+            continue
+        digest.update(stripped.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def section_key(record: dict[str, object]) -> str:
+    return " / ".join([*record["ancestors"], record["title"]])
+
+
+def section_hashes(
+    records: list[dict[str, object]],
+    content_for: Callable[[dict[str, object]], list[str]],
+) -> dict[str, dict[str, object]]:
+    hashes: dict[str, dict[str, object]] = {}
+    for record in records:
+        key = section_key(record)
+        occurrence = 1
+        while key in hashes:
+            occurrence += 1
+            key = f"{section_key(record)} #{occurrence}"
+        hashes[key] = {
+            "number": record["number"],
+            "source_line": record["source_line"],
+            "sha256": text_digest(content_for(record)),
+        }
+    return hashes
+
+
+def catalog_hashes(catalog: dict[str, object]) -> dict[str, str]:
+    hashes: dict[str, str] = {}
+    for entry in catalog.get("entries", []):
+        subset = {name: entry.get(name) for name in CATALOG_HASH_FIELDS}
+        serialized = json.dumps(subset, sort_keys=True, ensure_ascii=False)
+        hashes[entry["name"]] = sha256(serialized.encode("utf-8")).hexdigest()
+    return hashes
+
+
+def file_stats(paths: dict[str, Path]) -> dict[str, list[int] | None]:
+    """[size, mtime_ns] per source, None for a missing one."""
+    stats: dict[str, list[int] | None] = {}
+    for key, path in paths.items():
+        if path.is_file():
+            stat = path.stat()
+            stats[key] = [stat.st_size, stat.st_mtime_ns]
+        else:
+            stats[key] = None
+    return stats
+
+
+def load_manifest(version_dir: Path) -> dict[str, object] | None:
+    """Return the cached manifest, or None when it is missing or from another format."""
+    path = version_dir / MANIFEST_NAME
+    if not path.is_file():
+        return None
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return None
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return None
+    return manifest
+
+
+def write_manifest(
+    version_dir: Path,
+    sources: dict[str, str | None],
+    stats: dict[str, list[int] | None],
+    sections: dict[str, dict[str, object]],
+    catalog: dict[str, str],
+) -> dict[str, object]:
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": version_dir.name,
+        "sources": sources,
+        "stats": stats,
+        "sections": sections,
+        "catalog": catalog,
+    }
+    path = version_dir / MANIFEST_NAME
+    path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return manifest
+
+
+def diff_hashes(old: dict[str, object], new: dict[str, object]) -> VersionDiff:
+    def digest(value: object) -> object:
+        return value["sha256"] if isinstance(value, dict) else value
+
+    diff = VersionDiff()
+    for key, value in new.items():
+        if key not in old:
+            diff.added.append(key)
+        elif digest(old[key]) != digest(value):
+            diff.changed.append(key)
+    diff.removed = [key for key in old if key not in new]
+    return diff
@@ -0,0 +1,171 @@
+"""BM25 full-text search over the sections of every indexed manual version.
+
+The index lives in one SQLite file next to the version directories. Each
+version is recorded with the hashes of the `manual.txt` and
+`manual_structure.json` it was built from, so re-indexing only rewrites
+versions whose inputs changed and a freshly added version is picked up on the
+next `rt_manual index` (or `build-structure`) run.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .catalog_db import fts_query
+
+MANUAL_INDEX_NAME = "manual_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS indexed_versions (
+    version TEXT PRIMARY KEY,
+    txt_sha256 TEXT NOT NULL,
+    structure_sha256 TEXT NOT NULL,
+    section_count INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5 (
+    version UNINDEXED,
+    number UNINDEXED,
+    source_line UNINDEXED,
+    title,
+    body,
+    tokenize = 'porter unicode61'
+);
+"""
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    version: str
+    number: str
+    title: str
+    source_line: int
+    snippet: str
+    score: float
+
+
+def connect_index(index_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(index_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def section_bodies(
+    sections: Iterable[dict[str, object]],
+    lines: Iterable[str],
+) -> Iterator[tuple[dict[str, object], str]]:
+    """Pair each section with its own text, stopping at the next heading of any depth.
+
+    `lines` is read once from the front, so it can stream straight from manual.txt.
+    """
+    ordered = iter(sorted(sections, key=lambda item: int(item["source_line"])))
+    current, upcoming = None, next(ordered, None)
+    parts: list[str] = []
+    for number, line in enumerate(lines, start=1):
+        heading = False
+        while upcoming is not None and int(upcoming["source_line"]) <= number:
+            if current is not None:
+                yield current, " ".join(parts)
+            current, upcoming, parts, heading = upcoming, next(ordered, None), [], True
+        if current is not None and not heading and line.strip():
+            parts.append(line.strip())
+    if current is not None:
+        yield current, " ".join(parts)
+    while upcoming is not None:
+        yield upcoming, ""
+        upcoming = next(ordered, None)
+
+
+def update_manual_index(
+    index_path: Path,
+    version: str,
+    sections: list[dict[str, object]],
+    lines: Iterable[str],
+    txt_sha256: str,
+    structure_sha256: str,
+) -> bool:
+    """(Re)index one version; returns False when its inputs are unchanged.
+
+    `lines` is only consumed when the version is re-indexed.
+    """
+    conn = connect_index(index_path)
+    try:
+        row = conn.execute(
+            "SELECT txt_sha256, structure_sha256 FROM indexed_versions WHERE version = ?",
+            (version,),
+        ).fetchone()
+        if row == (txt_sha256, structure_sha256):
+            return False
+
+        with conn:
+            conn.execute("DELETE FROM sections_fts WHERE version = ?", (version,))
+            conn.executemany(
+                "INSERT INTO sections_fts (version, number, source_line, title, body)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (
+                    (version, section["number"], section["source_line"], section["title"], body)
+                    for section, body in section_bodies(sections, lines)
+                ),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO indexed_versions VALUES (?, ?, ?, ?)",
+                (version, txt_sha256, structure_sha256, len(sections)),
+            )
+        return True
+    finally:
+        conn.close()
+
+
+def indexed_versions(index_path: Path) -> list[str]:
+    if not index_path.is_file():
+        return []
+    conn = connect_index(index_path)
+    try:
+        return [version for (version,) in conn.execute("SELECT version FROM indexed_versions ORDER BY version")]
+    finally:
+        conn.close()
+
+
+def search_manual(
+    index_path: Path,
+    query: str,
+    version: str | None = None,
+    limit: int = 10,
+) -> list[SearchHit]:
+    """Return sections ranked by BM25, titles weighted above body text."""
+    if not index_path.is_file():
+        raise FileNotFoundError(f"Manual index not found: {index_path}. Run 'index' first.")
+    match = fts_query(query)
+    if not match:
+        return []
+
+    sql = (
+        "SELECT version, number, title, source_line,"
+        " snippet(sections_fts, 4, '[', ']', '…', 24),"
+        " bm25(sections_fts, 0, 0, 0, 5.0, 1.0) AS score"
+        " FROM sections_fts WHERE sections_fts MATCH ?"
+    )
+    params: list[object] = [match]
+    if version:
+        sql += " AND version = ?"
+        params.append(version)
+    sql += " ORDER BY score LIMIT ?"
+    params.append(limit)
+
+    conn = connect_index(index_path)
+    try:
+        return [
+            SearchHit(
+                version=row[0],
+                number=row[1],
+                title=row[2],
+                source_line=int(row[3]),
+                snippet=row[4],
+                score=-row[5],
+            )
+            for row in conn.execute(sql, params)
+        ]
+    finally:
+        conn.close()
@@ -2,6 +2,13 @@
 
 Usage:
     python -m tools.prompt_token_check <path/to/prompt.txt> [--model gpt-4o-mini]
+    python -m tools.prompt_token_check "versions/*/prompt_assets/*" --sections --json
+
+Accepts any number of paths and glob patterns. The tokenizer is resolved once,
+files are counted concurrently in a thread pool (tiktoken releases the GIL),
+large files are streamed in line-aligned chunks, and per-file results are
+memoized by content hash in a small on-disk cache. A file's total is the
+same as counting the whole file at once, and its sections add up to it.
 
 Falls back to a simple 4-characters-per-token heuristic if tiktoken is not
 available for the requested model.
@@ -10,22 +17,87 @@ available for the requested model.
 from __future__ import annotations
 
 import argparse
+import glob
 import importlib
+import json
 import math
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from hashlib import sha256
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator
 
 DEFAULT_MODEL = "gpt-4o-mini"
+DEFAULT_CACHE = Path(".prompt_token_cache.json")
+# Bumped when counts change for the same content, so older cache entries are ignored.
+CACHE_FORMAT = 3
+CHUNK_CHARS = 256 * 1024
+HEURISTIC = "heuristic"
+WORD_PATTERN = re.compile(r"[^\W_]")  # a letter or digit
+
+# Markdown headings, all-caps prompt labels ("SYSTEM MESSAGE:") and RealTest
+# section headers ("Data:") start a new section.
+SECTION_HEADING_PATTERN = re.compile(
+    r"^(#{1,6}\s+\S.*|[A-Z][A-Z0-9 /._-]*(\([^)]*\))?:|[A-Z][A-Za-z]*:)\s*$"
+)
+
+
+@dataclass
+class SectionCount:
+    title: str
+    line: int
+    tokens: int = 0
+    characters: int = 0
+
+
+@dataclass
+class FileCount:
+    path: str
+    sha256: str
+    tokens: int
+    characters: int
+    method: str
+    sections: list[SectionCount] = field(default_factory=list)
+    cached: bool = False
 
 
 def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description=__doc__)
-    parser.add_argument("prompt_path", type=Path, help="File containing the prompt text")
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="Prompt files or glob patterns (quote globs to expand them recursively)",
+    )
     parser.add_argument(
         "--model",
         default=DEFAULT_MODEL,
         help=f"Model name for tokenization (default: {DEFAULT_MODEL})",
     )
+    parser.add_argument(
+        "--sections",
+        action="store_true",
+        help="Also report counts per heading-delimited section",
+    )
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=min(8, os.cpu_count() or 1),
+        help="Thread pool size for counting files",
+    )
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=DEFAULT_CACHE,
+        help=f"Token count cache file (default: {DEFAULT_CACHE})",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Disable the on-disk cache")
     return parser.parse_args(list(argv) if argv is not None else None)
 
 
@@ -35,29 +107,232 @@ def load_prompt(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
-def count_tokens(prompt: str, model: str) -> tuple[int, str]:
+def heuristic_tokens(characters: int) -> int:
+    return math.ceil(characters / 4)  # Approximate assumption.
+
+
+@lru_cache(maxsize=None)
+def resolve_tokenizer(model: str) -> tuple[Callable[[str], int], str]:
+    """Return a token-counting callable and a label identifying the tokenizer."""
     try:
         tiktoken = importlib.import_module("tiktoken")
     except ModuleNotFoundError:
-        estimate = math.ceil(len(prompt) / 4)
-        return estimate, "heuristic"  # Approximate assumption.
+        return (lambda text: heuristic_tokens(len(text))), HEURISTIC
 
     try:
         encoding = tiktoken.encoding_for_model(model)
     except KeyError:
         encoding = tiktoken.get_encoding("cl100k_base")
-    tokens = encoding.encode(prompt)
-    return len(tokens), "tiktoken"
+    return (
+        lambda text: len(encoding.encode(text, disallowed_special=()))
+    ), f"tiktoken:{encoding.name}"
+
+
+def count_tokens(prompt: str, model: str) -> tuple[int, str]:
+    counter, label = resolve_tokenizer(model)
+    return counter(prompt), label.split(":", 1)[0]
+
+
+def expand_paths(patterns: Iterable[str]) -> list[Path]:
+    paths: list[Path] = []
+    seen: set[Path] = set()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = [Path(match) for match in sorted(glob.glob(pattern, recursive=True))]
+        else:
+            matches = [Path(pattern)]
+        for path in matches:
+            if path.is_dir() or path in seen:
+                continue
+            if not path.is_file():
+                raise FileNotFoundError(f"Prompt file not found: {path}")
+            seen.add(path)
+            paths.append(path)
+    return paths
+
+
+def hash_file(path: Path) -> str:
+    digest = sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_sections(lines: Iterator[str]) -> Iterator[tuple[SectionCount, str]]:
+    """Yield (section, text chunk) pairs without holding more than CHUNK_CHARS.
+
+    A long section is emitted as several chunks of the same SectionCount, cut
+    at line boundaries, so memory stays bounded for arbitrarily large files.
+    """
+    section = SectionCount(title="(preamble)", line=1)
+    buffer: list[str] = []
+    size = 0
+    for number, line in enumerate(lines, start=1):
+        if SECTION_HEADING_PATTERN.match(line.rstrip("\r\n")):
+            if buffer:
+                yield section, "".join(buffer)
+            buffer, size = [], 0
+            section = SectionCount(title=line.strip(), line=number)
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_CHARS:
+            yield section, "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield section, "".join(buffer)
+
+
+def word_lines(chunk: str) -> tuple[str, str] | None:
+    """The lines of `chunk` up to its first, and from its last, line with a letter or digit."""
+    lines = chunk.splitlines(keepends=True)
+    marked = [number for number, line in enumerate(lines) if WORD_PATTERN.search(line)]
+    if not marked:
+        return None
+    return "".join(lines[: marked[0] + 1]), "".join(lines[marked[-1] :])
+
+
+def count_file(path: Path, counter: Callable[[str], int], method: str, digest: str) -> FileCount:
+    """Count a file chunk by chunk; the total matches counting the whole file at once.
+
+    No token spans both a letter or digit and a line break, so a cut only
+    changes the tokens between the nearest lines with a letter or digit on
+    either side. The total adds, for each such stretch, the difference
+    between counting it whole and counting its pieces, and so does the
+    section of the chunk that ends the stretch.
+    """
+    result = FileCount(path=path.as_posix(), sha256=digest, tokens=0, characters=0, method=method)
+    tail, tail_tokens = "", 0
+    with path.open("r", encoding="utf-8") as handle:
+        for section, chunk in iter_sections(handle):
+            if not result.sections or result.sections[-1] is not section:
+                result.sections.append(section)
+            section.characters += len(chunk)
+            result.characters += len(chunk)
+            if method == HEURISTIC:
+                continue
+            tokens = counter(chunk)
+            section.tokens += tokens
+            result.tokens += tokens
+            edges = word_lines(chunk)
+            if edges is None:
+                tail, tail_tokens = tail + chunk, tail_tokens + tokens
+                continue
+            head, end = edges
+            if tail:
+                correction = counter(tail + head) - tail_tokens - counter(head)
+                section.tokens += correction
+                result.tokens += correction
+            tail, tail_tokens = end, counter(end)
+    if tail:
+        correction = counter(tail) - tail_tokens
+        result.sections[-1].tokens += correction
+        result.tokens += correction
+    if method == HEURISTIC:
+        # Round the running total, not each chunk or section, so the sections add up to the file.
+        counted = characters = 0
+        for section in result.sections:
+            characters += section.characters
+            section.tokens = heuristic_tokens(characters) - counted
+            counted += section.tokens
+        result.tokens = heuristic_tokens(result.characters)
+    return result
+
+
+def load_cache(path: Path | None) -> dict[str, dict]:
+    if path is None or not path.is_file():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return {}
+
+
+def count_files(
+    paths: list[Path],
+    model: str,
+    workers: int,
+    cache_path: Path | None,
+) -> list[FileCount]:
+    counter, label = resolve_tokenizer(model)
+    method = label.split(":", 1)[0]
+    cache = load_cache(cache_path)
+
+    def job(path: Path) -> FileCount:
+        digest = hash_file(path)
+        cached = cache.get(f"{CACHE_FORMAT}:{label}:{digest}")
+        if cached is not None:
+            sections = [SectionCount(**item) for item in cached["sections"]]
+            return FileCount(
+                path=path.as_posix(),
+                sha256=digest,
+                tokens=cached["tokens"],
+                characters=cached["characters"],
+                method=method,
+                sections=sections,
+                cached=True,
+            )
+        return count_file(path, counter, method, digest)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        results = list(pool.map(job, paths))
+
+    fresh = [result for result in results if not result.cached]
+    if cache_path is not None and fresh:
+        for result in fresh:
+            cache[f"{CACHE_FORMAT}:{label}:{result.sha256}"] = {
+                "tokens": result.tokens,
+                "characters": result.characters,
+                "sections": [asdict(section) for section in result.sections],
+            }
+        cache_path.write_text(json.dumps(cache, indent=1) + "\n", encoding="utf-8")
+    return results
+
+
+def print_table(results: list[FileCount], model: str, show_sections: bool) -> None:
+    width = max([len(result.path) for result in results] + [len("TOTAL")])
+    print(f"Model: {model}")
+    print(f"{'file':<{width}}  {'tokens':>9}  {'chars':>10}  method")
+    for result in results:
+        flag = " (cached)" if result.cached else ""
+        print(f"{result.path:<{width}}  {result.tokens:>9}  {result.characters:>10}  {result.method}{flag}")
+        if show_sections:
+            for section in result.sections:
+                title = section.title if len(section.title) <= 48 else section.title[:47] + "…"
+                print(f"  L{section.line:<6} {title:<48}  {section.tokens:>9}  {section.characters:>10}")
+    print(
+        f"{'TOTAL':<{width}}  {sum(result.tokens for result in results):>9}"
+        f"  {sum(result.characters for result in results):>10}"
+    )
 
 
 def main(argv: Iterable[str] | None = None) -> int:
     args = parse_args(argv)
-    prompt_text = load_prompt(args.prompt_path)
-    token_count, method = count_tokens(prompt_text, args.model)
-    print(f"Prompt: {args.prompt_path}")
-    print(f"Model: {args.model}")
-    print(f"Tokens ({method}): {token_count}")
-    print(f"Characters: {len(prompt_text)}")
+    paths = expand_paths(args.paths)
+    if not paths:
+        raise FileNotFoundError(f"No files matched: {' '.join(args.paths)}")
+
+    results = count_files(paths, args.model, args.workers, None if args.no_cache else args.cache)
+
+    if args.json:
+        payload = {
+            "model": args.model,
+            "files": [
+                {key: value for key, value in asdict(result).items() if args.sections or key != "sections"}
+                for result in results
+            ],
+            "total_tokens": sum(result.tokens for result in results),
+            "total_characters": sum(result.characters for result in results),
+        }
+        print(json.dumps(payload, indent=2))
+    elif len(results) == 1 and not args.sections:
+        result = results[0]
+        print(f"Prompt: {result.path}")
+        print(f"Model: {args.model}")
+        print(f"Tokens ({result.method}): {result.tokens}")
+        print(f"Characters: {result.characters}")
+    else:
+        print_table(results, args.model, args.sections)
     return 0
 
 
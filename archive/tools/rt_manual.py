@@ -3,6 +3,12 @@
 Current subcommands:
 - extract-text: convert a versioned manual PDF to normalized plain text.
 - build-structure: derive section hierarchy and glossary candidates.
+- build-function-catalog: compile the function catalog from the manual.
+- export-catalog-db: write the catalog and structure to an indexed SQLite file.
+- index / search: BM25 full-text search over the sections of every version.
+- diff: hash-based section and catalog changes between two versions.
+- build-cheatsheet: assemble the prompt cheat sheet within a token budget.
+- runlog: tail the append-only run log or aggregate per-stage timings.
 
 Place this module inside the `realtestextract` virtual environment to ensure
 the required dependencies (notably `pypdf`) are available.
@@ -11,18 +17,38 @@ the required dependencies (notably `pypdf`) are available.
 from __future__ import annotations
 
 import argparse
+import filecmp
 import json
+import shutil
 import sys
-from dataclasses import dataclass
+import tempfile
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from hashlib import sha256
 from pathlib import Path
-from typing import Iterable, Callable
+from time import perf_counter
+from typing import IO, Callable, Iterable, Iterator
 
 import re
 
+from lark import Lark, LarkError, Token, Tree
+from lark.lexer import PatternStr
 from pypdf import PdfReader
 
+from .catalog_db import CATALOG_DB_NAME, export_catalog_db
+from .cheatsheet import CHEATSHEET_NAME, TOKEN_CACHE_NAME, TokenCache, build_cheatsheet
+from .manual_diff import (
+    catalog_hashes,
+    diff_hashes,
+    file_stats,
+    load_manifest,
+    section_hashes,
+    write_manifest,
+)
+from .manual_search import MANUAL_INDEX_NAME, search_manual, update_manual_index
+from .prompt_token_check import DEFAULT_MODEL, resolve_tokenizer
+from .runlog import append_runlog, migrate_runlog, read_runlog, stage_timings, tail_runlog
+
 
 DEFAULT_VERSIONS_DIR = Path("versions")
 
@@ -31,6 +57,10 @@ DEFAULT_VERSIONS_DIR = Path("versions")
 class CLIContext:
     repo_root: Path
     versions_dir: Path
+    started: float = field(default_factory=perf_counter)
+
+    def elapsed_ms(self) -> float:
+        return round((perf_counter() - self.started) * 1000, 1)
 
 
 def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
@@ -89,6 +119,97 @@ def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
         help="Maximum sample snippets to attach to each entry (default: 3)",
     )
 
+    export_parser = subparsers.add_parser(
+        "export-catalog-db",
+        help="Export function_catalog.json and manual_structure.json to SQLite",
+    )
+    export_parser.add_argument(
+        "--version",
+        help="Version slug (defaults to latest version directory)",
+    )
+
+    index_parser = subparsers.add_parser(
+        "index",
+        help="Build or refresh the full-text search index over manual sections",
+    )
+    index_parser.add_argument(
+        "--version",
+        help="Version slug to index (defaults to every version with a manual_structure.json)",
+    )
+
+    search_parser = subparsers.add_parser(
+        "search",
+        help="Search manual sections by relevance",
+    )
+    search_parser.add_argument("query", nargs="+", help="Words to search for")
+    search_parser.add_argument(
+        "--version",
+        help="Restrict results to one version slug (default: all indexed versions)",
+    )
+    search_parser.add_argument(
+        "--limit",
+        type=int,
+        default=10,
+        help="Maximum number of sections to return (default: 10)",
+    )
+
+    diff_parser = subparsers.add_parser(
+        "diff",
+        help="Report section and catalog changes between two versions",
+    )
+    diff_parser.add_argument("base", help="Older version slug")
+    diff_parser.add_argument("target", help="Newer version slug")
+    diff_parser.add_argument(
+        "--details",
+        action="store_true",
+        help="Print a unified diff of the text of each changed section",
+    )
+
+    cheatsheet_parser = subparsers.add_parser(
+        "build-cheatsheet",
+        help="Assemble prompt_assets/function_cheatsheet.md within a token budget",
+    )
+    cheatsheet_parser.add_argument(
+        "--version",
+        help="Version slug (defaults to latest version directory)",
+    )
+    cheatsheet_parser.add_argument(
+        "--budget",
+        type=int,
+        default=6000,
+        help="Maximum tokens for the cheat sheet (default: 6000)",
+    )
+    cheatsheet_parser.add_argument(
+        "--model",
+        default=DEFAULT_MODEL,
+        help=f"Model name for tokenization (default: {DEFAULT_MODEL})",
+    )
+
+    runlog_parser = subparsers.add_parser(
+        "runlog",
+        help="Show recent run log entries and per-stage timings",
+    )
+    runlog_parser.add_argument(
+        "--version",
+        help="Version slug (defaults to latest version directory)",
+    )
+    runlog_parser.add_argument(
+        "--tail",
+        type=int,
+        default=10,
+        help="Number of most recent entries to print (default: 10)",
+    )
+    runlog_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Aggregate run counts and durations per stage instead",
+    )
+    runlog_parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="Convert a legacy runlog.json array to runlog.jsonl and exit",
+    )
+
     return parser.parse_args(list(argv) if argv is not None else None)
 
 
@@ -146,103 +267,169 @@ def read_manual_lines(manual_txt: Path) -> list[str]:
     return manual_txt.read_text(encoding="utf-8").splitlines()
 
 
-def next_meaningful_line(lines: list[str], start_index: int) -> str | None:
-    for idx in range(start_index + 1, len(lines)):
-        candidate = lines[idx].strip()
-        if not candidate:
-            continue
-        if candidate.isdigit():
-            continue
-        return candidate
-    return None
+def iter_manual_lines(manual_txt: Path) -> Iterator[str]:
+    """Stream manual.txt one line at a time, split exactly like `read_manual_lines`."""
+    with manual_txt.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            # str.splitlines also breaks on form feeds and other separators.
+            yield from line.splitlines() or [""]
 
 
-HEADING_PATTERN = re.compile(r"^(\d+(?:\.\d+)*)\.\s+(.*\S)")
+def is_meaningful_line(stripped: str) -> bool:
+    # Blank lines and bare page numbers separate a heading from its text.
+    return bool(stripped) and not stripped.isdigit()
 
 
-def extract_sections(lines: list[str]) -> list[dict[str, object]]:
-    sections: list[dict[str, object]] = []
-    for idx, line in enumerate(lines):
-        stripped = line.strip()
-        match = HEADING_PATTERN.match(stripped)
-        if not match:
-            continue
+HEADING_PATTERN = re.compile(r"^(\d+(?:\.\d+)*)\.\s+(.*\S)")
+SECTION_NUMBER_PATTERN = re.compile(r"^\d+(?:\.\d+)*\.")
+GLOSSARY_MARKER_PATTERN = re.compile(r"([a-z])((The|This|These|While|Please|As|In)\s)")
 
-        following = next_meaningful_line(lines, idx)
-        if following and set(following) <= {"."}:
-            # Table-of-contents entry; real section text has prose instead of dot leaders.
-            continue
 
-        number = match.group(1)
-        title = match.group(2).strip()
-        depth = number.count(".") + 1
-
-        sections.append(
-            {
-                "number": number,
-                "title": title,
-                "depth": depth,
-                "source_line": idx + 1,
-            }
-        )
+def section_heading(stripped: str, line_number: int) -> dict[str, object] | None:
+    match = HEADING_PATTERN.match(stripped)
+    if not match:
+        return None
+    number = match.group(1)
+    return {
+        "number": number,
+        "title": match.group(2).strip(),
+        "depth": number.count(".") + 1,
+        "source_line": line_number,
+    }
 
-    return sections
 
+def glossary_entries(raw_line: str, line_number: int) -> Iterator[dict[str, object]]:
+    stripped = raw_line.strip()
+    if not stripped:
+        return
 
-SECTION_NUMBER_PATTERN = re.compile(r"^\d+(?:\.\d+)*\.")
+    is_bullet = stripped.startswith(("-", "•", "·")) or "·" in raw_line
+    if not is_bullet:
+        return
 
+    segments = [seg.strip() for seg in raw_line.split("·") if seg.strip()]
+    if not segments:
+        segments = [raw_line]
 
-def extract_glossary(lines: list[str]) -> list[dict[str, object]]:
-    entries: list[dict[str, object]] = []
-    for idx, raw_line in enumerate(lines):
-        stripped = raw_line.strip()
-        if not stripped:
+    for segment in segments:
+        segment = segment.strip()
+        if not segment:
+            continue
+        segment = segment.lstrip("-•").strip()
+        if " - " not in segment:
             continue
 
-        is_bullet = stripped.startswith(("-", "•", "·")) or "·" in raw_line
-        if not is_bullet:
+        term, definition = segment.split(" - ", 1)
+        term = term.strip()
+        definition = definition.strip()
+
+        if not term or not definition:
+            continue
+        if SECTION_NUMBER_PATTERN.match(term):
+            continue
+        if term[0].isdigit():
             continue
 
-        segments = [seg.strip() for seg in raw_line.split("·") if seg.strip()]
-        if not segments:
-            segments = [raw_line]
-
-        for segment in segments:
-            segment = segment.strip()
-            if not segment:
-                continue
-            segment = segment.lstrip("-•").strip()
-            if " - " not in segment:
-                continue
-
-            term, definition = segment.split(" - ", 1)
-            term = term.strip()
-            definition = definition.strip()
-
-            if not term or not definition:
-                continue
-            if SECTION_NUMBER_PATTERN.match(term):
-                continue
-            if term[0].isdigit():
-                continue
-
-            if len(definition) > 200:
-                marker_match = re.search(
-                    r"([a-z])((The|This|These|While|Please|As|In)\s)",
-                    definition,
-                )
-                if marker_match:
-                    definition = definition[: marker_match.start(2)].rstrip()
+        if len(definition) > 200:
+            marker_match = GLOSSARY_MARKER_PATTERN.search(definition)
+            if marker_match:
+                definition = definition[: marker_match.start(2)].rstrip()
+
+        yield {
+            "term": term,
+            "definition": definition,
+            "source_line": line_number,
+        }
 
-            entries.append(
-                {
-                    "term": term,
-                    "definition": definition,
-                    "source_line": idx + 1,
-                }
-            )
 
-    return entries
+def scan_structure(lines: Iterable[str]) -> Iterator[tuple[str, dict[str, object]]]:
+    """Single pass yielding ("section", record) and ("glossary", entry) pairs.
+
+    A heading is held back until the next meaningful line is seen: a
+    table-of-contents entry is followed by dot leaders where a real section has
+    prose. That one pending heading is the only lookahead state kept.
+    """
+    pending: dict[str, object] | None = None
+    for idx, line in enumerate(lines):
+        stripped = line.strip()
+        if pending is not None and is_meaningful_line(stripped):
+            if not set(stripped) <= {"."}:
+                yield "section", pending
+            pending = None
+
+        heading = section_heading(stripped, idx + 1)
+        if heading is not None:
+            pending = heading
+
+        for entry in glossary_entries(line, idx + 1):
+            yield "glossary", entry
+
+    if pending is not None:
+        yield "section", pending
+
+
+class JSONArrayWriter:
+    """Write the items of one `json.dumps(..., indent=2)` array as they arrive."""
+
+    def __init__(self, handle: IO[str], key: str, level: int) -> None:
+        self.handle = handle
+        self.key = key
+        self.indent = "  " * level
+        self.count = 0
+
+    def write(self, item: dict[str, object]) -> None:
+        self.handle.write(",\n" if self.count else f"{self.indent}{json.dumps(self.key)}: [\n")
+        body = json.dumps(item, indent=2).replace("\n", "\n" + self.indent + "  ")
+        self.handle.write(self.indent + "  " + body)
+        self.count += 1
+
+    def close(self) -> None:
+        if self.count:
+            self.handle.write(f"\n{self.indent}]")
+        else:
+            self.handle.write(f"{self.indent}{json.dumps(self.key)}: []")
+
+
+def write_structure(
+    lines: Iterable[str], structure_path: Path
+) -> tuple[list[dict[str, object]], int, bool]:
+    """Stream sections and glossary into manual_structure.json.
+
+    Sections are written straight to a temporary file while glossary entries
+    are spooled to a second one, so no manual text is held in memory. The
+    output is byte-identical to the previous single `json.dumps` and the
+    existing file is only replaced when it differs. Returns (sections,
+    glossary_count, wrote_output); the section records are kept so the search
+    index can be fed without reading the file back.
+    """
+    section_records: list[dict[str, object]] = []
+    tmp_path = structure_path.with_name(structure_path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as out, tempfile.TemporaryFile(
+        "w+", encoding="utf-8"
+    ) as spool:
+        out.write("{\n")
+        sections = JSONArrayWriter(out, "sections", 1)
+        glossary = JSONArrayWriter(spool, "glossary", 1)
+        for kind, record in scan_structure(lines):
+            if kind == "section":
+                sections.write(record)
+                section_records.append(record)
+            else:
+                glossary.write(record)
+        sections.close()
+        glossary.close()
+        out.write(",\n")
+        spool.seek(0)
+        shutil.copyfileobj(spool, out)
+        out.write("\n}\n")
+
+    if structure_path.is_file() and filecmp.cmp(tmp_path, structure_path, shallow=False):
+        tmp_path.unlink()
+        wrote = False
+    else:
+        tmp_path.replace(structure_path)
+        wrote = True
+    return section_records, glossary.count, wrote
 
 
 def load_section_records(structure: list[dict[str, object]]) -> list[dict[str, object]]:
@@ -280,8 +467,28 @@ def section_content(record: dict[str, object], records: list[dict[str, object]],
     return lines[start:end]
 
 
+def section_own_content(
+    record: dict[str, object], records: list[dict[str, object]], lines: list[str]
+) -> list[str]:
+    """Like `section_content` but stops at the next heading of any depth."""
+    start = int(record["source_line"]) - 1
+    following = records[record["index"] + 1 : record["index"] + 2]
+    end = int(following[0]["source_line"]) - 1 if following else len(lines)
+    return lines[start:end]
+
+
 SECTION_KEYWORDS = ["Category", "Description", "Example", "Notes", "See also", "Syntax", "Parameters"]
 
+# Compiled once and shared by every section: a single alternation finds all
+# keyword positions in one left-to-right scan of the block.
+SECTION_KEYWORD_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(keyword) for keyword in SECTION_KEYWORDS) + r")\b",
+    re.IGNORECASE,
+)
+# Collapses whitespace runs and splits glued words ("fooBar", "(x)Bar") in one pass.
+SEGMENT_SPACING_PATTERN = re.compile(r"\s+|(?<=[a-z)])(?=[A-Z])")
+SUBSECTION_LINE_PATTERN = re.compile(r"^\d+\.\d+")
+
 
 def parse_section_segments(content_lines: list[str]) -> dict[str, list[str]]:
     filtered: list[str] = []
@@ -293,30 +500,25 @@ def parse_section_segments(content_lines: list[str]) -> dict[str, list[str]]:
             continue
         if set(stripped) <= {"."}:
             continue
-        if re.match(r"^\d+\.\d+.*", stripped):
+        if SUBSECTION_LINE_PATTERN.match(stripped):
             continue
         filtered.append(stripped)
 
     if not filtered:
         return {}
 
-    block = " ".join(filtered)
-    block = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", block)
-    block = re.sub(r"(?<=\))(?=[A-Z])", " ", block)
-    block = re.sub(r"\s+", " ", block).strip()
+    block = SEGMENT_SPACING_PATTERN.sub(" ", " ".join(filtered)).strip()
     segments: dict[str, list[str]] = {}
 
-    positions: list[tuple[int, str]] = []
-    for keyword in SECTION_KEYWORDS:
-        pattern = re.compile(rf"\b{keyword}\b", re.IGNORECASE)
-        for match in pattern.finditer(block):
-            positions.append((match.start(), keyword.lower()))
+    positions = [
+        (match.start(), match.group(1).lower())
+        for match in SECTION_KEYWORD_PATTERN.finditer(block)
+    ]
 
     if not positions:
         segments["raw"] = [block]
         return segments
 
-    positions.sort()
     for idx, (pos, key) in enumerate(positions):
         next_pos = positions[idx + 1][0] if idx + 1 < len(positions) else len(block)
         value = block[pos + len(key) : next_pos].strip()
@@ -413,29 +615,190 @@ def normalize_list_segment(values: list[str] | None) -> list[str]:
     return cleaned
 
 
-def grammar_contains(token: str, grammar_text: str) -> bool:
-    if not token:
-        return False
-    variants = {token, token.upper(), token.lower()}
-    for variant in variants:
-        if variant and variant in grammar_text:
-            return True
-    return False
+GRAMMAR_WORD_PATTERN = re.compile(
+    r"(?:\(\?i\))?\(?([A-Za-z_]\w*(?:\|[A-Za-z_]\w*)*)\)?:?"
+)
+SAMPLE_AST_CACHE_NAME = "sample_ast_cache.json"
+SAMPLE_NAME_PATTERN = re.compile(r"[#?]?[A-Za-z_]\w*")
+SKIPPED_SAMPLE_TOKENS = {"NOTE_BLOCK", "CPP_COMMENT", "INLINE_COMMENT", "BLOCK_COMMENT"}
+
+
+def normalize_name(token: str) -> str:
+    return token.strip().rstrip(":").strip().lower()
 
 
-def append_runlog(version_dir: Path, entry: dict) -> None:
-    runlog_path = version_dir / "runlog.json"
-    if runlog_path.exists():
+@dataclass(frozen=True)
+class GrammarVocabulary:
+    terminals: frozenset[str]
+    rules: frozenset[str]
+    names: frozenset[str]
+
+    def recognizes(self, token: str) -> bool:
+        return bool(token) and normalize_name(token) in self.names
+
+
+def load_grammar(grammar_path: Path) -> Lark | None:
+    if not grammar_path.is_file():
+        return None
+    return Lark(
+        grammar_path.read_text(encoding="utf-8"),
+        start="start",
+        parser="earley",
+        lexer="dynamic",
+    )
+
+
+def grammar_vocabulary(parser: Lark | None) -> GrammarVocabulary:
+    """Collect the literal words the grammar itself recognizes.
+
+    String terminals ("from", "Latest") contribute their value; regex terminals
+    contribute their words when they are a plain keyword or an alternation of
+    keywords (section headers, RESERVED_IDENTIFIER, SECTION_WORD, ...).
+    """
+    if parser is None:
+        return GrammarVocabulary(frozenset(), frozenset(), frozenset())
+
+    names: set[str] = set()
+    for terminal in parser.terminals:
+        pattern = terminal.pattern
+        if isinstance(pattern, PatternStr):
+            if SAMPLE_NAME_PATTERN.fullmatch(pattern.value):
+                names.add(normalize_name(pattern.value))
+            continue
+        match = GRAMMAR_WORD_PATTERN.fullmatch(pattern.value)
+        if match:
+            names.update(normalize_name(word) for word in match.group(1).split("|"))
+
+    return GrammarVocabulary(
+        terminals=frozenset(terminal.name for terminal in parser.terminals),
+        rules=frozenset(rule.origin.name for rule in parser.rules),
+        names=frozenset(names),
+    )
+
+
+@dataclass
+class SampleUsage:
+    names: dict[str, set[str]]
+    calls: dict[str, set[str]]
+    parsed: int = 0
+    failed: int = 0
+
+    def files_using(self, token: str) -> set[str]:
+        return self.names.get(normalize_name(token), set())
+
+
+def sample_ast_names(parser: Lark, text: str) -> tuple[list[str], list[str]]:
+    """Return the (names, function calls) appearing in one sample's AST."""
+    tree = parser.parse(text)
+    names: set[str] = set()
+    for token in tree.scan_values(lambda value: isinstance(value, Token)):
+        if token.type in SKIPPED_SAMPLE_TOKENS or token.value.startswith('"'):
+            continue
+        # PATH_LITERAL swallows trailing "// comments" on "#Avg #ByIndu ..." lines.
+        value = token.value.split("//", 1)[0]
+        names.update(normalize_name(word) for word in SAMPLE_NAME_PATTERN.findall(value))
+
+    calls: set[str] = set()
+    for call in tree.find_data("function_call"):
+        head = call.children[0]
+        if isinstance(head, Tree):
+            calls.add(".".join(str(child.children[0]) for child in head.children))
+        else:
+            calls.add(str(head))
+    return sorted(names), sorted(calls)
+
+
+def collect_sample_usage(
+    parser: Lark | None,
+    samples: list[tuple[Path, list[str]]],
+    repo_root: Path,
+    cache_path: Path | None = None,
+    grammar_sha256: str = "",
+) -> SampleUsage:
+    """Parse every sample and index the names appearing in its AST by file.
+
+    Results are cached per sample keyed by the sample and grammar hashes, so
+    a rebuild only re-parses samples (or grammars) that actually changed.
+    """
+    usage = SampleUsage(names={}, calls={})
+    if parser is None:
+        return usage
+
+    cache: dict[str, dict[str, object]] = {}
+    if cache_path is not None and cache_path.is_file():
         try:
-            history = json.loads(runlog_path.read_text(encoding="utf-8"))
-            if not isinstance(history, list):
-                history = []
+            cache = json.loads(cache_path.read_text(encoding="utf-8"))
         except json.JSONDecodeError:
-            history = []
-    else:
-        history = []
-    history.append(entry)
-    runlog_path.write_text(json.dumps(history, indent=2) + "\n", encoding="utf-8")
+            cache = {}
+
+    fresh: dict[str, dict[str, object]] = {}
+    for path, lines in samples:
+        rel_path = path.relative_to(repo_root).as_posix()
+        text = "\n".join(lines) + "\n"
+        key = sha256((grammar_sha256 + "\0" + text).encode("utf-8")).hexdigest()
+        cached = cache.get(rel_path)
+        if cached and cached.get("key") == key:
+            fresh[rel_path] = cached
+        else:
+            try:
+                names, calls = sample_ast_names(parser, text)
+                fresh[rel_path] = {"key": key, "ok": True, "names": names, "calls": calls}
+            except LarkError:
+                fresh[rel_path] = {"key": key, "ok": False, "names": [], "calls": []}
+
+        result = fresh[rel_path]
+        if not result["ok"]:
+            usage.failed += 1
+            continue
+        usage.parsed += 1
+        for name in result["names"]:
+            usage.names.setdefault(name, set()).add(rel_path)
+        for name in result["calls"]:
+            usage.calls.setdefault(name, set()).add(rel_path)
+
+    if cache_path is not None and fresh != cache:
+        cache_path.write_text(json.dumps(fresh, indent=2) + "\n", encoding="utf-8")
+
+    return usage
+
+
+def coverage_matrix(
+    entries: list[dict[str, object]],
+    usage: SampleUsage,
+) -> dict[str, object]:
+    documented = {normalize_name(name) for item in entries for name in [item["name"], *item["aliases"]]}
+    counts = {
+        "documented": len(entries),
+        "used_in_samples": 0,
+        "grammar_recognized": 0,
+        "used_and_recognized": 0,
+        "used_only": 0,
+        "recognized_only": 0,
+        "documented_only": 0,
+    }
+    for item in entries:
+        used = bool(item["sample_usage"])
+        recognized = bool(item["grammar_match"])
+        counts["used_in_samples"] += used
+        counts["grammar_recognized"] += recognized
+        if used and recognized:
+            counts["used_and_recognized"] += 1
+        elif used:
+            counts["used_only"] += 1
+        elif recognized:
+            counts["recognized_only"] += 1
+        else:
+            counts["documented_only"] += 1
+
+    undocumented_calls = sorted(
+        name for name in usage.calls if normalize_name(name) not in documented
+    )
+    return {
+        **counts,
+        "samples_parsed": usage.parsed,
+        "samples_failed": usage.failed,
+        "undocumented_calls": undocumented_calls,
+    }
 
 
 def action_extract_text(ctx: CLIContext, args: argparse.Namespace) -> int:
@@ -465,6 +828,7 @@ def action_extract_text(ctx: CLIContext, args: argparse.Namespace) -> int:
         {
             "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
             "action": "extract-text",
+            "duration_ms": ctx.elapsed_ms(),
             "manual_pdf": manual_pdf.relative_to(ctx.repo_root).as_posix(),
             "manual_txt": manual_txt.relative_to(ctx.repo_root).as_posix(),
             "pdf_sha256": pdf_hash,
@@ -489,41 +853,30 @@ def action_build_structure(ctx: CLIContext, args: argparse.Namespace) -> int:
             f"Manual text not found: {manual_txt}. Run 'extract-text' first."
         )
 
-    lines = read_manual_lines(manual_txt)
-    sections = extract_sections(lines)
-    glossary = extract_glossary(lines)
-
     structure_path = version_dir / "manual_structure.json"
-    payload = {
-        "sections": sections,
-        "glossary": glossary,
-    }
-    serialized = json.dumps(payload, indent=2) + "\n"
-
-    existing = structure_path.read_text(encoding="utf-8") if structure_path.exists() else None
-    if existing == serialized:
-        wrote = False
-    else:
-        structure_path.write_text(serialized, encoding="utf-8")
-        wrote = True
+    sections, glossary_count, wrote = write_structure(iter_manual_lines(manual_txt), structure_path)
 
     append_runlog(
         version_dir,
         {
             "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
             "action": "build-structure",
+            "duration_ms": ctx.elapsed_ms(),
             "manual_txt": manual_txt.relative_to(ctx.repo_root).as_posix(),
             "manual_structure": structure_path.relative_to(ctx.repo_root).as_posix(),
             "section_count": len(sections),
-            "glossary_count": len(glossary),
+            "glossary_count": glossary_count,
             "txt_sha256": hash_path(manual_txt),
             "wrote_output": wrote,
         },
     )
 
+    reindexed = index_version(ctx, version_dir, sections)
+
     print(f"Sections found: {len(sections)}")
-    print(f"Glossary entries: {len(glossary)}")
+    print(f"Glossary entries: {glossary_count}")
     print(f"manual_structure.json {'updated' if wrote else 'unchanged'}")
+    print(f"Search index {'updated' if reindexed else 'unchanged'}")
     return 0
 
 
@@ -552,10 +905,14 @@ def action_build_function_catalog(ctx: CLIContext, args: argparse.Namespace) ->
 
     samples = load_sample_files(samples_dir)
     grammar_path = ctx.repo_root / "bnf" / "lark" / "realtest.lark"
-    grammar_text = (
-        grammar_path.read_text(encoding="utf-8")
-        if grammar_path.exists()
-        else ""
+    grammar_parser = load_grammar(grammar_path)
+    vocabulary = grammar_vocabulary(grammar_parser)
+    usage = collect_sample_usage(
+        grammar_parser,
+        samples,
+        ctx.repo_root,
+        cache_path=ctx.versions_dir / SAMPLE_AST_CACHE_NAME,
+        grammar_sha256=hash_path(grammar_path) if grammar_path.exists() else "",
     )
 
     entries: list[dict[str, object]] = []
@@ -585,7 +942,8 @@ def action_build_function_catalog(ctx: CLIContext, args: argparse.Namespace) ->
         see_also = normalize_list_segment(segments.get("see also"))
 
         sample_examples = find_sample_examples(tokens, samples, ctx.repo_root, max_examples)
-        grammar_match = any(grammar_contains(token, grammar_text) for token in tokens)
+        grammar_match = any(vocabulary.recognizes(token) for token in tokens)
+        used_in = set().union(*(usage.files_using(token) for token in tokens))
 
         entry = {
             "name": name,
@@ -606,6 +964,7 @@ def action_build_function_catalog(ctx: CLIContext, args: argparse.Namespace) ->
                 }
             ],
             "sample_examples": sample_examples,
+            "sample_usage": sorted(used_in),
             "grammar_match": grammar_match,
         }
 
@@ -631,6 +990,9 @@ def action_build_function_catalog(ctx: CLIContext, args: argparse.Namespace) ->
         existing_samples.extend(entry.get("sample_examples", []))
         existing["sample_examples"] = existing_samples[: max_examples]
 
+        existing["sample_usage"] = sorted(
+            set(existing.get("sample_usage", [])) | set(entry.get("sample_usage", []))
+        )
         existing["grammar_match"] = existing.get("grammar_match") or entry.get("grammar_match")
 
         if not existing.get("description") and entry.get("description"):
@@ -658,6 +1020,7 @@ def action_build_function_catalog(ctx: CLIContext, args: argparse.Namespace) ->
         "category_counts": category_counts,
         "grammar_matches": grammar_hits,
         "entries_with_samples": sample_hits,
+        "coverage": coverage_matrix(final_entries, usage),
     }
 
     payload = {
@@ -682,12 +1045,15 @@ def action_build_function_catalog(ctx: CLIContext, args: argparse.Namespace) ->
         {
             "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
             "action": "build-function-catalog",
+            "duration_ms": ctx.elapsed_ms(),
             "manual_txt": manual_txt.relative_to(ctx.repo_root).as_posix(),
             "manual_structure": structure_path.relative_to(ctx.repo_root).as_posix(),
             "function_catalog": catalog_path.relative_to(ctx.repo_root).as_posix(),
             "entry_count": len(final_entries),
             "grammar_matches": grammar_hits,
             "entries_with_samples": sample_hits,
+            "samples_parsed": usage.parsed,
+            "samples_failed": usage.failed,
             "txt_sha256": hash_path(manual_txt),
             "structure_sha256": hash_path(structure_path),
             "wrote_output": wrote,
@@ -697,6 +1063,16 @@ def action_build_function_catalog(ctx: CLIContext, args: argparse.Namespace) ->
     print(f"Function catalog entries: {len(final_entries)}")
     print(f"Categories detected: {len(category_counts)}")
     print(f"Grammar matches: {grammar_hits}")
+    coverage = summary["coverage"]
+    print(
+        f"Sample ASTs parsed: {coverage['samples_parsed']}"
+        f" ({coverage['samples_failed']} failed)"
+    )
+    print(
+        "Coverage (used+grammar / used / grammar / neither): "
+        f"{coverage['used_and_recognized']} / {coverage['used_only']} / "
+        f"{coverage['recognized_only']} / {coverage['documented_only']}"
+    )
     print(
         f"Entries with sample snippets: {sample_hits}" +
         ("" if sample_hits else " (no matches found in samples)")
@@ -705,6 +1081,270 @@ def action_build_function_catalog(ctx: CLIContext, args: argparse.Namespace) ->
     return 0
 
 
+def action_export_catalog_db(ctx: CLIContext, args: argparse.Namespace) -> int:
+    version_dir = discover_version_dir(ctx, args.version)
+    catalog_path = version_dir / "function_catalog.json"
+    structure_path = version_dir / "manual_structure.json"
+    if not catalog_path.is_file():
+        raise FileNotFoundError(
+            f"Function catalog not found: {catalog_path}. Run 'build-function-catalog' first."
+        )
+
+    source_hash = sha256(hash_path(catalog_path).encode("ascii"))
+    structure = None
+    if structure_path.is_file():
+        source_hash.update(hash_path(structure_path).encode("ascii"))
+        structure = json.loads(structure_path.read_text(encoding="utf-8"))
+
+    catalog = json.loads(catalog_path.read_text(encoding="utf-8"))
+    db_path = version_dir / CATALOG_DB_NAME
+    wrote = export_catalog_db(catalog, structure, db_path, source_hash.hexdigest())
+
+    append_runlog(
+        version_dir,
+        {
+            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "action": "export-catalog-db",
+            "duration_ms": ctx.elapsed_ms(),
+            "function_catalog": catalog_path.relative_to(ctx.repo_root).as_posix(),
+            "catalog_db": db_path.relative_to(ctx.repo_root).as_posix(),
+            "entry_count": len(catalog.get("entries", [])),
+            "db_bytes": db_path.stat().st_size,
+            "wrote_output": wrote,
+        },
+    )
+
+    print(f"Catalog entries: {len(catalog.get('entries', []))}")
+    print(f"{db_path.name}: {db_path.stat().st_size} bytes")
+    print(f"{db_path.name} {'updated' if wrote else 'unchanged'}")
+    return 0
+
+
+def index_version(
+    ctx: CLIContext, version_dir: Path, sections: list[dict[str, object]] | None = None
+) -> bool:
+    """Index a version's sections, streaming their text from manual.txt.
+
+    `sections` are the records `write_structure` just produced; without them
+    they are read from manual_structure.json.
+    """
+    manual_txt = version_dir / "manual.txt"
+    structure_path = version_dir / "manual_structure.json"
+    if sections is None:
+        sections = json.loads(structure_path.read_text(encoding="utf-8")).get("sections", [])
+    return update_manual_index(
+        ctx.versions_dir / MANUAL_INDEX_NAME,
+        version_dir.name,
+        sections,
+        iter_manual_lines(manual_txt),
+        hash_path(manual_txt),
+        hash_path(structure_path),
+    )
+
+
+def action_index(ctx: CLIContext, args: argparse.Namespace) -> int:
+    if args.version:
+        version_dirs = [discover_version_dir(ctx, args.version)]
+    else:
+        version_dirs = sorted(
+            path.parent
+            for path in ctx.versions_dir.glob("*/manual_structure.json")
+            if (path.parent / "manual.txt").is_file()
+        )
+    if not version_dirs:
+        raise FileNotFoundError(
+            f"No versions with manual_structure.json found in {ctx.versions_dir}. "
+            "Run 'build-structure' first."
+        )
+
+    for version_dir in version_dirs:
+        reindexed = index_version(ctx, version_dir)
+        print(f"{version_dir.name}: {'indexed' if reindexed else 'unchanged'}")
+    return 0
+
+
+def action_search(ctx: CLIContext, args: argparse.Namespace) -> int:
+    started = perf_counter()
+    hits = search_manual(
+        ctx.versions_dir / MANUAL_INDEX_NAME,
+        " ".join(args.query),
+        version=args.version,
+        limit=max(args.limit, 1),
+    )
+    elapsed_ms = (perf_counter() - started) * 1000
+
+    for rank, hit in enumerate(hits, start=1):
+        print(f"{rank:2d}. [{hit.version}] {hit.number} {hit.title} (line {hit.source_line})")
+        print(f"    {hit.snippet}")
+    print(f"{len(hits)} result(s) in {elapsed_ms:.1f} ms")
+    return 0 if hits else 1
+
+
+def version_manifest(version_dir: Path) -> dict[str, object]:
+    """Load the hash manifest of a version, rebuilding it only when its sources changed.
+
+    While the sources keep the size and modification time the manifest
+    recorded, nothing else is read; otherwise they are hashed, and only a
+    change in those hashes re-reads the manual to hash every section.
+    """
+    manual_txt = version_dir / "manual.txt"
+    structure_path = version_dir / "manual_structure.json"
+    catalog_path = version_dir / "function_catalog.json"
+    if not manual_txt.is_file() or not structure_path.is_file():
+        raise FileNotFoundError(
+            f"{version_dir.name} needs manual.txt and manual_structure.json. "
+            "Run 'extract-text' and 'build-structure' first."
+        )
+
+    paths = {"txt_sha256": manual_txt, "structure_sha256": structure_path, "catalog_sha256": catalog_path}
+    stats = file_stats(paths)
+    manifest = load_manifest(version_dir)
+    if manifest is not None and manifest.get("stats") == stats:
+        return manifest
+
+    sources = {key: hash_path(path) if path.is_file() else None for key, path in paths.items()}
+    if manifest is not None and manifest.get("sources") == sources:
+        return write_manifest(version_dir, sources, stats, manifest["sections"], manifest["catalog"])
+
+    lines, records = version_sections(version_dir)
+    catalog = (
+        json.loads(catalog_path.read_text(encoding="utf-8"))
+        if catalog_path.is_file()
+        else {}
+    )
+    return write_manifest(
+        version_dir,
+        sources,
+        stats,
+        section_hashes(records, lambda record: section_own_content(record, records, lines)),
+        catalog_hashes(catalog),
+    )
+
+
+def version_sections(version_dir: Path) -> tuple[list[str], list[dict[str, object]]]:
+    """The manual lines and section records of a version, for rendering section text."""
+    lines = read_manual_lines(version_dir / "manual.txt")
+    structure = json.loads((version_dir / "manual_structure.json").read_text(encoding="utf-8"))
+    return lines, load_section_records(structure.get("sections", []))
+
+
+def action_diff(ctx: CLIContext, args: argparse.Namespace) -> int:
+    base_dir = discover_version_dir(ctx, args.base)
+    target_dir = discover_version_dir(ctx, args.target)
+    base_manifest = version_manifest(base_dir)
+    target_manifest = version_manifest(target_dir)
+
+    section_diff = diff_hashes(base_manifest["sections"], target_manifest["sections"])
+    catalog_diff = diff_hashes(base_manifest["catalog"], target_manifest["catalog"])
+
+    for label, diff in (("Sections", section_diff), ("Catalog entries", catalog_diff)):
+        print(
+            f"{label}: +{len(diff.added)} -{len(diff.removed)} ~{len(diff.changed)}"
+        )
+        for marker, keys in (("+", diff.added), ("-", diff.removed), ("~", diff.changed)):
+            for key in keys:
+                print(f"  {marker} {key}")
+
+    if args.details and section_diff.changed:
+        from difflib import unified_diff
+
+        base_lines, base_records = version_sections(base_dir)
+        target_lines, target_records = version_sections(target_dir)
+
+        def text_for(manifest, records, lines, key):
+            number = manifest["sections"][key]["number"]
+            record = next(item for item in records if item["number"] == number)
+            return [line.strip() for line in section_own_content(record, records, lines) if line.strip()]
+
+        for key in section_diff.changed:
+            print()
+            for line in unified_diff(
+                text_for(base_manifest, base_records, base_lines, key),
+                text_for(target_manifest, target_records, target_lines, key),
+                fromfile=f"{base_dir.name}:{key}",
+                tofile=f"{target_dir.name}:{key}",
+                lineterm="",
+            ):
+                print(line)
+    return 0
+
+
+def action_build_cheatsheet(ctx: CLIContext, args: argparse.Namespace) -> int:
+    version_dir = discover_version_dir(ctx, args.version)
+    catalog_path = version_dir / "function_catalog.json"
+    if not catalog_path.is_file():
+        raise FileNotFoundError(
+            f"Function catalog not found: {catalog_path}. Run 'build-function-catalog' first."
+        )
+
+    catalog = json.loads(catalog_path.read_text(encoding="utf-8"))
+    counter, tokenizer = resolve_tokenizer(args.model)
+    cache = TokenCache(ctx.versions_dir / TOKEN_CACHE_NAME, counter, tokenizer)
+    result = build_cheatsheet(catalog.get("entries", []), args.budget, cache)
+    cache.save()
+
+    assets_dir = version_dir / "prompt_assets"
+    assets_dir.mkdir(exist_ok=True)
+    cheatsheet_path = assets_dir / CHEATSHEET_NAME
+    existing = cheatsheet_path.read_text(encoding="utf-8") if cheatsheet_path.exists() else None
+    wrote = existing != result.text
+    if wrote:
+        cheatsheet_path.write_text(result.text, encoding="utf-8")
+
+    append_runlog(
+        version_dir,
+        {
+            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "action": "build-cheatsheet",
+            "duration_ms": ctx.elapsed_ms(),
+            "function_catalog": catalog_path.relative_to(ctx.repo_root).as_posix(),
+            "cheatsheet": cheatsheet_path.relative_to(ctx.repo_root).as_posix(),
+            "tokenizer": tokenizer,
+            "budget": args.budget,
+            "tokens": result.tokens,
+            "entries_selected": len(result.selected),
+            "entries_skipped": len(result.skipped),
+            "token_cache_hits": result.cache_hits,
+            "token_cache_misses": result.cache_misses,
+            "wrote_output": wrote,
+        },
+    )
+
+    print(f"Tokenizer: {tokenizer}")
+    print(f"Tokens: {result.tokens} / {args.budget}")
+    print(f"Entries included: {len(result.selected)} (skipped {len(result.skipped)})")
+    print(f"Token cache: {result.cache_hits} hits, {result.cache_misses} misses")
+    print(f"{CHEATSHEET_NAME} {'updated' if wrote else 'unchanged'}")
+    return 0
+
+
+def action_runlog(ctx: CLIContext, args: argparse.Namespace) -> int:
+    version_dir = discover_version_dir(ctx, args.version)
+
+    if args.migrate:
+        moved = migrate_runlog(version_dir)
+        print(f"Migrated {moved} legacy entries into runlog.jsonl")
+        return 0
+
+    if args.stats:
+        stats = stage_timings(read_runlog(version_dir))
+        print(f"{'action':<26}{'runs':>6}{'timed':>7}{'mean ms':>11}{'max ms':>11}  last run")
+        for action, bucket in sorted(stats.items()):
+            mean = "-" if bucket["mean_ms"] is None else f"{bucket['mean_ms']:.1f}"
+            maximum = f"{bucket['max_ms']:.1f}" if bucket["timed_runs"] else "-"
+            print(
+                f"{action:<26}{bucket['runs']:>6}{bucket['timed_runs']:>7}"
+                f"{mean:>11}{maximum:>11}  {bucket['last_run']}"
+            )
+        return 0
+
+    for entry in tail_runlog(version_dir, args.tail):
+        duration = entry.get("duration_ms")
+        timing = f" ({duration:.1f} ms)" if isinstance(duration, (int, float)) else ""
+        print(f"{entry.get('timestamp', '?')}  {entry.get('action', '?')}{timing}")
+    return 0
+
+
 def action_not_implemented(command: str) -> Callable[[CLIContext, argparse.Namespace], int]:
     def runner(__ctx: CLIContext, __args: argparse.Namespace) -> int:
         raise NotImplementedError(f"Command '{command}' is not implemented yet")
@@ -716,6 +1356,12 @@ COMMANDS: dict[str, Callable[[CLIContext, argparse.Namespace], int]] = {
     "extract-text": action_extract_text,
     "build-structure": action_build_structure,
     "build-function-catalog": action_build_function_catalog,
+    "export-catalog-db": action_export_catalog_db,
+    "index": action_index,
+    "search": action_search,
+    "diff": action_diff,
+    "build-cheatsheet": action_build_cheatsheet,
+    "runlog": action_runlog,
 }
 
 
@@ -0,0 +1,165 @@
+"""Append-only JSONL run log shared by the pipeline stages of a version.
+
+Each stage appends one JSON object per line to `runlog.jsonl` with a single
+`O_APPEND` write while holding an exclusive lock on `runlog.jsonl.lock`, so
+concurrent stages never interleave or lose entries and appending costs the
+same however long the history grows. The legacy `runlog.json` array is
+migrated into the JSONL file the first time the log is touched.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:  # POSIX
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+RUNLOG_NAME = "runlog.jsonl"
+LEGACY_RUNLOG_NAME = "runlog.json"
+TAIL_BLOCK_SIZE = 64 * 1024
+
+
+@contextmanager
+def runlog_lock(version_dir: Path) -> Iterator[None]:
+    lock_path = version_dir / (RUNLOG_NAME + ".lock")
+    with lock_path.open("a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover - Windows
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover - Windows
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def encode_entry(entry: dict) -> bytes:
+    return (json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _migrate_locked(version_dir: Path) -> int:
+    legacy_path = version_dir / LEGACY_RUNLOG_NAME
+    if not legacy_path.is_file():
+        return 0
+    try:
+        history = json.loads(legacy_path.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        history = []
+    if not isinstance(history, list):
+        history = []
+
+    runlog_path = version_dir / RUNLOG_NAME
+    existing = runlog_path.read_bytes() if runlog_path.exists() else b""
+    tmp_path = runlog_path.with_name(RUNLOG_NAME + ".tmp")
+    tmp_path.write_bytes(b"".join(encode_entry(entry) for entry in history) + existing)
+    tmp_path.replace(runlog_path)
+    legacy_path.unlink()
+    return len(history)
+
+
+def migrate_runlog(version_dir: Path) -> int:
+    """Fold a legacy `runlog.json` array into `runlog.jsonl`; returns entries moved."""
+    if not (version_dir / LEGACY_RUNLOG_NAME).is_file():
+        return 0
+    with runlog_lock(version_dir):
+        return _migrate_locked(version_dir)
+
+
+def append_runlog(version_dir: Path, entry: dict) -> None:
+    line = encode_entry(entry)
+    with runlog_lock(version_dir):
+        _migrate_locked(version_dir)
+        fd = os.open(version_dir / RUNLOG_NAME, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+
+def _decode_lines(lines: Iterator[bytes]) -> Iterator[dict]:
+    for raw in lines:
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            yield json.loads(raw)
+        except json.JSONDecodeError:
+            # A torn final line from a crashed writer; skip it.
+            continue
+
+
+def read_runlog(version_dir: Path) -> Iterator[dict]:
+    """Stream every entry, oldest first, including any unmigrated legacy log."""
+    legacy_path = version_dir / LEGACY_RUNLOG_NAME
+    if legacy_path.is_file():
+        try:
+            history = json.loads(legacy_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            history = []
+        if isinstance(history, list):
+            yield from history
+
+    runlog_path = version_dir / RUNLOG_NAME
+    if runlog_path.is_file():
+        with runlog_path.open("rb") as handle:
+            yield from _decode_lines(handle)
+
+
+def tail_runlog(version_dir: Path, count: int) -> list[dict]:
+    """Return the last `count` entries, reading the file backwards in blocks."""
+    if count <= 0:
+        return []
+    runlog_path = version_dir / RUNLOG_NAME
+    if (version_dir / LEGACY_RUNLOG_NAME).is_file() or not runlog_path.is_file():
+        return list(read_runlog(version_dir))[-count:]
+
+    with runlog_path.open("rb") as handle:
+        position = handle.seek(0, os.SEEK_END)
+        buffer = b""
+        # One extra newline guarantees the oldest kept line is complete.
+        while position > 0 and buffer.count(b"\n") <= count:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            handle.seek(position)
+            buffer = handle.read(step) + buffer
+
+    lines = buffer.splitlines()
+    if position > 0:
+        lines = lines[1:]
+    return list(_decode_lines(iter(lines)))[-count:]
+
+
+def stage_timings(entries: Iterator[dict]) -> dict[str, dict[str, float | int]]:
+    """Aggregate run count and duration statistics per pipeline action."""
+    stats: dict[str, dict[str, float | int]] = {}
+    for entry in entries:
+        action = entry.get("action", "unknown")
+        bucket = stats.setdefault(
+            action,
+            {"runs": 0, "timed_runs": 0, "total_ms": 0.0, "max_ms": 0.0, "last_run": ""},
+        )
+        bucket["runs"] += 1
+        bucket["last_run"] = max(bucket["last_run"], str(entry.get("timestamp", "")))
+        duration = entry.get("duration_ms")
+        if isinstance(duration, (int, float)):
+            bucket["timed_runs"] += 1
+            bucket["total_ms"] += duration
+            bucket["max_ms"] = max(bucket["max_ms"], duration)
+
+    for bucket in stats.values():
+        timed = bucket["timed_runs"]
+        bucket["mean_ms"] = round(bucket["total_ms"] / timed, 1) if timed else None
+        bucket["total_ms"] = round(bucket["total_ms"], 1)
+    return stats
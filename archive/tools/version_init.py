@@ -167,6 +167,10 @@ def main(argv: Iterable[str] | None = None) -> int:
             "Wrote metadata to: "
             f"{(ctx.version_dir / 'metadata.json').relative_to(ctx.repo_root)}"
         )
+        print(
+            "Next: run 'python -m tools.rt_manual extract-text' and 'build-structure';"
+            " build-structure also adds the version to the manual search index."
+        )
     return 0
 
 
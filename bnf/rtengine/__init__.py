@@ -0,0 +1,74 @@
+"""Vectorized evaluation of RealTest formulas in Python.
+
+Formulas are parsed with `lark/realtest.lark` into hashable expression nodes
+and evaluated as NumPy operations over a `Panel`, one (symbols, dates)
+float64 array per bar field, so each formula runs across the whole universe
+at once:
+
+    from rtengine import Evaluator, Panel, load_script
+
+    script = load_script("samples/mr_sample.rts")
+    panel = Panel.from_csv_dir("prices/")
+    evaluator = Evaluator(panel, script.formulas(), {"PctExt": 2.5})
+    setup = evaluator.evaluate("C < (1 - PctExt / 100) * Min(O, C[1], EMA5)")
+    print(evaluator.cache.stats)
+
+`Backtest` runs a script's `Strategy:` sections over the same panel and
+returns a trade list and an equity curve per strategy; `optimize` sweeps
+the script's `Parameters:` grid over a process pool, and `walkforward`
+runs the optimize-then-test cycle over a `WalkForward:` section's windows.
+`scan` runs a `Scan:` section on the latest bars, evaluating each formula
+over only the trailing bars it reads. `run_import` loads the CSV sources of
+an `Import:` section into a `SymbolStore`, skipping files already imported,
+and `PanelStore` lays the imported symbols out as memory-mapped fields that
+open instantly and slice by date and symbol without copying. `SymbolInfo`
+holds per-symbol items (`InfoGICS`, `PointValue`, `?Sector`) as arrays by
+symbol id; `Panel.with_info` attaches them for formulas and `#By...` groups.
+"""
+
+from .backtest import Backtest, BacktestResult
+from .cache import CacheStats, SeriesCache
+from .evaluator import Evaluator
+from .formula import Definitions, FormulaError, format_node, parse_formula
+from .functions import FUNCTIONS, register
+from .importer import run_import
+from .optimize import optimize, parameter_grid
+from .panel import Panel
+from .parameters import Parameter, default_parameters, script_parameters
+from .scan import scan
+from .script import Declaration, Script, Section, load_script, parse_script
+from .store import PanelStore, SymbolStore
+from .symbolinfo import SymbolInfo
+from .walkforward import WalkForwardResult, walkforward
+
+__all__ = [
+    "FUNCTIONS",
+    "Backtest",
+    "BacktestResult",
+    "CacheStats",
+    "Declaration",
+    "Definitions",
+    "Evaluator",
+    "FormulaError",
+    "Panel",
+    "Parameter",
+    "PanelStore",
+    "Script",
+    "Section",
+    "SeriesCache",
+    "SymbolInfo",
+    "SymbolStore",
+    "WalkForwardResult",
+    "default_parameters",
+    "format_node",
+    "load_script",
+    "optimize",
+    "parameter_grid",
+    "parse_formula",
+    "parse_script",
+    "register",
+    "run_import",
+    "scan",
+    "script_parameters",
+    "walkforward",
+]
@@ -0,0 +1,250 @@
+"""Command-line entry points for the formula engine.
+
+Usage (from bnf/):
+    python -m rtengine repeats samples/mr_sample.rts [--top 20]
+    python -m rtengine backtest samples/mr_sample.rts --prices prices/ [--strategy mr_long]
+        [--param PctExt=2 ...] [--trades trades.csv] [--equity equity.csv]
+    python -m rtengine optimize samples/mr_sample.rts --prices prices/ --output grid.csv
+        [--sweep PctExt --sweep Target] [--strategy mr_long] [--workers 4]
+    python -m rtengine walkforward samples/spy_tlt_uis.rts --prices prices/ [--replay]
+        [--score Sharpe] [--windows windows.csv] [--equity equity.csv] [--workers 4]
+    python -m rtengine scan samples/sample_scan.rts --prices prices/ [--days 5] [--output scan.csv]
+    python -m rtengine import samples/import_csv.rts [--store data/] [--workers 4]
+
+`--prices` is a directory of <SYMBOL>.csv files or a panel store, such as
+the `panel/` directory an import builds inside its store. `--info` attaches
+a RealTest SymInfoFile CSV, for `InfoGICS`, `PointValue`, `?Sector` and the
+`#ByIndu`-style groups, to any command that takes `--prices`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from .backtest import Backtest
+from .cache import repeated_subexpressions
+from .formula import Definitions, FormulaError, Node, format_node
+from .importer import run_import
+from .optimize import optimize
+from .panel import Panel
+from .scan import scan
+from .script import load_script
+from .store import PanelStore, SymbolStore
+from .symbolinfo import SymbolInfo
+from .walkforward import walkforward
+
+FORMULA_SECTIONS = ("Data", "Library", "Template", "Strategy", "Scan")
+
+
+def action_repeats(args: argparse.Namespace) -> int:
+    script = load_script(args.script)
+    definitions = Definitions(script.formulas(("Data", "Library")))
+    expanded: list[Node] = []
+    skipped: list[str] = []
+    for section in script.sections:
+        if section.kind not in FORMULA_SECTIONS:
+            continue
+        for declaration in section.declarations:
+            try:
+                expanded.append(definitions.expand(declaration.text))
+            except FormulaError as error:
+                skipped.append(f"{section.kind} {section.label} {declaration.name}: {error}".replace("  ", " "))
+
+    counts = repeated_subexpressions(expanded)
+    print(f"{len(expanded)} formulas, {len(skipped)} skipped, {len(counts)} repeated sub-expressions")
+    for item, count in counts.most_common(args.top):
+        print(f"{count:>4}  {format_node(item)}")
+    for line in skipped:
+        print(f"skipped {line}")
+    return 0
+
+
+def load_prices(args: argparse.Namespace) -> Panel:
+    path = args.prices
+    panel = PanelStore(path).panel() if (Path(path) / "dates.npy").exists() else Panel.from_csv_dir(path)
+    if args.info:
+        info = SymbolInfo.from_csv(args.info[0])
+        for extra in args.info[1:]:
+            info = info.merge(SymbolInfo.from_csv(extra))
+        panel = panel.with_info(info, args.classification)
+    return panel
+
+
+def parameter_overrides(items: Iterable[str]) -> dict[str, float]:
+    overrides: dict[str, float] = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        overrides[name.strip()] = float(value)
+    return overrides
+
+
+def action_backtest(args: argparse.Namespace) -> int:
+    backtest = Backtest(load_script(args.script), load_prices(args), parameter_overrides(args.param))
+    names = args.strategy or backtest.strategies()
+    results = []
+    for name in names:
+        started = time.perf_counter()
+        result = backtest.run(name)
+        results.append(result)
+        print(
+            f"{name}: {len(result.trades)} trades, net profit {result.net_profit:,.2f} "
+            f"({time.perf_counter() - started:.2f}s)"
+        )
+    print(f"cache: {backtest.evaluator.cache.stats}")
+    if args.trades:
+        pd.concat([result.trades for result in results]).to_csv(args.trades, index=False)
+    if args.equity:
+        pd.concat([result.equity for result in results], axis=1).to_csv(args.equity, index_label="Date")
+    return 0
+
+
+def action_optimize(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    results = optimize(
+        load_script(args.script),
+        load_prices(args),
+        sweep=args.sweep,
+        strategies=args.strategy,
+        output=args.output,
+        workers=args.workers,
+    )
+    print(f"{len(results)} results in {time.perf_counter() - started:.1f}s, written to {args.output}")
+    if len(results):
+        print(results.sort_values("NetProfit", ascending=False).head(args.top).to_string(index=False))
+    return 0
+
+
+def action_walkforward(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    result = walkforward(
+        load_script(args.script),
+        load_prices(args),
+        strategies=args.strategy,
+        sweep=args.sweep,
+        score=args.score,
+        replay=args.replay,
+        workers=args.workers,
+    )
+    windows = result.windows
+    print(
+        f"{len(windows)} windows in {time.perf_counter() - started:.1f}s "
+        f"(signals {result.signal_seconds:.1f}s, in-sample {windows['InSeconds'].sum():.1f}s, "
+        f"out-of-sample {windows['OutSeconds'].sum():.1f}s)"
+    )
+    if len(result.equity):
+        print(f"out-of-sample equity {result.equity.iloc[0]:,.2f} -> {result.equity.iloc[-1]:,.2f}")
+    if args.windows:
+        windows.to_csv(args.windows, index=False)
+    if args.equity:
+        result.equity.to_csv(args.equity, index_label="Date")
+    return 0
+
+
+def action_scan(args: argparse.Namespace) -> int:
+    script = load_script(args.script)
+    panel = load_prices(args)
+    started = time.perf_counter()
+    results = scan(script, panel, parameter_overrides(args.param), args.days)
+    print(f"{len(results)} rows in {time.perf_counter() - started:.2f}s")
+    print(results.head(args.top).to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+    return 0
+
+
+def action_import(args: argparse.Namespace) -> int:
+    started = time.perf_counter()
+    report = run_import(load_script(args.script), store=args.store, workers=args.workers)
+    print(f"{len(report)} sources in {time.perf_counter() - started:.1f}s")
+    if len(report):
+        print(report.groupby(["Kind", "Status"]).size().to_string())
+    for directory, rows in report.groupby("Store"):
+        panel = Path(directory) / "panel"
+        if (rows["Status"] == "imported").any() or not (panel / "dates.npy").exists():
+            store = PanelStore.build(panel, SymbolStore(directory), args.dtype)
+            print(f"panel store {panel}: {len(store.symbols)} symbols x {len(store.dates)} dates")
+    return 0
+
+
+def add_info_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--info", action="append", help="SymInfoFile CSV (repeatable; later files win)")
+    parser.add_argument("--classification", default="TRBC", choices=("TRBC", "GICS"), help="Codes for #By... groups")
+
+
+def parse_args(argv: Iterable[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    repeats = commands.add_parser("repeats", help="List sub-expressions a script repeats across formulas")
+    repeats.add_argument("script", help="Path to a .rts file")
+    repeats.add_argument("--top", type=int, default=20, help="Number of sub-expressions to list")
+    repeats.set_defaults(action=action_repeats)
+
+    backtest = commands.add_parser("backtest", help="Run a script's strategies over CSV prices")
+    backtest.add_argument("script", help="Path to a .rts file")
+    backtest.add_argument("--prices", required=True, help="Directory of <SYMBOL>.csv files, or a panel store")
+    add_info_arguments(backtest)
+    backtest.add_argument("--strategy", action="append", help="Strategy to run (repeatable; default all)")
+    backtest.add_argument("--param", action="append", default=[], help="Parameter override, NAME=VALUE")
+    backtest.add_argument("--trades", help="Write the trade list to this CSV")
+    backtest.add_argument("--equity", help="Write the equity curves to this CSV")
+    backtest.set_defaults(action=action_backtest)
+
+    sweep = commands.add_parser("optimize", help="Backtest every combination of a script's Parameters grid")
+    sweep.add_argument("script", help="Path to a .rts file")
+    sweep.add_argument("--prices", required=True, help="Directory of <SYMBOL>.csv files, or a panel store")
+    add_info_arguments(sweep)
+    sweep.add_argument("--output", required=True, help="CSV the results are appended to as they finish")
+    sweep.add_argument("--sweep", action="append", help="Parameter to sweep (repeatable; default all ranges)")
+    sweep.add_argument("--strategy", action="append", help="Strategy to run (repeatable; default all)")
+    sweep.add_argument("--workers", type=int, help="Worker processes (default: CPUs; 0 runs in-process)")
+    sweep.add_argument("--top", type=int, default=10, help="Number of best results to print")
+    sweep.set_defaults(action=action_optimize)
+
+    forward = commands.add_parser("walkforward", help="Walk-forward test over a script's WalkForward: dates")
+    forward.add_argument("script", help="Path to a .rts file")
+    forward.add_argument("--prices", required=True, help="Directory of <SYMBOL>.csv files, or a panel store")
+    add_info_arguments(forward)
+    forward.add_argument("--sweep", action="append", help="Parameter to sweep (repeatable; default all ranges)")
+    forward.add_argument("--strategy", action="append", help="Strategy to run (repeatable; default all)")
+    forward.add_argument("--score", help="Summary column to optimize (default: OptScoreCol or NetProfit)")
+    forward.add_argument("--replay", action="store_true", help="Trade the recorded values instead of optimizing")
+    forward.add_argument("--workers", type=int, help="Worker processes (default: CPUs; 0 runs in-process)")
+    forward.add_argument("--windows", help="Write the per-window report to this CSV")
+    forward.add_argument("--equity", help="Write the stitched out-of-sample equity to this CSV")
+    forward.set_defaults(action=action_walkforward)
+
+    screen = commands.add_parser("scan", help="Run a script's Scan: section on the latest bars")
+    screen.add_argument("script", help="Path to a .rts file")
+    screen.add_argument("--prices", required=True, help="Directory of <SYMBOL>.csv files, or a panel store")
+    add_info_arguments(screen)
+    screen.add_argument("--param", action="append", default=[], help="Parameter override, NAME=VALUE")
+    screen.add_argument("--days", type=int, help="Bars to scan (default: the script's NumDays, else 1)")
+    screen.add_argument("--output", help="Write the scan results to this CSV")
+    screen.add_argument("--top", type=int, default=20, help="Number of rows to print")
+    screen.set_defaults(action=action_scan)
+
+    load = commands.add_parser("import", help="Run a script's Import: sections for CSV sources into a store")
+    load.add_argument("script", help="Path to a .rts file")
+    load.add_argument("--store", help="Store directory (default: named after SaveAs, beside the script)")
+    load.add_argument("--workers", type=int, help="Worker processes (default: CPUs; 0 runs in-process)")
+    load.add_argument("--dtype", default="float64", choices=("float64", "float32"), help="Panel store precision")
+    load.set_defaults(action=action_import)
+    return parser.parse_args(list(argv) if argv is not None else None)
+
+
+def main(argv: Iterable[str] | None = None) -> int:
+    args = parse_args(argv)
+    return args.action(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,611 @@
+"""Run a `Strategy:` section over a `Panel` and report trades and equity.
+
+Signals are evaluated once for the whole panel with the `Evaluator`:
+`EntrySetup`, `SetupScore`, `EntryLimit`, `LimitExtra`, `Quantity`, and the
+exit formulas. Only the position book runs bar by bar, in `simulate`. That
+loop only visits open positions and the setups of the previous bar, and it
+is compiled with numba when numba is installed.
+
+Timing follows RealTest's daily defaults:
+
+- a setup on bar t places an order for bar t+1, at the open or, with
+  `EntryLimit`, as a limit order that fills when the bar trades through the
+  limit by `LimitExtra` (at the open if it gaps past);
+- each bar's setups are ranked best `SetupScore` first (ties
+  alphabetically), skipping symbols that are held or were exited the same
+  bar, and only the best `MaxPositions` minus the open positions place
+  orders; as in RealTest, a limit order that does not fill still uses its
+  slot, so no lower-ranked setup enters in its place;
+- `ExitRule` is checked at each close from the entry bar on; when it is
+  true the position exits at the next open, and `select(cond, "reason",
+  ...)` names the first true condition;
+- otherwise `ExitStop` and then `ExitLimit`, set at the previous close,
+  exit within the bar;
+- equity is marked at each close, and positions still open on the last
+  bar exit at its close ("end of test").
+
+`run` can trade a date window of the panel (for walk-forward tests) and
+starts it flat. The strategy's signals are evaluated over the whole panel
+once per `Backtest` and reused for every window.
+
+Trade variables cannot be evaluated ahead of the simulation, so they are
+supported where they can be taken apart: `ExitLimit` and `ExitStop` may use
+`FillPrice` linearly, and `ExitRule` conditions may be and-ed with
+`BarsHeld` itself or comparisons of it to a number. `Commission` is evaluated over the
+trade list afterwards from `Shares`, `Contracts` and `FillValue`, charged
+on entry and on exit; sizing uses equity before those charges. Other
+strategy fields that change fills (`EntryStop`, `ExitTime`, `Slippage`,
+...) are rejected rather than silently ignored.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import reduce
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .cache import SeriesCache
+from .evaluator import Evaluator
+from .formula import Binary, Call, FormulaError, Name, Node, Number, Text, substitute, walk
+from .panel import Panel
+from .parameters import default_parameters
+from .script import Script
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the loop only visits open positions and new setups
+    def njit(function):
+        return function
+
+DEFAULT_ACCOUNT_SIZE = 100_000.0
+TRADING_DAYS = 252
+SIDES = {"long": 1, "short": -1}
+QTY_TYPES = {"percent": 0, "shares": 1, "value": 2}
+STRATEGY_FIELDS = (
+    "using",
+    "side",
+    "entrysetup",
+    "setupscore",
+    "entrylimit",
+    "limitextra",
+    "exitrule",
+    "exitlimit",
+    "exitstop",
+    "maxpositions",
+    "quantity",
+    "qtytype",
+    "commission",
+)
+# Fields that only shape RealTest's reports.
+REPORT_FIELDS = ("tradelist", "tlfields", "tltimeshift", "tladjusted", "ordersfile", "tracker")
+FILL_PRICE = "fillprice"
+BARS_HELD = "barsheld"
+MAX_BARS = np.iinfo(np.int64).max
+FLIPPED = {"<": ">", ">": "<", "<=": ">=", ">=": "<=", "=": "="}
+
+
+@dataclass(frozen=True)
+class ExitClause:
+    """One `ExitRule` condition: true while `condition` holds and BarsHeld is in range."""
+
+    label: str
+    condition: Node | None
+    min_bars: int = 0
+    max_bars: int = MAX_BARS
+
+
+@dataclass(frozen=True)
+class Signals:
+    """A strategy's fields and its evaluated (symbols, dates) inputs to `simulate`."""
+
+    name: str
+    fields: dict[str, str]
+    side: int
+    qty_type: int
+    max_positions: int
+    setup: np.ndarray
+    score: np.ndarray
+    entry_limit: np.ndarray
+    limit_extra: np.ndarray
+    quantity: np.ndarray
+    clauses: tuple[ExitClause, ...]
+    conditions: np.ndarray
+    stop_base: np.ndarray
+    stop_scale: np.ndarray
+    target_base: np.ndarray
+    target_scale: np.ndarray
+
+
+@dataclass(frozen=True)
+class BacktestResult:
+    strategy: str
+    trades: pd.DataFrame
+    equity: pd.Series
+
+    @property
+    def net_profit(self) -> float:
+        return float(self.equity.iloc[-1] - self.equity.iloc[0]) if len(self.equity) else 0.0
+
+    def summary(self) -> dict[str, float]:
+        """Headline statistics, one row of an optimization report."""
+        equity = self.equity.to_numpy()
+        peaks = np.maximum.accumulate(equity) if len(equity) else equity
+        drawdown = float(np.max(1.0 - equity / peaks)) if len(equity) else 0.0
+        profits = self.trades["Profit"].to_numpy()
+        returns = np.diff(equity) / equity[:-1] if len(equity) > 1 else np.zeros(0)
+        spread = float(np.std(returns)) if len(returns) else 0.0
+        return {
+            "Trades": len(profits),
+            "NetProfit": self.net_profit,
+            "PctWins": 100.0 * float(np.mean(profits > 0)) if len(profits) else 0.0,
+            "MaxDD": 100.0 * drawdown,
+            "Sharpe": float(np.sqrt(TRADING_DAYS) * np.mean(returns) / spread) if spread > 0 else 0.0,
+        }
+
+
+def combine(results: Sequence[BacktestResult], account_size: float, name: str = "Combined") -> BacktestResult:
+    """Strategies traded side by side on one account: trades listed together, profits added."""
+    equity = account_size + sum(result.equity - account_size for result in results)
+    trades = pd.concat([result.trades for result in results], ignore_index=True)
+    return BacktestResult(name, trades, equity.rename(name))
+
+
+def account_size(script: Script) -> float:
+    settings = script.section("Settings")
+    size = settings.get("AccountSize") if settings is not None else None
+    return float(size) if size else DEFAULT_ACCOUNT_SIZE
+
+
+def truth(values: np.ndarray) -> np.ndarray:
+    """Where a formula is true: nonzero and not NaN, as the evaluator reads `and`/`or`."""
+    return ~np.isnan(values) & (values != 0)
+
+
+def uses(node: Node, name: str) -> bool:
+    return any(isinstance(item, Name) and item.name == name for item in walk(node))
+
+
+def held_bounds(term: Node) -> tuple[int, int] | None:
+    """(min, max) BarsHeld for `BarsHeld` (nonzero) or a `BarsHeld <op> N` comparison, else None."""
+    if isinstance(term, Name) and term.name == BARS_HELD:
+        return 1, MAX_BARS
+    if not isinstance(term, Binary) or term.op not in FLIPPED:
+        return None
+    op, left, right = term.op, term.left, term.right
+    if isinstance(right, Name) and isinstance(left, Number):
+        op, left, right = FLIPPED[op], right, left
+    if not (isinstance(left, Name) and left.name == BARS_HELD and isinstance(right, Number)):
+        return None
+    bars = int(np.floor(right.value))
+    whole = bars == right.value
+    return {
+        "=": (bars, bars) if whole else (1, 0),
+        ">=": (bars + (not whole), MAX_BARS),
+        ">": (bars + 1, MAX_BARS),
+        "<=": (0, bars),
+        "<": (0, bars - whole),
+    }[op]
+
+
+def and_terms(node: Node) -> list[Node]:
+    if isinstance(node, Binary) and node.op == "and":
+        return and_terms(node.left) + and_terms(node.right)
+    return [node]
+
+
+def exit_clause(condition: Node, label: str) -> ExitClause:
+    low, high = 0, MAX_BARS
+    rest: list[Node] = []
+    for term in and_terms(condition):
+        bounds = held_bounds(term)
+        if bounds is None:
+            if uses(term, BARS_HELD) or uses(term, FILL_PRICE):
+                raise FormulaError(f"ExitRule {label!r}: trade variables are only supported as BarsHeld [<op> N]")
+            rest.append(term)
+        else:
+            low, high = max(low, bounds[0]), min(high, bounds[1])
+    joined = reduce(lambda left, right: Binary("and", left, right), rest) if rest else None
+    return ExitClause(label, joined, low, high)
+
+
+def exit_clauses(rule: Node) -> list[ExitClause]:
+    if isinstance(rule, Call) and rule.name.lower() == "select":
+        args = rule.args
+        if len(args) % 2 or not all(isinstance(label, Text) for label in args[1::2]):
+            raise FormulaError('ExitRule select(...) takes condition, "reason" pairs')
+        return [exit_clause(condition, label.text.strip("\"'")) for condition, label in zip(args[::2], args[1::2])]
+    return [exit_clause(rule, "exit rule")]
+
+
+def strategy_fields(script: Script, name: str) -> dict[str, str]:
+    """A strategy's declarations by lower-case name, over those of its `Using:` templates."""
+    section = script.section("Strategy", name)
+    if section is None:
+        raise FormulaError(f"No Strategy: {name} in script")
+    fields: dict[str, str] = {}
+    using = section.get("Using")
+    for template in (item.strip() for item in (using or "").split(",") if item.strip()):
+        found = script.section("Template", template)
+        if found is None:
+            raise FormulaError(f"Strategy {name} uses unknown template {template!r}")
+        fields.update((key.lower(), text) for key, text in found.values().items())
+    fields.update((key.lower(), text) for key, text in section.values().items())
+    unsupported = sorted(
+        key for key in fields if key not in STRATEGY_FIELDS + REPORT_FIELDS and not key.startswith("debug")
+    )
+    if unsupported:
+        raise FormulaError(f"Strategy {name}: not supported by the backtester: {', '.join(unsupported)}")
+    return fields
+
+
+@njit
+def simulate(
+    opens,
+    highs,
+    lows,
+    closes,
+    order_starts,
+    order_symbols,
+    has_limit,
+    entry_limit,
+    limit_extra,
+    quantity,
+    qty_type,
+    side,
+    max_positions,
+    conditions,
+    min_bars,
+    max_bars,
+    stop_base,
+    stop_scale,
+    target_base,
+    target_scale,
+    account_size,
+):
+    """Fill orders and track positions bar by bar; see the module docstring for the rules.
+
+    Orders for bar t are `order_symbols[order_starts[t - 1]:order_starts[t]]`,
+    best first. Exit reasons are clause numbers, then stop (`len(conditions)`),
+    limit (`+ 1`) and end of test (`+ 2`).
+    """
+    symbols, dates = closes.shape
+    clauses = conditions.shape[0]
+    capacity = order_symbols.shape[0]
+    trade_symbol = np.empty(capacity, np.int64)
+    trade_entry = np.empty(capacity, np.int64)
+    trade_price = np.empty(capacity)
+    trade_shares = np.empty(capacity)
+    trade_exit = np.full(capacity, -1, np.int64)
+    trade_exit_price = np.full(capacity, np.nan)
+    trade_reason = np.full(capacity, -1, np.int64)
+    held = np.full(symbols, -1, np.int64)
+    exited = np.full(symbols, -1, np.int64)
+    mark = np.zeros(symbols)
+    book = np.empty(max_positions, np.int64)
+    equity = np.empty(dates)
+    count = 0
+    trades = 0
+    cash = account_size
+    previous_equity = account_size
+
+    for bar in range(dates):
+        if bar > 0:
+            signal = bar - 1
+            kept = 0
+            for slot in range(count):
+                trade = book[slot]
+                symbol = trade_symbol[trade]
+                price = opens[symbol, bar]
+                reason = -1
+                if not np.isnan(price):
+                    bars_held = signal - trade_entry[trade]
+                    for clause in range(clauses):
+                        if min_bars[clause] <= bars_held <= max_bars[clause] and conditions[clause, symbol, signal]:
+                            reason = clause
+                            break
+                    if reason < 0:
+                        fill = trade_price[trade]
+                        extra = limit_extra[symbol, signal]
+                        stop = stop_base[symbol, signal] + stop_scale[symbol, signal] * fill
+                        target = target_base[symbol, signal] + target_scale[symbol, signal] * fill
+                        if side > 0:
+                            if lows[symbol, bar] <= stop:
+                                price = min(price, stop)
+                                reason = clauses
+                            elif highs[symbol, bar] >= target + extra:
+                                price = max(price, target)
+                                reason = clauses + 1
+                        else:
+                            if highs[symbol, bar] >= stop:
+                                price = max(price, stop)
+                                reason = clauses
+                            elif lows[symbol, bar] <= target - extra:
+                                price = min(price, target)
+                                reason = clauses + 1
+                if reason >= 0:
+                    cash += side * trade_shares[trade] * price
+                    trade_exit[trade] = bar
+                    trade_exit_price[trade] = price
+                    trade_reason[trade] = reason
+                    held[symbol] = -1
+                    exited[symbol] = bar
+                else:
+                    book[kept] = trade
+                    kept += 1
+            count = kept
+
+            slots = max_positions - count
+            for order in range(order_starts[signal], order_starts[bar]):
+                if slots <= 0:
+                    break
+                symbol = order_symbols[order]
+                price = opens[symbol, bar]
+                if held[symbol] >= 0 or exited[symbol] == bar or np.isnan(price):
+                    continue
+                slots -= 1
+                if has_limit:
+                    limit = entry_limit[symbol, signal]
+                    extra = limit_extra[symbol, signal]
+                    if side > 0:
+                        if not lows[symbol, bar] <= limit - extra:
+                            continue
+                        price = min(price, limit)
+                    else:
+                        if not highs[symbol, bar] >= limit + extra:
+                            continue
+                        price = max(price, limit)
+                size = quantity[symbol, signal]
+                if qty_type == 0:
+                    shares = np.floor(previous_equity * size / 100.0 / price)
+                elif qty_type == 1:
+                    shares = np.floor(size)
+                else:
+                    shares = np.floor(size / price)
+                if not shares > 0:
+                    continue
+                trade_symbol[trades] = symbol
+                trade_entry[trades] = bar
+                trade_price[trades] = price
+                trade_shares[trades] = shares
+                cash -= side * shares * price
+                held[symbol] = trades
+                mark[symbol] = price
+                book[count] = trades
+                count += 1
+                trades += 1
+
+        value = cash
+        for slot in range(count):
+            symbol = trade_symbol[book[slot]]
+            if not np.isnan(closes[symbol, bar]):
+                mark[symbol] = closes[symbol, bar]
+            value += side * trade_shares[book[slot]] * mark[symbol]
+        equity[bar] = value
+        previous_equity = value
+
+    for slot in range(count):
+        trade = book[slot]
+        trade_exit[trade] = dates - 1
+        trade_exit_price[trade] = mark[trade_symbol[trade]]
+        trade_reason[trade] = clauses + 2
+    return (
+        trade_symbol[:trades],
+        trade_entry[:trades],
+        trade_price[:trades],
+        trade_shares[:trades],
+        trade_exit[:trades],
+        trade_exit_price[:trades],
+        trade_reason[:trades],
+        equity,
+    )
+
+
+class Backtest:
+    """Strategies of one script over one panel, with the script's default parameters.
+
+    `parameters` overrides those defaults. The evaluator's series cache is
+    shared by every strategy run, so formulas common to a long and a short
+    side are computed once.
+    """
+
+    def __init__(
+        self,
+        script: Script,
+        panel: Panel,
+        parameters: Mapping[str, float] | None = None,
+        cache: SeriesCache | None = None,
+    ) -> None:
+        self.script = script
+        self.panel = panel
+        values = default_parameters(script, parameters)
+        self.evaluator = Evaluator(panel, script.formulas(("Data", "Library")), values, cache=cache)
+        self.account_size = account_size(script)
+        self._signals: dict[str, Signals] = {}
+
+    def strategies(self) -> list[str]:
+        return [section.label for section in self.script.sections_of("Strategy")]
+
+    def run_all(self) -> dict[str, BacktestResult]:
+        return {name: self.run(name) for name in self.strategies()}
+
+    def expand(self, text: str) -> Node:
+        return self.evaluator.expand(text)
+
+    def broadcast(self, value: "np.ndarray | float") -> np.ndarray:
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), self.panel.shape)
+
+    def optional(self, fields: Mapping[str, str], key: str, default: float) -> np.ndarray:
+        """A strategy formula over the panel, or `default` where it is missing or NaN."""
+        if key not in fields:
+            return self.broadcast(default)
+        value = self.evaluator.value(self.expand(fields[key]))
+        if np.ndim(value) == 0:
+            return self.broadcast(default if np.isnan(value) else value)
+        return np.where(np.isnan(value), default, value)
+
+    def linear_in_fill(self, fields: Mapping[str, str], key: str) -> tuple[np.ndarray, np.ndarray]:
+        """`base + scale * FillPrice` for an exit price formula; NaN base when not declared."""
+        if key not in fields:
+            return self.broadcast(np.nan), self.broadcast(0.0)
+        node = self.expand(fields[key])
+        if uses(node, BARS_HELD):
+            raise FormulaError(f"{key}: BarsHeld is not supported in exit prices")
+        if not uses(node, FILL_PRICE):
+            return self.broadcast(self.evaluator.value(node)), self.broadcast(0.0)
+
+        def at(fill: float) -> "np.ndarray | float":
+            return self.evaluator.value(substitute(node, lambda name: Number(fill) if name == FILL_PRICE else None))
+
+        base = at(0.0)
+        scale = np.subtract(at(1.0), base)
+        if not np.allclose(at(2.0), base + 2.0 * scale, equal_nan=True):
+            raise FormulaError(f"{key} must be linear in FillPrice: {fields[key]}")
+        return self.broadcast(base), self.broadcast(scale)
+
+    def orders(self, setup: np.ndarray, score: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Setups as (start per date, symbols), each date's sorted best score first."""
+        dates, symbols = np.nonzero(truth(setup.T))
+        ranks = np.empty(len(self.panel.symbols), dtype=np.int64)
+        ranks[self.panel.group_index().order] = np.arange(len(ranks))
+        scores = score[symbols, dates]
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+        order = np.lexsort((ranks[symbols], -scores, dates))
+        starts = np.searchsorted(dates[order], np.arange(setup.shape[1] + 1))
+        return starts.astype(np.int64), symbols[order].astype(np.int64)
+
+    def signals(self, name: str) -> Signals:
+        """A strategy's inputs to `simulate`, evaluated once per backtest over the whole panel."""
+        if name in self._signals:
+            return self._signals[name]
+        fields = strategy_fields(self.script, name)
+        side_text = fields.get("side", "Long").strip().lower()
+        if side_text not in SIDES:
+            raise FormulaError(f"Strategy {name}: unsupported Side {fields.get('side')!r}")
+        qty_text = fields.get("qtytype", "Shares").strip().lower()
+        if qty_text not in QTY_TYPES:
+            raise FormulaError(f"Strategy {name}: unsupported QtyType {fields.get('qtytype')!r}")
+        if "entrysetup" not in fields:
+            raise FormulaError(f"Strategy {name} has no EntrySetup")
+
+        evaluator = self.evaluator
+        symbols = len(self.panel.symbols)
+        max_positions = symbols
+        if "maxpositions" in fields:
+            max_positions = min(symbols, max(0, int(evaluator.constant(self.expand(fields["maxpositions"])))))
+        clauses = exit_clauses(self.expand(fields["exitrule"])) if "exitrule" in fields else []
+        conditions = np.empty((len(clauses), *self.panel.shape), dtype=bool)
+        for number, clause in enumerate(clauses):
+            conditions[number] = True if clause.condition is None else truth(evaluator.series(clause.condition))
+        stop_base, stop_scale = self.linear_in_fill(fields, "exitstop")
+        target_base, target_scale = self.linear_in_fill(fields, "exitlimit")
+        signals = Signals(
+            name=name,
+            fields=fields,
+            side=SIDES[side_text],
+            qty_type=QTY_TYPES[qty_text],
+            max_positions=max_positions,
+            setup=evaluator.series(self.expand(fields["entrysetup"])),
+            score=self.optional(fields, "setupscore", 0.0),
+            entry_limit=self.optional(fields, "entrylimit", np.nan),
+            limit_extra=self.optional(fields, "limitextra", 0.0),
+            quantity=self.optional(fields, "quantity", 1.0),
+            clauses=tuple(clauses),
+            conditions=conditions,
+            stop_base=stop_base,
+            stop_scale=stop_scale,
+            target_base=target_base,
+            target_scale=target_scale,
+        )
+        self._signals[name] = signals
+        return signals
+
+    def run(
+        self,
+        name: str,
+        start: "np.datetime64 | str | None" = None,
+        end: "np.datetime64 | str | None" = None,
+    ) -> BacktestResult:
+        """Trade strategy `name` from `start` up to (not including) `end`, flat at the start.
+
+        Indicators still see the bars before `start`, so windows of one
+        backtest have no warm-up and share every evaluated series.
+        """
+        signals = self.signals(name)
+        panel = self.panel
+        missing = [key for key in ("open", "high", "low", "close") if panel.field(key) is None]
+        if missing:
+            raise FormulaError(f"Backtests need {', '.join(missing)} prices on the panel")
+        low = 0 if start is None else int(np.searchsorted(panel.dates, np.datetime64(start, "D")))
+        high = panel.shape[1] if end is None else int(np.searchsorted(panel.dates, np.datetime64(end, "D")))
+        bars = slice(low, max(low, high))
+        starts, order_symbols = self.orders(signals.setup[:, bars], signals.score[:, bars])
+        clauses = signals.clauses
+        fields = signals.fields
+        side = signals.side
+        (trade_symbol, entry, price_in, shares, exit_bar, price_out, reason, equity) = simulate(
+            panel.field("open")[:, bars],
+            panel.field("high")[:, bars],
+            panel.field("low")[:, bars],
+            panel.field("close")[:, bars],
+            starts,
+            order_symbols,
+            "entrylimit" in fields,
+            signals.entry_limit[:, bars],
+            signals.limit_extra[:, bars],
+            signals.quantity[:, bars],
+            signals.qty_type,
+            side,
+            signals.max_positions,
+            signals.conditions[:, :, bars],
+            np.array([clause.min_bars for clause in clauses], dtype=np.int64),
+            np.array([clause.max_bars for clause in clauses], dtype=np.int64),
+            signals.stop_base[:, bars],
+            signals.stop_scale[:, bars],
+            signals.target_base[:, bars],
+            signals.target_scale[:, bars],
+            self.account_size,
+        )
+
+        fees_in = self.commissions(fields, shares, shares * price_in)
+        fees_out = self.commissions(fields, shares, shares * price_out)
+        fees = np.zeros(len(equity))
+        np.add.at(fees, entry, fees_in)
+        np.add.at(fees, exit_bar, fees_out)
+        equity = equity - np.cumsum(fees)
+
+        labels = np.array([clause.label for clause in clauses] + ["stop", "limit", "end of test"], dtype=object)
+        dates = pd.DatetimeIndex(panel.dates[bars])
+        trades = pd.DataFrame(
+            {
+                "Strategy": name,
+                "Symbol": np.array(panel.symbols, dtype=object)[trade_symbol],
+                "Side": "Long" if side > 0 else "Short",
+                "DateIn": dates[entry],
+                "PriceIn": price_in,
+                "DateOut": dates[exit_bar],
+                "PriceOut": price_out,
+                "Shares": shares,
+                "Bars": exit_bar - entry,
+                "Reason": labels[reason],
+                "Commission": fees_in + fees_out,
+                "Profit": side * shares * (price_out - price_in) - fees_in - fees_out,
+                "PctGain": 100.0 * side * (price_out / price_in - 1.0),
+            }
+        )
+        return BacktestResult(name, trades, pd.Series(equity, index=dates, name=name))
+
+    def commissions(self, fields: Mapping[str, str], shares: np.ndarray, value: np.ndarray) -> np.ndarray:
+        """`Commission` per fill, evaluated over the fills as a one-row panel."""
+        if "commission" not in fields or not len(shares):
+            return np.zeros(len(shares))
+        fills = Panel(
+            ("fills",),
+            np.arange(len(shares)),
+            {"shares": shares[None, :], "contracts": shares[None, :], "fillvalue": value[None, :]},
+        )
+        charged = Evaluator(fills, parameters=self.evaluator.parameters).evaluate(fields["commission"])
+        return np.nan_to_num(charged[0])
+
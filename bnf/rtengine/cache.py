@@ -0,0 +1,116 @@
+"""Series memoization for formula evaluation.
+
+Scripts repeat sub-expressions constantly (`C[1]`, `EMA(C,5)`, `ATR(14)`
+across Data, Strategy and Template lines). The evaluator expands references
+to other formulas in place, so every formula becomes one tree over panel
+fields and parameters, and keys each computed subtree by its structure in a
+`SeriesCache`: the second `EMA(C,5)` is a lookup whether it was written out
+or reached through `EMA5`. Parameters are inlined as numbers first, so a
+cache shared by runs with different parameter values (the optimizer's) only
+reuses the subtrees that come out the same.
+
+The cache is bounded by the bytes of the arrays it holds and evicts the
+least recently used series first. Cached arrays are made read-only, since
+the same array is handed to every formula that uses it.
+
+`python -m rtengine repeats SCRIPT` lists the sub-expressions a script
+repeats across its formulas.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+
+from .formula import Name, Node, Number, Text, walk
+
+DEFAULT_CACHE_BYTES = 1 << 30
+CACHED_KINDS_EXCLUDED = (Number, Name, Text)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.hits} hits / {self.hits + self.misses} lookups ({self.hit_rate:.1%}), "
+            f"{self.entries} series, {self.bytes / 2**20:.1f} of {self.max_bytes / 2**20:.0f} MiB, "
+            f"{self.evictions} evicted"
+        )
+
+
+def value_bytes(value: "np.ndarray | float") -> int:
+    return int(value.nbytes) if isinstance(value, np.ndarray) else 0
+
+
+class SeriesCache:
+    """Least-recently-used map of expression node -> value, bounded by total array bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._values: OrderedDict[Node, "np.ndarray | float"] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: Node) -> bool:
+        return key in self._values
+
+    def get(self, key: Node) -> "np.ndarray | float | None":
+        value = self._values.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._values.move_to_end(key)
+        return value
+
+    def put(self, key: Node, value: "np.ndarray | float") -> None:
+        size = value_bytes(value)
+        if size > self.max_bytes:
+            return
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        previous = self._values.pop(key, None)
+        if previous is not None:
+            self.bytes -= value_bytes(previous)
+        self._values[key] = value
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._values.popitem(last=False)
+            self.bytes -= value_bytes(evicted)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._values.clear()
+        self.bytes = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._values), self.bytes, self.max_bytes)
+
+
+def repeated_subexpressions(nodes: Iterable[Node]) -> Counter:
+    """How often each cacheable subtree occurs across `nodes`, for those seen more than once."""
+    counts: Counter = Counter()
+    for root in nodes:
+        counts.update(item for item in walk(root) if not isinstance(item, CACHED_KINDS_EXCLUDED))
+    return Counter({item: count for item, count in counts.items() if count > 1})
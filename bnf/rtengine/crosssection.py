@@ -0,0 +1,152 @@
+"""Cross-sectional operators (`#Rank`, `#Avg`, ... with `#ByIndu`, `#ByEcon`, ...).
+
+Each operator works on one date at a time across symbols. All dates are
+handled together on a (dates, symbols) copy of the values, and grouping
+never loops in Python:
+
+- a `GroupIndex` orders symbols by group code once (alphabetically within
+  a group, which is also RealTest's tie-break for `#Rank`), so every group
+  is a fixed run of columns;
+- sums, counts and extremes are `ufunc.reduceat` over those runs;
+- ranks and medians sort each group's run of columns once, values
+  descending (NaN last) across all dates together; the loop is over
+  groups, never over dates, and each sort only spans its group.
+
+NaN values are left out of every statistic and get NaN ranks, as in
+RealTest. A group with no values on a date gives NaN.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterator, Sequence
+
+import numpy as np
+
+# Secondary `#By...` tags -> group key in `Panel.groups`.
+GROUP_KEYS = {
+    "byindu": "industry",
+    "bygroup": "group",
+    "bysect": "sector",
+    "byecon": "econ",
+    "bycii": "cii",
+    "bylistnum": "listnum",
+    "bymkt": "market",
+}
+REDUCTIONS = ("avg", "sum", "count", "highest", "lowest", "stddev", "median")
+RANKINGS = ("rank", "denserank", "percentrank")
+OPERATORS = REDUCTIONS + RANKINGS
+# Tags that only steer RealTest's calculation mode; the values are the same.
+HINT_TAGS = ("oneperdate", "onepersym", "slowcalc")
+
+
+@dataclass(frozen=True)
+class GroupIndex:
+    """Symbols laid out group by group, as precomputed sort orders."""
+
+    order: np.ndarray  # column positions in group-major, alphabetical order
+    starts: np.ndarray  # first position of each group within `order`
+    sizes: np.ndarray
+    segment: np.ndarray  # group number of each position in `order`
+    symbol_group: np.ndarray  # group number of each symbol, in panel order
+    position: np.ndarray  # position of each symbol within `order`, in panel order
+
+    @classmethod
+    def build(cls, symbols: Sequence[str], codes: np.ndarray | None = None) -> "GroupIndex":
+        alphabetical = np.argsort(np.asarray(symbols, dtype=object).astype(str), kind="stable")
+        if codes is None:
+            order = alphabetical
+            segment = np.zeros(len(symbols), dtype=np.int32)
+        else:
+            codes = np.asarray(codes)
+            order = alphabetical[np.argsort(codes[alphabetical], kind="stable")]
+            sorted_codes = codes[order]
+            segment = np.r_[0, np.cumsum(sorted_codes[1:] != sorted_codes[:-1])].astype(np.int32)
+        starts = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]]) if len(order) else np.zeros(0, int)
+        sizes = np.diff(np.r_[starts, len(order)])
+        symbol_group = np.empty(len(order), dtype=np.int32)
+        symbol_group[order] = segment
+        position = np.empty(len(order), dtype=np.intp)
+        position[order] = np.arange(len(order))
+        return cls(order, starts, sizes, segment, symbol_group, position)
+
+    @property
+    def groups(self) -> int:
+        return len(self.starts)
+
+
+def reduce_groups(values: np.ndarray, index: GroupIndex, op: str) -> np.ndarray:
+    """Per-date statistic of each group: (dates, symbols in group order) -> (dates, groups)."""
+    valid = ~np.isnan(values)
+    counts = np.add.reduceat(valid.astype(np.float64), index.starts, axis=1)
+    if op == "count":
+        return counts
+    empty = counts == 0
+    if op in ("highest", "lowest"):
+        ufunc = np.fmax if op == "highest" else np.fmin
+        return ufunc.reduceat(values, index.starts, axis=1)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), index.starts, axis=1)
+    if op == "sum":
+        return np.where(empty, np.nan, sums)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+    if op == "avg":
+        return means
+    if op == "stddev":
+        # Population standard deviation (as STDEV.P), from deviations about the mean.
+        deviations = np.where(valid, values - np.repeat(means, index.sizes, axis=1), 0.0)
+        with np.errstate(invalid="ignore"):
+            return np.sqrt(np.add.reduceat(deviations * deviations, index.starts, axis=1) / counts)
+    raise ValueError(f"Unknown cross-sectional reduction: {op}")
+
+
+def group_sorts(values: np.ndarray, index: GroupIndex) -> Iterator[tuple[int, np.ndarray, np.ndarray]]:
+    """Per group: its first column, its values sorted descending per date (NaN last) and their order."""
+    for start, size in zip(index.starts.tolist(), index.sizes.tolist()):
+        block = np.ascontiguousarray(values[:, start : start + size])
+        order = np.argsort(-block, axis=1, kind="stable")
+        yield start, np.take_along_axis(block, order, axis=1), order
+
+
+def rank_groups(values: np.ndarray, index: GroupIndex, op: str) -> np.ndarray:
+    """Rank of each value within its group, 1 for the largest, in group order."""
+    result = np.empty(values.shape)
+    for start, ordered, order in group_sorts(values, index):
+        if op == "denserank":
+            new_value = np.ones(ordered.shape, dtype=bool)
+            new_value[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+            ranked = np.cumsum(new_value, axis=1, dtype=np.float64)
+        else:
+            ranked = np.broadcast_to(np.arange(1.0, ordered.shape[1] + 1.0), ordered.shape)
+        if op == "percentrank":
+            counts = np.count_nonzero(~np.isnan(ordered), axis=1)[:, None].astype(np.float64)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                ranked = np.where(counts > 1, 100.0 * (counts - ranked) / (counts - 1.0), 100.0 * (ranked == 1))
+        block = np.empty(ordered.shape)
+        np.put_along_axis(block, order, ranked, axis=1)
+        result[:, start : start + ordered.shape[1]] = block
+    result[np.isnan(values)] = np.nan
+    return result
+
+
+def median_groups(values: np.ndarray, index: GroupIndex) -> np.ndarray:
+    statistic = np.empty((values.shape[0], index.groups))
+    for group, (_, ordered, _) in enumerate(group_sorts(values, index)):
+        counts = np.count_nonzero(~np.isnan(ordered), axis=1)
+        # Valid values come first, so the middle is at (n - 1) / 2.
+        present = np.maximum(counts, 1)[:, None]
+        low = np.take_along_axis(ordered, (present - 1) // 2, axis=1)[:, 0]
+        high = np.take_along_axis(ordered, present // 2, axis=1)[:, 0]
+        statistic[:, group] = np.where(counts > 0, (low + high) / 2.0, np.nan)
+    return statistic
+
+
+def cross_section(values: np.ndarray, op: str, index: GroupIndex) -> np.ndarray:
+    """Apply `#op` to a (symbols, dates) array, separately within each group of `index`."""
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown cross-sectional function: #{op}")
+    grouped = np.ascontiguousarray(values.T[:, index.order], dtype=np.float64)
+    if op in RANKINGS:
+        return np.ascontiguousarray(np.take(rank_groups(grouped, index, op), index.position, axis=1).T)
+    statistic = median_groups(grouped, index) if op == "median" else reduce_groups(grouped, index, op)
+    return np.ascontiguousarray(statistic[:, index.symbol_group].T)
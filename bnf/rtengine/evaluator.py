@@ -0,0 +1,213 @@
+"""Evaluate formula nodes as NumPy operations over a `Panel`.
+
+Every value is either a Python float (numbers, parameters, anything built
+only from them) or a (symbols, dates) float64 array, so one formula runs
+across the whole universe at once. Comparisons and `and`/`or`/`not` give
+1.0/0.0, and NaN in any operand makes the result NaN. Division by zero is
+NaN rather than infinity.
+
+Names resolve, case-insensitively, to a parameter, then to another formula,
+then to a panel field, then to a numeric item of the panel's symbol
+information (`InfoGICS`, `PointValue`). References to other formulas are
+expanded in place and parameters are inlined as numbers before evaluation,
+and every computed subtree is kept in a `SeriesCache` keyed by its
+structure, so a sub-expression shared by several formulas is computed once
+(see `cache.py`). Since keys carry parameter values rather than names, one cache
+can serve evaluators with different parameters, and the subtrees that do
+not use a parameter are shared between them.
+"""
+
+from __future__ import annotations
+
+from typing import Mapping
+
+import numpy as np
+
+from .cache import SeriesCache
+from .crosssection import GROUP_KEYS, cross_section
+from .formula import (
+    Binary,
+    Call,
+    CrossSection,
+    Definitions,
+    Empty,
+    FormulaError,
+    Name,
+    Node,
+    Number,
+    Shift,
+    Text,
+    Unary,
+    format_node,
+    substitute,
+)
+from .functions import FUNCTIONS, Function
+from .panel import Panel
+from .series import shift
+
+ARITHMETIC = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.divide,
+    "^": np.power,
+}
+COMPARISONS = {
+    "<": np.less,
+    ">": np.greater,
+    "<=": np.less_equal,
+    ">=": np.greater_equal,
+    "=": np.equal,
+    "<>": np.not_equal,
+}
+
+
+def with_missing(result: "np.ndarray | float", *operands: "np.ndarray | float") -> "np.ndarray | float":
+    """`result` as float, NaN wherever any operand is NaN."""
+    missing = np.zeros(np.shape(result), dtype=bool)
+    for value in operands:
+        missing = missing | np.isnan(value)
+    if np.ndim(result) == 0:
+        return np.nan if missing else float(result)
+    return np.where(missing, np.nan, result.astype(np.float64))
+
+
+class Evaluator:
+    def __init__(
+        self,
+        panel: Panel,
+        formulas: Mapping[str, "str | Node"] | None = None,
+        parameters: Mapping[str, float] | None = None,
+        functions: Mapping[str, Function] = FUNCTIONS,
+        cache: SeriesCache | None = None,
+    ) -> None:
+        self.panel = panel
+        self.parameters = {name.lower(): float(value) for name, value in (parameters or {}).items()}
+        self.definitions = Definitions(formulas or {}, self.parameters)
+        self.functions = functions
+        self.cache = cache if cache is not None else SeriesCache()
+
+    def evaluate(self, formula: "str | Node") -> np.ndarray:
+        """A formula's value for every symbol and date, as a (symbols, dates) array.
+
+        The array may be shared with the cache and is then read-only.
+        """
+        return self.series(self.expand(formula))
+
+    def expand(self, formula: "str | Node") -> Node:
+        """One tree over panel fields, with other formulas and parameters substituted."""
+        return substitute(self.definitions.expand(formula), self.inline)
+
+    def inline(self, name: str) -> Number | None:
+        value = self.parameters.get(name)
+        return None if value is None else Number(value)
+
+    def series(self, node: Node) -> np.ndarray:
+        value = self.value(node)
+        if np.ndim(value) == 0:
+            return np.full(self.panel.shape, value, dtype=np.float64)
+        return value
+
+    def constant(self, node: Node) -> float:
+        """A value that must be the same on every bar, such as a bar count."""
+        value = self.value(node)
+        if np.ndim(value) != 0:
+            raise FormulaError(f"Expected a constant, got a series: {format_node(node)}")
+        return float(value)
+
+    def value(self, node: Node) -> "np.ndarray | float":
+        if isinstance(node, Number):
+            return node.value
+        if isinstance(node, Name):
+            return self.named(node.name)
+        cached = self.cache.get(node)
+        if cached is not None:
+            return cached
+        result = self.compute(node)
+        self.cache.put(node, result)
+        return result
+
+    def compute(self, node: Node) -> "np.ndarray | float":
+        if isinstance(node, Binary):
+            return self.binary(node)
+        if isinstance(node, Unary):
+            operand = self.value(node.operand)
+            if node.op == "-":
+                return -operand
+            return with_missing(operand == 0, operand)
+        if isinstance(node, Shift):
+            return self.shifted(node)
+        if isinstance(node, CrossSection):
+            return self.cross_sectional(node)
+        if isinstance(node, Call):
+            function = self.functions.get(node.name)
+            if function is None:
+                raise FormulaError(f"Unknown function: {node.name}")
+            return function(self, node.args)
+        if isinstance(node, Text):
+            raise FormulaError(f"Cannot use {node.kind} {node.text!r} as a number")
+        if isinstance(node, Empty):
+            raise FormulaError("Missing operand")
+        raise FormulaError(f"Cannot evaluate {node!r}")
+
+    def lookback(self, node: Node) -> int | None:
+        """Bars before a date that `node` reads from its operands' values; None if not known.
+
+        A function call, a `[n]` shift, and otherwise 0: this is the node's
+        own reach, and what its operands read in turn adds to it.
+        """
+        if isinstance(node, Call):
+            function = self.functions.get(node.name)
+            if function is None or function.lookback is None:
+                return None
+            return function.lookback(self, node.args)
+        if isinstance(node, Shift):
+            return max(0, int(self.constant(node.bars)))
+        return 0
+
+    def named(self, name: str) -> "np.ndarray | float":
+        if name in self.parameters:
+            return self.parameters[name]
+        definition = self.definitions.definition(name)
+        if definition is not None:
+            return self.value(definition)
+        values = self.panel.field(name)
+        if values is not None:
+            return values
+        info = self.panel.info.number(name) if self.panel.info is not None else None
+        if info is not None:
+            return np.broadcast_to(info[:, None], self.panel.shape)
+        raise FormulaError(f"Unknown name: {name}")
+
+    def binary(self, node: Binary) -> "np.ndarray | float":
+        left = self.value(node.left)
+        right = self.value(node.right)
+        if node.op in ARITHMETIC:
+            with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+                result = ARITHMETIC[node.op](left, right)
+            if node.op == "/":
+                result = np.where(np.isinf(result), np.nan, result)
+                return result if np.ndim(result) else float(result)
+            return result
+        if node.op in COMPARISONS:
+            return with_missing(COMPARISONS[node.op](left, right), left, right)
+        if node.op in ("and", "or"):
+            truth = np.logical_and if node.op == "and" else np.logical_or
+            return with_missing(truth(left != 0, right != 0), left, right)
+        raise FormulaError(f"Unknown operator: {node.op}")
+
+    def shifted(self, node: Shift) -> "np.ndarray | float":
+        bars = self.constant(node.bars)
+        if bars != int(bars):
+            raise FormulaError(f"Bar offset must be a whole number: {format_node(node)}")
+        value = self.value(node.operand)
+        if np.ndim(value) == 0:
+            return value
+        return shift(value, int(bars))
+
+    def cross_sectional(self, node: CrossSection) -> np.ndarray:
+        key = GROUP_KEYS[node.group] if node.group else None
+        index = self.panel.group_index(key)
+        if index is None:
+            raise FormulaError(f"#{node.group} needs {key!r} group codes on the panel")
+        return cross_section(self.series(node.operand), node.op, index)
@@ -0,0 +1,431 @@
+"""Parse RealTest formulas with `lark/realtest.lark` into small expression trees.
+
+The grammar is written for validating whole scripts, so a lone formula is
+highly ambiguous under it: `1 - C + 2` is also `1 - <path "C + 2">`, and
+`Min(O, C)` is also `Min(<field list "O, C">)`. For formulas the grammar is
+loaded with negative priorities on path names and field lists, so Earley
+resolves every ambiguity to the reading that leans least on them.
+
+Unary minus has no rule of its own; it shows up as an empty `field_list`
+operand, so `-C` is `<empty> - C` and `3 * -C` is `(3 * <empty>) - C`.
+`build` folds both back into `Unary("-", ...)`.
+
+The resulting nodes are frozen dataclasses, so equal subtrees compare and
+hash equal, and each node caches its hash, so hashing a tree costs one step
+per new node. That makes the nodes themselves usable as keys for
+common-subexpression elimination. Names are lower-cased because RealTest
+names are not case-sensitive.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Mapping, Union
+
+from lark import Lark, Token, Tree
+from lark.exceptions import LarkError
+
+from .crosssection import GROUP_KEYS, HINT_TAGS, OPERATORS
+
+GRAMMAR_PATH = Path(__file__).resolve().parent.parent / "lark" / "realtest.lark"
+FORMULA_CACHE_SIZE = 4096
+TAG_PATTERN = re.compile(r"\s*#([A-Za-z]+)\b")
+
+# Rule priorities for formulas: anything beats a path, and an empty operand
+# (unary minus) beats reading names as a field list.
+FORMULA_PRIORITIES = {"path_name": -100, "field_item": -10, "field_list": -1}
+
+
+class FormulaError(ValueError):
+    """A formula that cannot be parsed or evaluated."""
+
+
+def node(cls):
+    """Frozen dataclass whose structural hash is computed once and kept."""
+    cls = dataclass(frozen=True)(cls)
+    names = tuple(item.name for item in fields(cls))
+
+    def __hash__(self) -> int:
+        value = self.__dict__.get("_hash")
+        if value is None:
+            value = hash((cls.__name__, *(getattr(self, name) for name in names)))
+            object.__setattr__(self, "_hash", value)
+        return value
+
+    cls.__hash__ = __hash__
+    return cls
+
+
+@node
+class Number:
+    value: float
+
+
+@node
+class Name:
+    name: str
+
+
+@node
+class Text:
+    """A literal the numeric evaluator does not interpret (string, date, symbol, path)."""
+
+    kind: str
+    text: str
+
+
+@node
+class Call:
+    name: str
+    args: tuple["Node", ...]
+
+
+@node
+class Unary:
+    op: str
+    operand: "Node"
+
+
+@node
+class Binary:
+    op: str
+    left: "Node"
+    right: "Node"
+
+
+@node
+class Shift:
+    """`operand[bars]`: the value `bars` bars ago."""
+
+    operand: "Node"
+    bars: "Node"
+
+
+@node
+class CrossSection:
+    """`#op #ByGroup operand`: a statistic across symbols on each date."""
+
+    op: str
+    group: str | None
+    operand: "Node"
+
+
+@node
+class Empty:
+    """An operand the grammar allowed to be missing (unary minus, `f(a,,b)`)."""
+
+
+Node = Union[Number, Name, Text, Call, Unary, Binary, Shift, CrossSection, Empty]
+
+EMPTY = Empty()
+COMPARISON_OPS = {"<": "<", ">": ">", "<=": "<=", ">=": ">=", "==": "=", "=": "=", "<>": "<>", "!=": "<>"}
+
+
+@lru_cache(maxsize=None)
+def formula_parser() -> Lark:
+    grammar = GRAMMAR_PATH.read_text(encoding="utf-8")
+    for rule, priority in FORMULA_PRIORITIES.items():
+        grammar = re.sub(rf"^{rule}:", f"{rule}.{priority}:", grammar, count=1, flags=re.MULTILINE)
+    return Lark(
+        grammar,
+        start="expression",
+        parser="earley",
+        lexer="dynamic",
+        priority="normal",
+        keep_all_tokens=True,
+    )
+
+
+def subtrees(tree: Tree) -> list[Tree]:
+    return [child for child in tree.children if isinstance(child, Tree)]
+
+
+def tokens(tree: Tree) -> list[Token]:
+    return [child for child in tree.children if isinstance(child, Token)]
+
+
+def operator(tree: Tree) -> str:
+    return str(tokens(tree)[0])
+
+
+def fold_left(operands: list[Node], ops: list[str]) -> Node:
+    result = operands[0]
+    for op, operand in zip(ops, operands[1:]):
+        result = Binary(op, result, operand)
+    return result
+
+
+def attach_unary(term: Node, op: str, operand: Node) -> Node | None:
+    """Put `op operand` into the trailing empty operand of `term`, if it has one."""
+    if isinstance(term, Empty):
+        return operand if op == "+" else Unary("-", operand)
+    if isinstance(term, Binary) and term.op in ("*", "/", "^"):
+        right = attach_unary(term.right, op, operand)
+        if right is not None:
+            return Binary(term.op, term.left, right)
+    return None
+
+
+def build_additive(tree: Tree) -> Node:
+    terms: list[Node] = []
+    ops: list[str] = []
+    for child in subtrees(tree):
+        if child.data == "add_op":
+            ops.append(operator(child))
+        else:
+            terms.append(build(child))
+
+    # `<term with empty tail> op next` is `term` with `op next` as its tail.
+    operands = [terms[0]]
+    kept_ops: list[str] = []
+    for op, term in zip(ops, terms[1:]):
+        merged = attach_unary(operands[-1], op, term)
+        if merged is not None:
+            operands[-1] = merged
+        else:
+            operands.append(term)
+            kept_ops.append(op)
+    return fold_left(operands, kept_ops)
+
+
+def build_index(tree: Tree) -> Node:
+    sign = "+"
+    terms: list[Node] = []
+    ops: list[str] = []
+    for child in subtrees(tree):
+        if child.data == "sign":
+            sign = operator(child)
+        elif child.data == "add_op":
+            ops.append(operator(child))
+        else:
+            term = child.children[0]
+            if isinstance(term, Tree):  # identifier or reserved_identifier
+                term = term.children[0]
+            terms.append(Number(float(term)) if term.type == "NUMBER" else Name(str(term).lower()))
+    if sign == "-":
+        terms[0] = Unary("-", terms[0])
+    return fold_left(terms, ops)
+
+
+def build_base(tree: Tree) -> Node:
+    child = tree.children[0]
+    if isinstance(child, Token):
+        if child.type == "NUMBER":
+            return Number(float(child))
+        if child.type == "RESERVED_IDENTIFIER":
+            return Name(str(child).lower())
+        return Text(child.type.lower(), str(child))
+    kind = child.data
+    if kind == "function_call":
+        return build(child)
+    if kind == "qualified_name":
+        return Name(".".join(str(part.children[0]) for part in subtrees(child)).lower())
+    if kind == "boolean_literal":
+        return Number(1.0 if str(child.children[0]).lower() == "true" else 0.0)
+    if kind == "field_list":
+        items = subtrees(child)
+        if not items:
+            return EMPTY
+        if len(items) == 1 and not tokens(child):
+            item = items[0].children[0]
+            if isinstance(item, Tree) and item.data in ("identifier", "reserved_identifier"):
+                return Name(str(item.children[0]).lower())
+    text = "".join(str(token) for token in child.scan_values(lambda value: isinstance(value, Token)))
+    return Text(kind, text.strip())
+
+
+def build(tree: Tree) -> Node:
+    """Convert a parse tree into expression nodes."""
+    kind = tree.data
+    children = subtrees(tree)
+    if kind in ("expression",):
+        return build(next(child for child in children if child.data == "logical_expr"))
+    if kind in ("logical_expr", "primary") and len(children) == 1:
+        return build(children[0])
+    if kind == "primary":
+        return build(next(child for child in children if child.data == "expression"))
+    if kind in ("or_expr", "and_expr"):
+        return fold_left([build(child) for child in children], [kind[:-5]] * (len(children) - 1))
+    if kind == "not_expr":
+        if tokens(tree):
+            return Unary("not", build(children[0]))
+        return build(children[0])
+    if kind == "comparison_expr":
+        operands = [build(child) for child in children if child.data != "comparison_op"]
+        ops = [COMPARISON_OPS[operator(child)] for child in children if child.data == "comparison_op"]
+        return fold_left(operands, ops)
+    if kind == "add_expr":
+        return build_additive(tree)
+    if kind == "mul_expr":
+        operands = [build(child) for child in children if child.data != "mul_op"]
+        ops = [operator(child) for child in children if child.data == "mul_op"]
+        return fold_left(operands, ops)
+    if kind == "pow_expr":
+        base = build(children[0])
+        return Binary("^", base, build(children[1])) if len(children) > 1 else base
+    if kind == "indexed_expr":
+        operand = build(children[0])
+        return Shift(operand, build_index(children[1])) if len(children) > 1 else operand
+    if kind == "base_expr":
+        return build_base(tree)
+    if kind == "function_call":
+        head = tree.children[0]
+        name = str(head) if isinstance(head, Token) else ".".join(
+            str(part.children[0]) for part in subtrees(head)
+        )
+        arguments = next((child for child in children if child.data == "arguments"), None)
+        args = tuple(build(child) for child in subtrees(arguments)) if arguments is not None else ()
+        return Call(name.lower(), args)
+    raise FormulaError(f"Unsupported construct in formula: {kind}")
+
+
+def cross_section_tags(tags: list[str], operand: Node, text: str) -> Node:
+    """Wrap `operand` in the `#op` / `#By...` tags that prefixed it."""
+    tags = [tag for tag in tags if tag not in HINT_TAGS]
+    if not tags:
+        return operand
+    ops = [tag for tag in tags if tag in OPERATORS]
+    groups = [tag for tag in tags if tag in GROUP_KEYS]
+    if len(ops) != 1 or len(groups) > 1 or len(ops) + len(groups) != len(tags):
+        raise FormulaError(f"Unsupported cross-sectional tags in formula {text!r}")
+    return CrossSection(ops[0], groups[0] if groups else None, operand)
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def parse_formula(text: str) -> Node:
+    """Expression nodes for one RealTest formula (the right-hand side of `Name: ...`).
+
+    Leading `#` tags (`#Rank #ByIndu ...`) are not part of the grammar's
+    expressions; they are read here and become a `CrossSection` node.
+    """
+    tags: list[str] = []
+    body = text
+    while (match := TAG_PATTERN.match(body)) is not None:
+        tags.append(match.group(1).lower())
+        body = body[match.end() :]
+    try:
+        tree = formula_parser().parse(body)
+    except LarkError as error:
+        raise FormulaError(f"Cannot parse formula {text!r}: {error}") from None
+    node = build(tree)
+    if contains_empty(node):
+        raise FormulaError(f"Missing operand in formula {text!r}")
+    return cross_section_tags(tags, node, text)
+
+
+def children(node: Node) -> tuple[Node, ...]:
+    if isinstance(node, Call):
+        return node.args
+    if isinstance(node, Unary):
+        return (node.operand,)
+    if isinstance(node, Binary):
+        return (node.left, node.right)
+    if isinstance(node, Shift):
+        return (node.operand, node.bars)
+    if isinstance(node, CrossSection):
+        return (node.operand,)
+    return ()
+
+
+def with_children(node: Node, parts: tuple[Node, ...]) -> Node:
+    if isinstance(node, Call):
+        return Call(node.name, parts)
+    if isinstance(node, Unary):
+        return Unary(node.op, parts[0])
+    if isinstance(node, Binary):
+        return Binary(node.op, parts[0], parts[1])
+    if isinstance(node, Shift):
+        return Shift(parts[0], parts[1])
+    if isinstance(node, CrossSection):
+        return CrossSection(node.op, node.group, parts[0])
+    return node
+
+
+def walk(node: Node) -> Iterator[Node]:
+    """`node` and every node below it, parents first."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        yield current
+        stack.extend(reversed(children(current)))
+
+
+def substitute(node: Node, resolve: Callable[[str], Node | None]) -> Node:
+    """`node` with every Name that `resolve` maps to a tree replaced by that tree."""
+    if isinstance(node, Name):
+        replacement = resolve(node.name)
+        return node if replacement is None else replacement
+    parts = children(node)
+    if not parts:
+        return node
+    replaced = tuple(substitute(part, resolve) for part in parts)
+    if all(new is old for new, old in zip(replaced, parts)):
+        return node
+    return with_children(node, replaced)
+
+
+class Definitions:
+    """Named formulas, each expanded into one tree over fields and parameters.
+
+    Expansion is what lets `EMA5 > C` and `EMA(C,5) > C` share a cache
+    entry. Parameter names are left as names, and so is anything else that
+    is not a formula here (bar fields, functions' own names).
+    """
+
+    def __init__(self, formulas: Mapping[str, "str | Node"], parameters: Iterable[str] = ()) -> None:
+        self.formulas = {name.lower(): formula for name, formula in formulas.items()}
+        self.parameters = {name.lower() for name in parameters}
+        self._expanded: dict[str, Node] = {}
+        self._pending: list[str] = []
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.formulas
+
+    def definition(self, name: str) -> Node | None:
+        if name in self.parameters or name not in self.formulas:
+            return None
+        expanded = self._expanded.get(name)
+        if expanded is None:
+            if name in self._pending:
+                cycle = " -> ".join(self._pending[self._pending.index(name) :] + [name])
+                raise FormulaError(f"Formulas refer to each other: {cycle}")
+            formula = self.formulas[name]
+            self._pending.append(name)
+            try:
+                expanded = self.expand(formula)
+            finally:
+                self._pending.pop()
+            self._expanded[name] = expanded
+        return expanded
+
+    def expand(self, formula: "str | Node") -> Node:
+        return substitute(parse_formula(formula) if isinstance(formula, str) else formula, self.definition)
+
+
+def contains_empty(node: Node) -> bool:
+    return any(isinstance(item, Empty) for item in walk(node))
+
+
+def format_node(node: Node) -> str:
+    """Fully parenthesised text of `node`, for error messages and debugging."""
+    if isinstance(node, Number):
+        return f"{node.value:g}"
+    if isinstance(node, Name):
+        return node.name
+    if isinstance(node, Text):
+        return node.text
+    if isinstance(node, Call):
+        return f"{node.name}({', '.join(format_node(arg) for arg in node.args)})"
+    if isinstance(node, Unary):
+        return f"({node.op} {format_node(node.operand)})" if node.op == "not" else f"(-{format_node(node.operand)})"
+    if isinstance(node, Binary):
+        return f"({format_node(node.left)} {node.op} {format_node(node.right)})"
+    if isinstance(node, Shift):
+        return f"{format_node(node.operand)}[{format_node(node.bars)}]"
+    if isinstance(node, CrossSection):
+        group = f" #{node.group}" if node.group else ""
+        return f"(#{node.op}{group} {format_node(node.operand)})"
+    return "<empty>"
@@ -0,0 +1,205 @@
+"""Starter library of RealTest functions, named as in `function_catalog.json`.
+
+A function receives the evaluator and its unevaluated argument nodes, so it
+decides which arguments are series (`evaluator.series`) and which must be
+constant bar counts (`evaluator.constant`), and `IF` only evaluates the
+branches it needs. Names and aliases are matched case-insensitively.
+
+A function may also declare its lookback: how many bars before a date it
+reads beyond what its arguments need. Scans use it to evaluate only the
+trailing bars a formula depends on; a function without one needs the whole
+history.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import reduce
+from typing import TYPE_CHECKING, Callable
+
+import numpy as np
+
+from . import series
+from .formula import FormulaError, Node
+from .symbolinfo import top_digits
+
+if TYPE_CHECKING:
+    from .evaluator import Evaluator
+
+# Weight of an EMA's starting value below which it counts as settled, so a
+# scan over the trailing bars agrees with a full-history EMA to about this
+# relative error.
+EMA_SETTLED = 1e-9
+
+
+@dataclass(frozen=True)
+class Function:
+    name: str
+    impl: Callable[["Evaluator", tuple[Node, ...]], "np.ndarray | float"]
+    min_args: int
+    max_args: int | None
+    lookback: Callable[["Evaluator", tuple[Node, ...]], int] | None = None
+
+    def __call__(self, evaluator: "Evaluator", args: tuple[Node, ...]) -> "np.ndarray | float":
+        if len(args) < self.min_args or (self.max_args is not None and len(args) > self.max_args):
+            expected = str(self.min_args) if self.min_args == self.max_args else (
+                f"{self.min_args}+" if self.max_args is None else f"{self.min_args}-{self.max_args}"
+            )
+            raise FormulaError(f"{self.name} takes {expected} arguments, got {len(args)}")
+        return self.impl(evaluator, args)
+
+
+FUNCTIONS: dict[str, Function] = {}
+
+
+def register(
+    name: str,
+    *aliases: str,
+    min_args: int,
+    max_args: int | None = -1,
+    lookback: Callable[["Evaluator", tuple[Node, ...]], int] | None = None,
+):
+    """Add a function under `name` and its catalog aliases."""
+
+    def decorator(impl):
+        function = Function(name, impl, min_args, min_args if max_args == -1 else max_args, lookback)
+        for key in (name, *aliases):
+            FUNCTIONS[key.lower()] = function
+        return impl
+
+    return decorator
+
+
+def bar_count(evaluator: "Evaluator", node: Node) -> int:
+    try:
+        return series.window_length(evaluator.constant(node))
+    except ValueError as error:
+        raise FormulaError(str(error)) from None
+
+
+def window_lookback(evaluator: "Evaluator", args: tuple[Node, ...]) -> int:
+    return bar_count(evaluator, args[1]) - 1
+
+
+def shift_lookback(evaluator: "Evaluator", args: tuple[Node, ...]) -> int:
+    return bar_count(evaluator, args[1])
+
+
+def ema_settle(count: float) -> int:
+    """Bars until an EMA's starting value weighs less than EMA_SETTLED in the result."""
+    factor = 2.0 / (count + 1.0)
+    if factor >= 1.0:
+        return 0
+    return int(np.ceil(np.log(EMA_SETTLED) / np.log(1.0 - factor)))
+
+
+def ema_lookback(evaluator: "Evaluator", args: tuple[Node, ...]) -> int:
+    return bar_count(evaluator, args[1]) - 1 + ema_settle(evaluator.constant(args[1]))
+
+
+def atr_lookback(evaluator: "Evaluator", args: tuple[Node, ...]) -> int:
+    length = 2 * bar_count(evaluator, args[0]) - 1
+    return length + ema_settle(length)
+
+
+def no_lookback(evaluator: "Evaluator", args: tuple[Node, ...]) -> int:
+    return 0
+
+
+@register("MA", "Avg", min_args=2, lookback=window_lookback)
+def moving_average(evaluator: "Evaluator", args: tuple[Node, ...]) -> np.ndarray:
+    return series.rolling_mean(evaluator.series(args[0]), bar_count(evaluator, args[1]))
+
+
+@register("EMA", "XAvg", min_args=2, lookback=ema_lookback)
+def exponential_average(evaluator: "Evaluator", args: tuple[Node, ...]) -> np.ndarray:
+    # The smoothing factor uses the count as given; it may be fractional.
+    count = evaluator.constant(args[1])
+    bar_count(evaluator, args[1])
+    return series.ema(evaluator.series(args[0]), count)
+
+
+@register("ATR", min_args=1, lookback=atr_lookback)
+def average_true_range(evaluator: "Evaluator", args: tuple[Node, ...]) -> np.ndarray:
+    # Wilder's smoothing is an EMA of length 2 * len - 1.
+    length = bar_count(evaluator, args[0])
+    panel = evaluator.panel
+    ranges = series.true_range(panel.field("high"), panel.field("low"), panel.field("close"))
+    return series.ema(ranges, 2 * length - 1)
+
+
+@register("ROC", "PctChg", min_args=2, lookback=shift_lookback)
+def rate_of_change(evaluator: "Evaluator", args: tuple[Node, ...]) -> np.ndarray:
+    values = evaluator.series(args[0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = 100.0 * (values / series.shift(values, bar_count(evaluator, args[1])) - 1.0)
+    result[~np.isfinite(result)] = np.nan
+    return result
+
+
+@register("Sum", min_args=2, lookback=window_lookback)
+def window_sum(evaluator: "Evaluator", args: tuple[Node, ...]) -> np.ndarray:
+    return series.rolling_sum(evaluator.series(args[0]), bar_count(evaluator, args[1]))
+
+
+@register("Highest", "HHV", min_args=2, lookback=window_lookback)
+def highest(evaluator: "Evaluator", args: tuple[Node, ...]) -> np.ndarray:
+    return series.rolling_extreme(evaluator.series(args[0]), bar_count(evaluator, args[1]), np.maximum)
+
+
+@register("Lowest", "LLV", min_args=2, lookback=window_lookback)
+def lowest(evaluator: "Evaluator", args: tuple[Node, ...]) -> np.ndarray:
+    return series.rolling_extreme(evaluator.series(args[0]), bar_count(evaluator, args[1]), np.minimum)
+
+
+@register("Min", min_args=1, max_args=None, lookback=no_lookback)
+def minimum(evaluator: "Evaluator", args: tuple[Node, ...]) -> "np.ndarray | float":
+    return reduce(np.minimum, (evaluator.value(arg) for arg in args))
+
+
+@register("Max", min_args=1, max_args=None, lookback=no_lookback)
+def maximum(evaluator: "Evaluator", args: tuple[Node, ...]) -> "np.ndarray | float":
+    return reduce(np.maximum, (evaluator.value(arg) for arg in args))
+
+
+@register("Abs", min_args=1, lookback=no_lookback)
+def absolute(evaluator: "Evaluator", args: tuple[Node, ...]) -> "np.ndarray | float":
+    return np.abs(evaluator.value(args[0]))
+
+
+@register("IF", "IIF", min_args=3, lookback=no_lookback)
+def choose(evaluator: "Evaluator", args: tuple[Node, ...]) -> "np.ndarray | float":
+    condition = evaluator.value(args[0])
+    if np.ndim(condition) == 0:
+        if np.isnan(condition):
+            return np.nan
+        return evaluator.value(args[1] if condition != 0 else args[2])
+    known = ~np.isnan(condition)
+    chosen = known & (condition != 0)
+    result = np.full(np.shape(condition), np.nan)
+    # Each branch is evaluated for the whole panel, but only when some bar needs it.
+    for mask, branch in ((chosen, args[1]), (known & ~chosen, args[2])):
+        if mask.any():
+            result[mask] = np.broadcast_to(evaluator.value(branch), result.shape)[mask]
+    return result
+
+
+@register("Top", min_args=2, lookback=no_lookback)
+def top(evaluator: "Evaluator", args: tuple[Node, ...]) -> "np.ndarray | float":
+    digits = evaluator.constant(args[1])
+    if digits != int(digits) or digits < 1:
+        raise FormulaError(f"Top needs a whole number of digits, not {digits:g}")
+    result = top_digits(evaluator.value(args[0]), int(digits))
+    return float(result) if np.ndim(result) == 0 else result
+
+
+@register("InList", min_args=1, lookback=no_lookback)
+def in_list(evaluator: "Evaluator", args: tuple[Node, ...]) -> np.ndarray:
+    info = evaluator.panel.info
+    if info is None:
+        raise FormulaError("InList needs symbol information with watchlists")
+    number = evaluator.constant(args[0])
+    if number != int(number) or not 1 <= number <= len(info.lists):
+        raise FormulaError(f"InList({number:g}): there are {len(info.lists)} lists")
+    member = info.membership[:, int(number) - 1].astype(np.float64)
+    return np.broadcast_to(member[:, None], evaluator.panel.shape)
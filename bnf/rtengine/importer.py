@@ -0,0 +1,362 @@
+"""Run a script's `Import:` sections for CSV data sources into a `SymbolStore`.
+
+Declarations are read in order, as RealTest does: each `DataSource:`
+starts a new block and resets its `IncludeList:`/`ExcludeList:`, which
+then apply to every `DataPath:` (a folder of `<SYMBOL>.csv` files) and
+`CSVFile:` (one file with a Symbol column) of that block. `CSVFields:`
+gives the column layout of the paths that follow it, and `StartDate:`,
+`EndDate:` and `SaveAs:` apply to the whole section. `SPY>SPY2` in an
+include list stores SPY's data as SPY2. Other data sources (Yahoo, Tiingo,
+Norgate, MetaStock) need a vendor connection and are reported as
+unsupported.
+
+Files are read `chunk_rows` rows at a time, so a multi-symbol file of any
+size passes through in bounded memory: each chunk is split by symbol and
+spilled to disk, and the symbols are then assembled from their pieces.
+Per-symbol files and assembled symbols are written by a process pool.
+
+A source file whose size and mtime match the manifest is skipped; if only
+the mtime moved, its SHA-1 decides. A changed file, or changed import
+settings, re-imports the file's symbols. A symbol found in several sources
+keeps the data of the last one imported.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from .formula import FormulaError
+from .script import SCRIPT_PATH_PATTERN, Script, Section
+from .store import SymbolStore
+
+DEFAULT_CSV_FIELDS = ("Date", "Open", "High", "Low", "Close", "Volume")
+DEFAULT_CHUNK_ROWS = 1_000_000
+CSV_SUFFIXES = (".csv", ".txt")
+
+
+@dataclass
+class SourceBlock:
+    """One `DataSource:` statement and what follows it up to the next one."""
+
+    kind: str
+    includes: list[str] = field(default_factory=list)
+    excludes: list[str] = field(default_factory=list)
+    paths: list[tuple[str, Path, tuple[str, ...]]] = field(default_factory=list)  # (DataPath|CSVFile, path, fields)
+
+    def aliases(self) -> dict[str, str] | None:
+        """Source symbol -> stored symbol for the included symbols, or None to take every symbol."""
+        if not self.includes:
+            return None
+        pairs = (item.partition(">") for item in self.includes)
+        return {source.strip(): (alias or source).strip() for source, _, alias in pairs}
+
+    def selects(self, symbol: str, aliases: dict[str, str] | None) -> bool:
+        return (aliases is None or symbol in aliases) and symbol not in self.excludes
+
+
+@dataclass
+class ImportPlan:
+    blocks: list[SourceBlock]
+    start: np.datetime64 | None
+    end: np.datetime64 | None
+    save_as: str | None
+
+
+def resolve_path(text: str, section: Section) -> Path:
+    path = Path(SCRIPT_PATH_PATTERN.sub("", text.strip()).replace("\\", "/"))
+    if path.is_absolute() or section.source is None:
+        return path
+    return section.source.parent / path
+
+
+def symbol_list(text: str, section: Section) -> list[str]:
+    """Symbols of an include/exclude item: a comma list, or a file with one symbol per line."""
+    if any(marker in text for marker in ("/", "\\", "?scriptpath?")) or text.lower().endswith(".txt"):
+        path = resolve_path(text, section)
+        if not path.exists():
+            raise FormulaError(f"Import symbol list not found: {path}")
+        lines = path.read_text(encoding="utf-8", errors="replace").splitlines()
+        return [line.split(",")[0].strip() for line in lines if line.strip()]
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def import_date(text: str | None, open_value: str) -> np.datetime64 | None:
+    if not text or text.strip().lower() == open_value:
+        return None
+    try:
+        return np.datetime64(pd.Timestamp(text.strip()).to_datetime64(), "D")
+    except ValueError as error:
+        raise FormulaError(f"Import date {text!r}: {error}") from None
+
+
+def import_plan(section: Section) -> ImportPlan:
+    blocks: list[SourceBlock] = []
+    fields = DEFAULT_CSV_FIELDS
+    settings: dict[str, str] = {}
+    for declaration in section.declarations:
+        name = declaration.name.lower()
+        if name == "datasource":
+            blocks.append(SourceBlock(declaration.text.strip()))
+        elif name == "csvfields":
+            fields = tuple(item.strip() for item in declaration.text.split(",") if item.strip())
+        elif name in ("includelist", "excludelist", "datapath", "csvfile"):
+            if not blocks:
+                raise FormulaError(f"Line {declaration.line}: {declaration.name} before any DataSource")
+            block = blocks[-1]
+            if name == "includelist":
+                block.includes.extend(symbol_list(declaration.text, section))
+            elif name == "excludelist":
+                block.excludes.extend(symbol_list(declaration.text, section))
+            else:
+                block.paths.append((declaration.name, resolve_path(declaration.text, section), fields))
+        else:
+            settings[name] = declaration.text
+    return ImportPlan(
+        blocks,
+        import_date(settings.get("startdate"), "earliest"),
+        import_date(settings.get("enddate"), "latest"),
+        settings.get("saveas"),
+    )
+
+
+def file_digest(path: Path) -> str:
+    with open(path, "rb") as handle:
+        return hashlib.file_digest(handle, "sha1").hexdigest()
+
+
+def unchanged(path: Path, settings: dict, recorded: dict | None) -> tuple[bool, dict]:
+    """Whether `path` was imported as it is now with the same settings, and its new manifest entry."""
+    stat = path.stat()
+    entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "settings": settings}
+    if recorded is None or recorded.get("settings") != settings or recorded.get("size") != stat.st_size:
+        return False, entry
+    if recorded.get("mtime_ns") == stat.st_mtime_ns:
+        return True, {**recorded, **entry}
+    entry["sha1"] = file_digest(path)
+    return entry["sha1"] == recorded.get("sha1"), {**recorded, **entry}
+
+
+def is_header(line: str, date_position: int) -> bool:
+    """Whether a file's first line is a header: its field at the Date position is not a date."""
+    fields = line.rstrip("\r\n").split(",")
+    if date_position >= len(fields):
+        return True
+    return pd.isna(pd.to_datetime(fields[date_position].strip(), errors="coerce"))
+
+
+def read_chunks(path: Path, fields: Sequence[str], chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """The file's rows, `chunk_rows` at a time, with lower-case field names and a datetime64[D] `date`."""
+    names = [name.lower() for name in fields]
+    if "date" not in names:
+        raise FormulaError(f"CSVFields for {path} has no Date field")
+    with open(path, encoding="utf-8", errors="replace") as handle:
+        first = handle.readline()
+    header = 0 if is_header(first, names.index("date")) else None
+    numeric = {name: np.float64 for name in names if name not in ("date", "symbol")}
+    reader = pd.read_csv(
+        path, header=header, names=names, dtype={"date": str, "symbol": str, **numeric}, chunksize=chunk_rows
+    )
+    with reader:
+        for chunk in reader:
+            chunk["date"] = pd.to_datetime(chunk["date"].str.strip()).to_numpy(dtype="datetime64[D]")
+            yield chunk
+
+
+def in_range(frame: pd.DataFrame, plan: ImportPlan) -> pd.DataFrame:
+    keep = np.ones(len(frame), dtype=bool)
+    if plan.start is not None:
+        keep &= frame["date"].to_numpy() >= plan.start
+    if plan.end is not None:
+        keep &= frame["date"].to_numpy() <= plan.end
+    return frame[keep]
+
+
+def write_symbol(directory: str, symbol: str, frames: list[pd.DataFrame]) -> tuple[str, int]:
+    """Sort a symbol's rows by date, keep the last of duplicate dates, and store them."""
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({"date": []})
+    frame = frame.drop(columns=["symbol"], errors="ignore").sort_values("date", kind="stable")
+    frame = frame.drop_duplicates("date", keep="last")
+    columns = {name: frame[name].to_numpy(dtype=np.float64) for name in frame.columns if name != "date"}
+    SymbolStore(directory).write(symbol, {"date": frame["date"].to_numpy(dtype="datetime64[D]"), **columns})
+    return symbol, len(frame)
+
+
+def import_symbol_file(
+    directory: str, symbol: str, path: Path, fields: tuple[str, ...], plan: ImportPlan, chunk_rows: int
+) -> tuple[str, int]:
+    return write_symbol(directory, symbol, [in_range(chunk, plan) for chunk in read_chunks(path, fields, chunk_rows)])
+
+
+def import_spilled(directory: str, symbol: str, pieces: list[Path]) -> tuple[str, int]:
+    return write_symbol(directory, symbol, [pd.read_pickle(piece) for piece in pieces])
+
+
+def spill_by_symbol(
+    path: Path,
+    fields: tuple[str, ...],
+    plan: ImportPlan,
+    select: Callable[[str], str | None],
+    chunk_rows: int,
+    spill: Path,
+) -> dict[str, list[Path]]:
+    """Split a multi-symbol file into per-symbol pieces on disk: stored symbol -> piece files."""
+    if "symbol" not in (name.lower() for name in fields):
+        raise FormulaError(f"CSVFields for CSVFile {path} has no Symbol field")
+    pieces: dict[str, list[Path]] = {}
+    for number, chunk in enumerate(read_chunks(path, fields, chunk_rows)):
+        for symbol, rows in in_range(chunk, plan).groupby("symbol", sort=False):
+            stored = select(str(symbol).strip())
+            if stored is None:
+                continue
+            parts = pieces.setdefault(stored, [])
+            parts.append(spill / f"{quote(stored, safe='')}.{number}.pkl")
+            rows.to_pickle(parts[-1])
+    return pieces
+
+
+def run_tasks(function: Callable, tasks: list[tuple], workers: int | None) -> Iterator[tuple[str, int]]:
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0 or len(tasks) <= 1:
+        for task in tasks:
+            yield function(*task)
+        return
+    with ProcessPoolExecutor(min(workers, len(tasks))) as pool:
+        yield from pool.map(function, *zip(*tasks), chunksize=max(1, len(tasks) // (8 * workers)))
+
+
+def csv_files(folder: Path) -> Iterable[tuple[str, Path]]:
+    if not folder.is_dir():
+        raise FormulaError(f"Import DataPath not found: {folder}")
+    for path in sorted(folder.iterdir()):
+        if path.suffix.lower() in CSV_SUFFIXES and path.is_file():
+            yield path.stem, path
+
+
+def import_files(
+    files: list[tuple[str, Path]],
+    plan: ImportPlan,
+    fields: tuple[str, ...],
+    store: SymbolStore,
+    workers: int | None,
+    chunk_rows: int,
+) -> dict[Path, tuple[int, int]]:
+    """Per-symbol files in parallel: path -> (symbols, rows)."""
+    tasks = [(str(store.directory), symbol, path, fields, plan, chunk_rows) for symbol, path in files]
+    return {path: (1, rows) for (_, path), (_, rows) in zip(files, run_tasks(import_symbol_file, tasks, workers))}
+
+
+def import_multi_symbol_file(
+    path: Path,
+    plan: ImportPlan,
+    fields: tuple[str, ...],
+    select: Callable[[str], str | None],
+    store: SymbolStore,
+    workers: int | None,
+    chunk_rows: int,
+) -> tuple[list[str], int]:
+    """A multi-symbol file, spilled by symbol and then assembled in parallel: (symbols, rows)."""
+    with tempfile.TemporaryDirectory(prefix="rtengine-import-") as spill:
+        pieces = spill_by_symbol(path, fields, plan, select, chunk_rows, Path(spill))
+        tasks = [(str(store.directory), symbol, parts) for symbol, parts in pieces.items()]
+        rows = sum(count for _, count in run_tasks(import_spilled, tasks, workers))
+    return sorted(pieces), rows
+
+
+def run_section(plan: ImportPlan, store: SymbolStore, workers: int | None, chunk_rows: int) -> list[dict]:
+    manifest = store.load_manifest()
+    sources = manifest.setdefault("sources", {})
+    report: list[dict] = []
+    for block in plan.blocks:
+        if block.kind.lower() != "csv":
+            report.append({"Source": block.kind, "Kind": "DataSource", "Status": "unsupported"})
+            continue
+        aliases = block.aliases()
+
+        def select(symbol: str) -> str | None:
+            return (aliases or {}).get(symbol, symbol) if block.selects(symbol, aliases) else None
+
+        for kind, path, fields in block.paths:
+            started = time.perf_counter()
+            settings = {
+                "fields": list(fields),
+                "start": str(plan.start),
+                "end": str(plan.end),
+                "includes": block.includes,
+                "excludes": block.excludes,
+            }
+            if kind.lower() == "datapath":
+                files = [(select(symbol), file) for symbol, file in csv_files(path)]
+                files = [(symbol, file) for symbol, file in files if symbol is not None]
+            elif path.is_file():
+                files = [(None, path)]
+            else:
+                raise FormulaError(f"Import CSVFile not found: {path}")
+
+            entries = {}
+            for symbol, file in files:
+                same, entries[file] = unchanged(file, settings, sources.get(str(file)))
+                if same:
+                    sources[str(file)] = entries.pop(file)
+            counts = import_files(
+                [(symbol, file) for symbol, file in files if symbol is not None and file in entries],
+                plan, fields, store, workers, chunk_rows,
+            )
+            for symbol, file in files:
+                if file not in entries:
+                    status, (symbols, rows) = "unchanged", (0, 0)
+                elif symbol is None:
+                    stored, rows = import_multi_symbol_file(file, plan, fields, select, store, workers, chunk_rows)
+                    status, symbols = "imported", len(stored)
+                    entries[file]["symbols"] = stored
+                else:
+                    status, (symbols, rows) = "imported", counts[file]
+                if file in entries:
+                    entries[file].setdefault("sha1", file_digest(file))
+                    sources[str(file)] = entries[file]
+                report.append({"Source": str(file), "Kind": kind, "Status": status, "Symbols": symbols, "Rows": rows})
+            seconds = time.perf_counter() - started
+            for row in report[len(report) - len(files) :]:
+                row["Seconds"] = seconds
+    store.save_manifest(manifest)
+    return report
+
+
+def run_import(
+    script: Script,
+    store: Path | str | None = None,
+    workers: int | None = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> pd.DataFrame:
+    """Import every `Import:` section of the script; one report row per source file and store.
+
+    `store` defaults to a directory beside the script named after `SaveAs`
+    (`Stocks2014.rtd` -> `Stocks2014/`). `workers` defaults to the number of
+    CPUs; 0 imports in this process.
+    """
+    sections = script.sections_of("Import")
+    if not sections:
+        raise FormulaError("Script has no Import: section")
+    report: list[dict] = []
+    for section in sections:
+        plan = import_plan(section)
+        if store is not None:
+            directory = Path(store)
+        elif plan.save_as:
+            directory = resolve_path(plan.save_as, section).with_suffix("")
+        else:
+            raise FormulaError("Import: section has no SaveAs, so a store directory is needed")
+        rows = run_section(plan, SymbolStore(directory), workers, chunk_rows)
+        report.extend({**row, "Store": str(directory)} for row in rows)
+    return pd.DataFrame(report)
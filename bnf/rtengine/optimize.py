@@ -0,0 +1,148 @@
+"""Sweep a script's `Parameters:` grid, as RealTest's optimizer does.
+
+Every combination of the swept parameters (by default, all that declare
+more than one value) is backtested, and the others keep their defaults.
+Combinations run in a process pool:
+
+- the panel is written once as `.npy` files and memory-mapped by each
+  worker, so tasks only carry a parameter dict and the pages are shared
+  through the OS page cache instead of being pickled per task;
+- each worker keeps one `SeriesCache` for all the combinations it runs.
+  Parameters are inlined into the cache keys, so series that do not use a
+  swept parameter (`EMA(C,100)`, `ATR(5)`, `Liquid`) are computed once
+  per worker, and only the dependent part is re-evaluated;
+- results are appended to a CSV as each combination finishes, so a long
+  sweep can be watched, or stopped, with everything so far on disk.
+
+`workers=0` runs the grid in this process with a single cache.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import csv
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterator, Mapping, Sequence
+
+import pandas as pd
+
+from .backtest import Backtest
+from .cache import DEFAULT_CACHE_BYTES, SeriesCache
+from .formula import FormulaError
+from .panel import Panel
+from .parameters import default_parameters, script_parameters
+from .script import Script
+from .symbolinfo import SymbolInfo
+
+# Per-process state set by `start_worker`: the script, the mapped panel and the shared cache.
+_worker: dict[str, object] = {}
+
+
+def parameter_grid(script: Script, sweep: Sequence[str] | None = None) -> Iterator[dict[str, float]]:
+    """Every combination of the `sweep` parameters' values, the rest at their defaults or worked out."""
+    parameters = script_parameters(script)
+    if sweep is None:
+        sweep = [name for name, parameter in parameters.items() if len(parameter.values) > 1]
+    unknown = [name for name in sweep if name not in parameters]
+    if unknown:
+        raise FormulaError(f"Not declared under Parameters: {', '.join(unknown)}")
+    computed = [name for name in sweep if parameters[name].formula is not None]
+    if computed:
+        raise FormulaError(f"Worked out from other parameters, so cannot be swept: {', '.join(computed)}")
+    for values in itertools.product(*(parameters[name].values for name in sweep)):
+        yield default_parameters(script, dict(zip(sweep, values)))
+
+
+def start_worker(
+    script: Script, panel: "Panel | Path | str", cache_bytes: int, info: SymbolInfo | None = None
+) -> None:
+    """Set up this process; a mapped panel gets back the symbol information `to_npy_dir` does not write."""
+    _worker["script"] = script
+    if not isinstance(panel, Panel):
+        panel = Panel.from_npy_dir(panel)
+        panel.info = info
+    _worker["panel"] = panel
+    _worker["cache"] = SeriesCache(cache_bytes)
+
+
+def worker_backtest(parameters: Mapping[str, float]) -> Backtest:
+    """A backtest in this worker, on its panel and series cache."""
+    return Backtest(_worker["script"], _worker["panel"], parameters, cache=_worker["cache"])
+
+
+def map_workers(
+    script: Script,
+    panel: Panel,
+    function: Callable,
+    tasks: Sequence[tuple],
+    workers: int | None = None,
+    cache_bytes: int = DEFAULT_CACHE_BYTES,
+) -> Iterator:
+    """`function(*task)` for every task, in completion order, across worker processes.
+
+    `function` must be a module-level function that uses `worker_backtest`.
+    `workers` defaults to the number of CPUs; 0 runs the tasks in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 0:
+        start_worker(script, panel, cache_bytes)
+        for task in tasks:
+            yield function(*task)
+        return
+    with tempfile.TemporaryDirectory(prefix="rtengine-panel-") as directory:
+        panel.to_npy_dir(directory)
+        pool = ProcessPoolExecutor(
+            workers, initializer=start_worker, initargs=(script, directory, cache_bytes, panel.info)
+        )
+        with pool:
+            futures = [pool.submit(function, *task) for task in tasks]
+            for future in as_completed(futures):
+                yield future.result()
+
+
+def run_combination(parameters: dict[str, float], strategies: Sequence[str] | None) -> list[dict]:
+    """Report rows for one parameter combination, run in a worker set up by `start_worker`."""
+    started = time.perf_counter()
+    backtest = worker_backtest(parameters)
+    names = strategies or backtest.strategies()
+    rows = [{**parameters, "Strategy": name, **backtest.run(name).summary()} for name in names]
+    seconds = time.perf_counter() - started
+    return [{**row, "Seconds": seconds} for row in rows]
+
+
+def optimize(
+    script: Script,
+    panel: Panel,
+    sweep: Sequence[str] | None = None,
+    strategies: Sequence[str] | None = None,
+    output: Path | str | None = None,
+    workers: int | None = None,
+    cache_bytes: int = DEFAULT_CACHE_BYTES,
+) -> pd.DataFrame:
+    """Backtest every combination of the grid; rows arrive in completion order.
+
+    `workers` defaults to the number of CPUs. With `output`, each row is also
+    appended to that CSV as soon as its combination is done.
+    """
+    tasks = [(parameters, strategies) for parameters in parameter_grid(script, sweep)]
+    rows: list[dict] = []
+    with open(output, "w", newline="") if output else contextlib.nullcontext() as handle:
+        writer = None
+        for batch in map_workers(script, panel, run_combination, tasks, workers, cache_bytes):
+            for row in batch:
+                rows.append(row)
+                if handle is None:
+                    continue
+                if writer is None:
+                    writer = csv.DictWriter(handle, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+            if handle is not None:
+                handle.flush()
+    return pd.DataFrame(rows)
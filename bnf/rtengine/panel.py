@@ -0,0 +1,156 @@
+"""Price panel: one (symbols, dates) float64 array per bar field (float32 if stored so)."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .crosssection import GroupIndex
+from .symbolinfo import SymbolInfo
+
+# RealTest bar field names and abbreviations -> panel field.
+FIELD_ALIASES = {
+    "open": "open",
+    "o": "open",
+    "high": "high",
+    "h": "high",
+    "low": "low",
+    "l": "low",
+    "close": "close",
+    "c": "close",
+    "volume": "volume",
+    "vol": "volume",
+    "v": "volume",
+}
+CSV_COLUMNS = {"Open": "open", "High": "high", "Low": "low", "Close": "close", "Volume": "volume"}
+
+
+@dataclass
+class Panel:
+    """Bar fields plus per-symbol group codes (`industry`, `econ`, ...) for `#By...` tags.
+
+    `info`, when attached with `with_info`, holds the symbols' `Info...`,
+    `PointValue` and `?` items in panel order.
+    """
+
+    symbols: tuple[str, ...]
+    dates: np.ndarray
+    fields: dict[str, np.ndarray] = field(default_factory=dict)
+    groups: dict[str, np.ndarray] = field(default_factory=dict)
+    info: SymbolInfo | None = None
+    _group_indexes: dict[str | None, GroupIndex] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.symbols = tuple(self.symbols)
+        self.dates = np.asarray(self.dates, dtype="datetime64[D]")
+        for name, values in self.fields.items():
+            if values.shape != self.shape:
+                raise ValueError(f"Field {name} has shape {values.shape}, expected {self.shape}")
+        for name, codes in self.groups.items():
+            if np.shape(codes) != (len(self.symbols),):
+                raise ValueError(f"Group codes {name} have shape {np.shape(codes)}, expected ({len(self.symbols)},)")
+        if self.info is not None and self.info.symbols != self.symbols:
+            raise ValueError("Symbol information is not in panel order; attach it with with_info")
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.symbols), len(self.dates)
+
+    def field(self, name: str) -> np.ndarray | None:
+        """The array for a field name or RealTest abbreviation (`C`, `Vol`), or None."""
+        key = name.lower()
+        return self.fields.get(FIELD_ALIASES.get(key, key))
+
+    def group_index(self, key: str | None = None) -> GroupIndex | None:
+        """Sorted layout of the symbols by the `key` group codes (all symbols if None)."""
+        if key not in self._group_indexes:
+            if key is not None and key not in self.groups:
+                return None
+            self._group_indexes[key] = GroupIndex.build(self.symbols, None if key is None else self.groups[key])
+        return self._group_indexes[key]
+
+    def with_info(self, info: SymbolInfo, classification: str = "TRBC") -> "Panel":
+        """This panel with `info` in its symbol order and its `#By...` group codes, by TRBC or GICS levels."""
+        info = info.reindex(self.symbols)
+        return Panel(self.symbols, self.dates, self.fields, {**self.groups, **info.group_codes(classification)}, info)
+
+    def tail(self, bars: int | None, end: np.datetime64 | None = None) -> "Panel":
+        """The last `bars` dates on or before `end` (all of them if None), as views of these arrays."""
+        stop = len(self.dates) if end is None else int(np.searchsorted(self.dates, end, side="right"))
+        start = 0 if bars is None else max(0, stop - bars)
+        window = Panel(
+            self.symbols,
+            self.dates[start:stop],
+            {name: values[:, start:stop] for name, values in self.fields.items()},
+            self.groups,
+            self.info,
+        )
+        window._group_indexes = self._group_indexes  # they order symbols, whatever the dates
+        return window
+
+    def to_npy_dir(self, directory: Path | str, dtype: "np.dtype | type" = np.float64) -> Path:
+        """Write every array as a `.npy` file, so other processes can map the panel with `from_npy_dir`."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "symbols.npy", np.asarray(self.symbols, dtype=str))
+        np.save(directory / "dates.npy", self.dates)
+        for name, values in self.fields.items():
+            np.save(directory / f"field.{name}.npy", np.ascontiguousarray(values, dtype=dtype))
+        for name, codes in self.groups.items():
+            codes = np.asarray(codes)
+            np.save(directory / f"group.{name}.npy", codes.astype(str) if codes.dtype == object else codes)
+        return directory
+
+    @classmethod
+    def from_npy_dir(cls, directory: Path | str, mmap_mode: str | None = "r") -> "Panel":
+        """A panel written by `to_npy_dir`, memory-mapped read-only by default."""
+        directory = Path(directory)
+        arrays = {
+            path.name[: -len(".npy")]: np.load(path, mmap_mode=mmap_mode) for path in directory.glob("*.*.npy")
+        }
+        return cls(
+            tuple(np.load(directory / "symbols.npy").tolist()),
+            np.load(directory / "dates.npy"),
+            {name.split(".", 1)[1]: values for name, values in arrays.items() if name.startswith("field.")},
+            {name.split(".", 1)[1]: values for name, values in arrays.items() if name.startswith("group.")},
+        )
+
+    @classmethod
+    def from_frames(cls, frames: Mapping[str, pd.DataFrame]) -> "Panel":
+        """Build from one dates x symbols frame per field, aligned on the union of both axes."""
+        dates = pd.DatetimeIndex([])
+        symbols: list[str] = []
+        for frame in frames.values():
+            dates = dates.union(pd.DatetimeIndex(frame.index))
+            symbols.extend(column for column in frame.columns if column not in symbols)
+        fields = {
+            FIELD_ALIASES.get(name.lower(), name.lower()): frame.reindex(index=dates, columns=symbols)
+            .to_numpy(dtype=np.float64)
+            .T.copy()
+            for name, frame in frames.items()
+        }
+        return cls(tuple(symbols), dates.to_numpy(dtype="datetime64[D]"), fields)
+
+    @classmethod
+    def from_csv_dir(
+        cls,
+        directory: Path | str,
+        symbols: Iterable[str] | None = None,
+        pattern: str = "{symbol}.csv",
+    ) -> "Panel":
+        """Read `<directory>/<SYMBOL>.csv` files with Date, Open, High, Low, Close, Volume columns."""
+        directory = Path(directory)
+        if symbols is None:
+            suffix = pattern.format(symbol="")
+            symbols = sorted(path.name[: -len(suffix)] for path in directory.glob(pattern.format(symbol="*")))
+        columns: dict[str, dict[str, pd.Series]] = {name: {} for name in CSV_COLUMNS.values()}
+        for symbol in symbols:
+            frame = pd.read_csv(directory / pattern.format(symbol=symbol), index_col="Date", parse_dates=["Date"])
+            for column, name in CSV_COLUMNS.items():
+                if column in frame.columns:
+                    columns[name][symbol] = frame[column]
+        return cls.from_frames({name: pd.DataFrame(values) for name, values in columns.items() if values})
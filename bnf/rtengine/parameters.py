@@ -0,0 +1,100 @@
+"""`Parameters:` declarations: the values a script can be run with.
+
+A parameter is one of
+
+    NumPos:   from 5 to 20 step 5 def 10   (step defaults to 1, def to the start)
+    Exits:    from 20 to 5 step -5         (a negative step counts down)
+    Lookback: 20, 50, 100                  (def is the first value)
+    PctExt:   2.5 / 100                    (an expression)
+
+as in the grammar's `parameter_range_declaration`, `parameter_list_declaration`
+and `normal_declaration`. An expression is parsed by the formula grammar; one
+that names other parameters is worked out from their values on each run.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Mapping
+
+import numpy as np
+
+from .evaluator import Evaluator
+from .formula import FormulaError, Name, Node, Text, parse_formula, walk
+from .panel import Panel
+from .script import Script
+
+NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+RANGE_PATTERN = re.compile(
+    rf"^from\s+({NUMBER})\s+to\s+({NUMBER})(?:\s+step\s+({NUMBER}))?(?:\s+def\s+({NUMBER}))?$",
+    re.IGNORECASE,
+)
+LIST_PATTERN = re.compile(rf"^{NUMBER}(?:\s*,\s*{NUMBER})*$")
+
+# Expressions are evaluated against no bars, so anything but a constant fails.
+NO_BARS = Panel((), np.zeros(0, dtype="datetime64[D]"))
+
+
+@dataclass(frozen=True)
+class Parameter:
+    name: str
+    values: tuple[float, ...]
+    default: float
+    formula: Node | None = None
+
+    @classmethod
+    def parse(cls, name: str, text: str) -> "Parameter":
+        text = text.strip()
+        match = RANGE_PATTERN.match(text)
+        if match is not None:
+            start, stop = float(match.group(1)), float(match.group(2))
+            step = float(match.group(3)) if match.group(3) else 1.0
+            if step == 0:
+                raise FormulaError(f"Parameter {name}: step must not be 0")
+            # Stepping by index keeps 1 to 5 step 0.1 from drifting past the end.
+            count = int(np.floor((stop - start) / step + 1e-9)) + 1
+            if count < 1:
+                raise FormulaError(f"Parameter {name}: from {start:g} step {step:g} never reaches {stop:g}")
+            values = tuple(float(round(start + step * i, 10)) for i in range(count))
+            default = float(match.group(4)) if match.group(4) else start
+            return cls(name, values, default)
+        if LIST_PATTERN.match(text):
+            values = tuple(float(item) for item in text.split(","))
+            return cls(name, values, values[0])
+        formula = parse_formula(text)
+        if any(isinstance(node, Text) for node in walk(formula)):
+            raise FormulaError(f"Parameter {name}: expected a number, a list, 'from X to Y' or a formula, got {text!r}")
+        if any(isinstance(node, Name) for node in walk(formula)):
+            return cls(name, (), np.nan, formula)
+        value = Evaluator(NO_BARS).constant(formula)
+        return cls(name, (value,), value)
+
+    def value(self, parameters: Mapping[str, float]) -> float:
+        """This parameter's value given the others': its default, or its expression worked out."""
+        if self.formula is None:
+            return self.default
+        try:
+            return Evaluator(NO_BARS, parameters=parameters).constant(self.formula)
+        except FormulaError as error:
+            raise FormulaError(f"Parameter {self.name}: {error}") from None
+
+
+def script_parameters(script: Script) -> dict[str, Parameter]:
+    """Every `Parameters:` declaration of `script` by name, later ones winning."""
+    return {
+        declaration.name: Parameter.parse(declaration.name, declaration.text)
+        for section in script.sections_of("Parameters")
+        for declaration in section.declarations
+    }
+
+
+def default_parameters(script: Script, overrides: Mapping[str, float] | None = None) -> dict[str, float]:
+    """Every parameter's value, from `overrides` or its declaration; undeclared overrides pass through."""
+    given = {name.lower(): (name, value) for name, value in (overrides or {}).items()}
+    values: dict[str, float] = {}
+    for name, parameter in script_parameters(script).items():
+        override = given.pop(name.lower(), None)
+        values[name] = parameter.value(values) if override is None else override[1]
+    values.update(given.values())
+    return values
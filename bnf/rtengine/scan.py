@@ -0,0 +1,210 @@
+"""Run a script's `Scan:` section: its filter and columns on the latest bars.
+
+A scan only needs the last `NumDays` bars of each formula, so it does not
+evaluate the whole history. Working down from the scanned formulas, each
+sub-expression is given the number of trailing bars its consumers read
+(`Evaluator.lookback`: a window's length, a shift, an EMA's settling time),
+and is then computed over just those bars. In `Avg(V, 20) > 100000` the
+average covers 20 bars of volume and the comparison one bar; nothing reads
+further back than the longest chain of lookbacks. Exponential averages are
+cut where the weight of the dropped bars falls below `EMA_SETTLED`, so they
+can differ from a full-history run in the last few significant digits; a
+function without a declared lookback reads the full history.
+
+`Filter:` (or `Filter1:`, `Filter2:`, ...) selects the rows, with the
+`FilterNum` parameter set to the filter's number; `Sort:` lists the
+columns, or formulas, the rows are ordered by, each descending when
+prefixed with `-`; every other declaration is an output column. `NumDays` and `EndDate` come from `Settings:`,
+overridden by `ScanSettings:`.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .cache import SeriesCache
+from .evaluator import Evaluator
+from .formula import FormulaError, Name, Node, Number, Text, children
+from .panel import Panel
+from .parameters import default_parameters
+from .script import Script
+
+FILTER_PATTERN = re.compile(r"^filter(\d*)$", re.IGNORECASE)
+DEFAULT_COLUMNS = ("Symbol", "Date")
+
+
+def scan_settings(script: Script) -> dict[str, str]:
+    """`Settings:` values by lower-case name, overridden by `ScanSettings:` ones."""
+    values: dict[str, str] = {}
+    for kind in ("Settings", "ScanSettings"):
+        for section in script.sections_of(kind):
+            values.update({declaration.name.lower(): declaration.text for declaration in section.declarations})
+    return values
+
+
+def split_list(text: str) -> list[str]:
+    """Items of a comma list whose items may be formulas with commas of their own."""
+    items, depth, start = [], 0, 0
+    for position, character in enumerate(text):
+        depth += {"(": 1, ")": -1}.get(character, 0)
+        if character == "," and depth == 0:
+            items.append(text[start:position])
+            start = position + 1
+    return items + [text[start:]]
+
+
+def sort_item(text: str) -> tuple[str, bool]:
+    """A `Sort:` item without its `-` prefix, and whether it sorts descending."""
+    text = text.strip()
+    return (text[1:].strip(), True) if text.startswith("-") else (text, False)
+
+
+def end_date(text: str | None) -> np.datetime64 | None:
+    if not text or text.strip().lower() == "latest":
+        return None
+    try:
+        return np.datetime64(pd.Timestamp(text.strip()).to_datetime64(), "D")
+    except ValueError as error:
+        raise FormulaError(f"Scan EndDate: {error}") from None
+
+
+def text_column(name: str, node: Text, panel: Panel) -> np.ndarray:
+    """A column that is a string literal, `?Symbol` or a symbol information item (`?Sector`), one value per symbol."""
+    symbols = np.asarray(panel.symbols, dtype=object)
+    if node.kind == "string_literal":
+        return np.full(len(symbols), node.text[1:-1], dtype=object)
+    if node.text.lower() == "?symbol":
+        return symbols
+    values = None if panel.info is None else panel.info.text(node.text)
+    if values is None:
+        raise FormulaError(f"Scan column {name}: {node.text} needs symbol information the panel does not have")
+    return values
+
+
+def trailing(value: "np.ndarray | float", bars: int) -> "np.ndarray | float":
+    return value if np.ndim(value) == 0 else value[:, value.shape[1] - bars :]
+
+
+def trailing_evaluator(panel: Panel, roots: Iterable[Node], bars: int) -> Evaluator:
+    """An evaluator over the last `bars` bars of `panel`, with the non-leaf `roots` cached.
+
+    Each sub-expression is computed once, over the bars its consumers read,
+    by an evaluator on that window whose cache holds its operands cut to it.
+    """
+    expander = Evaluator(panel)
+    everything = len(panel.dates)
+    needed: dict[Node, int] = {}
+
+    def reach(node: Node) -> int:
+        own = expander.lookback(node)
+        return everything if own is None else min(everything, needed[node] + own)
+
+    def demand(node: Node, width: int) -> None:
+        if isinstance(node, (Number, Name, Text)) or needed.get(node, -1) >= width:
+            return
+        needed[node] = width
+        for part in children(node):
+            demand(part, reach(node))
+
+    roots = list(roots)
+    for root in roots:
+        demand(root, min(bars, everything))
+
+    computed: dict[Node, "np.ndarray | float"] = {}
+
+    def evaluator_over(width: int, parts: Iterable[Node]) -> Evaluator:
+        cache = SeriesCache()
+        for part in parts:
+            if part in computed:
+                cache.put(part, trailing(computed[part], width))
+        return Evaluator(panel.tail(width), cache=cache)
+
+    def compute(node: Node) -> None:
+        if node in computed or node not in needed:
+            return
+        for part in children(node):
+            compute(part)
+        width = reach(node)
+        computed[node] = evaluator_over(width, children(node)).value(node)
+
+    for root in roots:
+        compute(root)
+    return evaluator_over(min(bars, everything), roots)
+
+
+def scan(
+    script: Script,
+    panel: Panel,
+    parameters: Mapping[str, float] | None = None,
+    num_days: int | None = None,
+) -> pd.DataFrame:
+    """One row per symbol and date passing a filter on the last `num_days` bars, sorted.
+
+    `parameters` overrides the script's defaults and `num_days` its
+    `NumDays` setting. Columns are Symbol, Date (unless `ScanNoDefCols`),
+    the scan's columns, and FilterNum when there are several filters.
+    """
+    section = script.section("Scan")
+    if section is None:
+        raise FormulaError("Script has no Scan: section")
+    settings = scan_settings(script)
+    if num_days is None:
+        num_days = int(float(settings.get("numdays", "1")))
+    filters = [
+        (int(match.group(1) or 1), declaration.text)
+        for declaration in section.declarations
+        if (match := FILTER_PATTERN.match(declaration.name))
+    ]
+    if not filters:
+        raise FormulaError("Scan: section has no Filter")
+    columns = {
+        declaration.name: declaration.text
+        for declaration in section.declarations
+        if not FILTER_PATTERN.match(declaration.name) and declaration.name.lower() != "sort"
+    }
+    visible = (*DEFAULT_COLUMNS, *columns, *(("FilterNum",) if len(filters) > 1 else ()))
+    by_name = {name.lower(): name for name in visible}
+    sort = [sort_item(item) for item in split_list(section.get("Sort") or "") if item.strip()]
+    sort_formulas = {f"_sort{number}": item for number, (item, _) in enumerate(sort) if item.lower() not in by_name}
+    sort_keys = [by_name.get(item.lower(), f"_sort{number}") for number, (item, _) in enumerate(sort)]
+
+    values = default_parameters(script, parameters)
+    formulas = script.formulas(("Data", "Library"))
+    trees: dict[int, tuple[Node, dict[str, Node]]] = {}
+    for number, text in filters:
+        expander = Evaluator(panel, formulas, {**values, "FilterNum": number})
+        nodes = {name: expander.expand(item) for name, item in {**columns, **sort_formulas}.items()}
+        trees[number] = (expander.expand(text), nodes)
+
+    history = panel.tail(None, end_date(settings.get("enddate")))
+    roots = [node for condition, nodes in trees.values() for node in (condition, *nodes.values())]
+    evaluator = trailing_evaluator(history, [node for node in roots if not isinstance(node, Text)], num_days)
+    window = evaluator.panel
+    symbols = np.asarray(window.symbols, dtype=object)
+    frames = []
+    for number, (condition, nodes) in trees.items():
+        passed = evaluator.series(condition)
+        rows, bars = np.nonzero(~np.isnan(passed) & (passed != 0))
+        frame = {"Symbol": symbols[rows], "Date": window.dates[bars]}
+        for name, node in nodes.items():
+            if isinstance(node, Text):
+                frame[name] = text_column(name, node, window)[rows]
+            else:
+                frame[name] = evaluator.series(node)[rows, bars]
+        if len(filters) > 1:
+            frame["FilterNum"] = number
+        frames.append(pd.DataFrame(frame))
+
+    result = pd.concat(frames, ignore_index=True)
+    if sort_keys:
+        ascending = [not descending for _, descending in sort]
+        result = result.sort_values(sort_keys, ascending=ascending, kind="stable", ignore_index=True)
+    result = result.drop(columns=list(sort_formulas))
+    if settings.get("scannodefcols", "").strip().lower() == "true":
+        result = result.drop(columns=[name for name in DEFAULT_COLUMNS if name not in columns])
+    return result
+
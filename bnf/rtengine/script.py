@@ -0,0 +1,143 @@
+"""Split a RealTest script into sections and `Name: value` declarations.
+
+Section headers start in column 0 (`Data:`, `Strategy: mr_long`) and
+declarations are indented beneath them, one per line; the first may also
+follow the header on its line (`Data:<tab>ATR5:<tab>ATR(5)`). An indented
+line without a `Name:` prefix continues the previous declaration. Comments
+(`// ...`, `/* ... */` and `{...}` outside format specs) are removed, and
+`Notes:` text is skipped. Values are kept as text: formulas are parsed on
+demand with `parse_formula`, which is far cheaper than running the
+whole-script grammar over every file.
+
+`Include:` sections are expanded in place when a script is loaded from a
+file, resolving `?scriptpath?` to the including script's directory.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .formula import FormulaError
+
+HEADER_PATTERN = re.compile(r"^([A-Za-z][A-Za-z0-9]*):(.*)$")
+INLINE_DECLARATION_PATTERN = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_.]*)\s*:(?=\s|$)(.*)$")
+DECLARATION_PATTERN = re.compile(r"^\s+([A-Za-z_][A-Za-z0-9_.]*)\s*:(.*)$")
+BLOCK_COMMENT_PATTERN = re.compile(r"/\*.*?\*/", re.DOTALL)
+INLINE_COMMENT_PATTERN = re.compile(r"\{(?!%)[^}]*\}")
+FORMAT_SPEC_PATTERN = re.compile(r"\{%[^}]*\}")
+LINE_COMMENT_PATTERN = re.compile(r'//(?=(?:[^"]*"[^"]*")*[^"]*$).*')
+SCRIPT_PATH_PATTERN = re.compile(r"\?scriptpath\?[\\/]?", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Declaration:
+    name: str
+    text: str
+    line: int
+    format: str | None = None
+
+
+@dataclass
+class Section:
+    kind: str
+    label: str
+    line: int
+    declarations: list[Declaration] = field(default_factory=list)
+    source: Path | None = None
+
+    def get(self, name: str, default: str | None = None) -> str | None:
+        """The last value declared under `name` (names are case-insensitive)."""
+        key = name.lower()
+        for declaration in reversed(self.declarations):
+            if declaration.name.lower() == key:
+                return declaration.text
+        return default
+
+    def values(self) -> dict[str, str]:
+        return {declaration.name: declaration.text for declaration in self.declarations}
+
+
+@dataclass
+class Script:
+    sections: list[Section]
+    path: Path | None = None
+
+    def sections_of(self, kind: str) -> list[Section]:
+        return [section for section in self.sections if section.kind.lower() == kind.lower()]
+
+    def section(self, kind: str, label: str | None = None) -> Section | None:
+        for section in self.sections_of(kind):
+            if label is None or section.label.lower() == label.lower():
+                return section
+        return None
+
+    def formulas(self, kinds: tuple[str, ...] = ("Data",)) -> dict[str, str]:
+        """Formula text by name across the given section kinds, later ones winning."""
+        formulas: dict[str, str] = {}
+        for section in self.sections:
+            if section.kind in kinds:
+                formulas.update(section.values())
+        return formulas
+
+
+def strip_comments(line: str) -> tuple[str, str | None]:
+    """Line text without comments, and the first `{%...}` format spec if any."""
+    line = INLINE_COMMENT_PATTERN.sub("", line)
+    line = LINE_COMMENT_PATTERN.sub("", line)
+    spec = FORMAT_SPEC_PATTERN.search(line)
+    if spec is not None:
+        line = FORMAT_SPEC_PATTERN.sub("", line)
+    return line.rstrip(), spec.group(0) if spec else None
+
+
+def parse_script(text: str, source: Path | None = None) -> Script:
+    text = BLOCK_COMMENT_PATTERN.sub(lambda match: "\n" * match.group(0).count("\n"), text)
+    sections: list[Section] = []
+    current: Section | None = None
+    for number, raw in enumerate(text.splitlines(), start=1):
+        header = HEADER_PATTERN.match(raw)
+        if header is not None:
+            label, spec = strip_comments(header.group(2))
+            current = Section(header.group(1), label.strip(), number, source=source)
+            sections.append(current)
+            inline = INLINE_DECLARATION_PATTERN.match(label)
+            if inline is not None and current.kind not in ("Notes", "Include"):
+                current.label = ""
+                current.declarations.append(Declaration(inline.group(1), inline.group(2).strip(), number, spec))
+            continue
+        if current is None or current.kind == "Notes":
+            continue
+        line, spec = strip_comments(raw)
+        if not line.strip():
+            continue
+        declaration = DECLARATION_PATTERN.match(line)
+        if declaration is not None:
+            current.declarations.append(
+                Declaration(declaration.group(1), declaration.group(2).strip(), number, spec)
+            )
+        elif current.declarations:
+            previous = current.declarations[-1]
+            joined = f"{previous.text} {line.strip()}".strip()
+            current.declarations[-1] = Declaration(previous.name, joined, previous.line, previous.format or spec)
+        else:
+            raise FormulaError(f"Line {number}: value without a name in {current.kind}: {line.strip()!r}")
+    return Script(sections, source)
+
+
+def load_script(path: Path | str, _seen: frozenset[Path] = frozenset()) -> Script:
+    """Parse a script file with its `Include:` files expanded in place."""
+    path = Path(path).resolve()
+    if path in _seen:
+        raise FormulaError(f"Include cycle through {path}")
+    script = parse_script(path.read_text(encoding="utf-8", errors="replace"), path)
+    sections: list[Section] = []
+    for section in script.sections:
+        if section.kind != "Include" or not section.label:
+            sections.append(section)
+            continue
+        target = Path(SCRIPT_PATH_PATTERN.sub("", section.label).replace("\\", "/"))
+        included = load_script(target if target.is_absolute() else path.parent / target, _seen | {path})
+        sections.extend(included.sections)
+    return Script(sections, path)
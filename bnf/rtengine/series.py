@@ -0,0 +1,115 @@
+"""Array primitives over (symbols, dates) float64 panels.
+
+Time runs along the last axis. Every window function is NaN until its first
+full window, and a window that contains a NaN is NaN, as RealTest propagates
+NaN through formulas.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def shift(values: np.ndarray, bars: int) -> np.ndarray:
+    """`values[bars]` in RealTest terms: the value `bars` bars ago (negative looks ahead)."""
+    result = np.full(values.shape, np.nan)
+    if bars == 0:
+        result[...] = values
+    elif bars > 0:
+        result[..., bars:] = values[..., :-bars]
+    else:
+        result[..., :bars] = values[..., -bars:]
+    return result
+
+
+def window_length(count: float) -> int:
+    length = int(round(count))
+    if length < 1:
+        raise ValueError(f"Window length must be at least 1 bar, got {count:g}")
+    return length
+
+
+def rolling_sum(values: np.ndarray, length: int) -> np.ndarray:
+    """Sum of each trailing `length` bars, via differences of a running total."""
+    missing = np.isnan(values)
+    gaps = missing.any()
+    totals = np.cumsum(np.where(missing, 0.0, values) if gaps else values, axis=-1)
+    sums = totals.copy()
+    sums[..., length:] -= totals[..., :-length]
+    if gaps:
+        counts = np.cumsum(missing, axis=-1)
+        counts[..., length:] -= counts[..., :-length].copy()
+        sums[counts > 0] = np.nan
+    sums[..., : length - 1] = np.nan
+    return sums
+
+
+def rolling_mean(values: np.ndarray, length: int) -> np.ndarray:
+    return rolling_sum(values, length) / length
+
+
+def rolling_extreme(values: np.ndarray, length: int, ufunc: np.ufunc) -> np.ndarray:
+    """Trailing-window max or min (`np.maximum` / `np.minimum`) in O(dates).
+
+    Van Herk/Gil-Werman: cut time into blocks of `length`, take running
+    extremes forwards and backwards within each block, and combine the
+    backward value at the window start with the forward value at its end.
+    """
+    count = values.shape[-1]
+    if length == 1:
+        return values.astype(np.float64, copy=True)
+    blocks = -(-count // length)
+    padded = np.full(values.shape[:-1] + (blocks * length,), np.nan)
+    padded[..., :count] = values
+    shaped = padded.reshape(values.shape[:-1] + (blocks, length))
+    forward = ufunc.accumulate(shaped, axis=-1).reshape(padded.shape)
+    backward = ufunc.accumulate(shaped[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+
+    result = np.full(values.shape, np.nan)
+    if count >= length:
+        result[..., length - 1 :] = ufunc(backward[..., : count - length + 1], forward[..., length - 1 : count])
+    return result
+
+
+def ema(values: np.ndarray, count: float) -> np.ndarray:
+    """RealTest EMA: seeded with MA(values, count), then smoothed by 2 / (count + 1).
+
+    The recursion runs along dates with every symbol updated at once, over a
+    dates-major copy so each step reads contiguous memory. A symbol is seeded
+    at its own first full window; a NaN bar after that is NaN in the result
+    but leaves the average where it was.
+    """
+    factor = 2.0 / (count + 1.0)
+    seed = rolling_mean(values, window_length(count))
+    seeded = ~np.isnan(seed)
+    first = np.where(seeded.any(axis=-1), seeded.argmax(axis=-1), -1).reshape(-1)
+
+    flat = values.reshape(-1, values.shape[-1])
+    missing = np.isnan(flat).T
+    steps = np.where(missing, 0.0, flat.T)
+    weights = np.where(missing, 0.0, factor)
+    seed_rows = seed.reshape(-1, values.shape[-1])
+    starts = {bar: np.flatnonzero(first == bar) for bar in np.unique(first[first >= 0])}
+
+    result = np.empty(steps.shape)
+    state = np.full(steps.shape[1], np.nan)
+    change = np.empty_like(state)
+    for bar in range(steps.shape[0]):
+        np.subtract(steps[bar], state, out=change)
+        change *= weights[bar]
+        state += change
+        if bar in starts:
+            rows = starts[bar]
+            state[rows] = seed_rows[rows, bar]
+        result[bar] = state
+    result[missing] = np.nan
+    return result.T.reshape(values.shape).copy()
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """High/low range widened to the previous close; the first bar uses its own range."""
+    previous = shift(close, 1)
+    missing = np.isnan(previous)
+    upper = np.where(missing, high, np.maximum(high, previous))
+    lower = np.where(missing, low, np.minimum(low, previous))
+    return upper - lower
@@ -0,0 +1,205 @@
+"""On-disk price stores: one file per symbol for imports, one array per field for tests.
+
+`SymbolStore` is what imports write into:
+
+    <directory>/manifest.json        sources imported, with their size, mtime and hash
+    <directory>/symbols/<SYMBOL>.npz  `date` (datetime64[D]) plus one float64 array per field
+
+Symbols are stored separately so an import can replace any of them, in any
+order and from several processes at once, without rewriting the others;
+only the manifest is shared, and only the importing process writes it.
+Symbol names are percent-encoded in file names (`&ES`, `BRK/B`).
+
+`PanelStore` is what backtests and scans read: the symbols aligned on one
+trading calendar, in the `Panel.to_npy_dir` layout,
+
+    <directory>/symbols.npy  dates.npy  field.<name>.npy  group.<name>.npy
+
+where each field is a (symbols, dates) float64 or float32 array. Opening
+one reads nothing; the calendar and the symbol list are loaded when first
+needed, and fields are memory-mapped as they are used, so a universe far
+larger than memory is paged in only where a panel's window reaches. Date
+ranges and runs of symbols are views of the mapped files.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from functools import cached_property
+from pathlib import Path
+from typing import Iterable, Mapping
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from .panel import FIELD_ALIASES, Panel
+
+MANIFEST = "manifest.json"
+
+
+class SymbolStore:
+    def __init__(self, directory: Path | str) -> None:
+        self.directory = Path(directory)
+
+    def path(self, symbol: str) -> Path:
+        return self.directory / "symbols" / f"{quote(symbol, safe='')}.npz"
+
+    def symbols(self) -> list[str]:
+        return sorted(unquote(path.name[: -len(".npz")]) for path in (self.directory / "symbols").glob("*.npz"))
+
+    def read(self, symbol: str) -> dict[str, np.ndarray]:
+        with np.load(self.path(symbol)) as columns:
+            return {name: columns[name] for name in columns.files}
+
+    def write(self, symbol: str, columns: Mapping[str, np.ndarray]) -> None:
+        """Replace a symbol's columns; the file is swapped in whole, so readers never see half of it."""
+        path = self.path(symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.{os.getpid()}.partial")
+        with open(partial, "wb") as handle:
+            np.savez(handle, **columns)
+        os.replace(partial, path)
+
+    def load_manifest(self) -> dict:
+        path = self.directory / MANIFEST
+        return json.loads(path.read_text()) if path.exists() else {"sources": {}}
+
+    def save_manifest(self, manifest: Mapping) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        partial = self.directory / f"{MANIFEST}.partial"
+        partial.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+        os.replace(partial, self.directory / MANIFEST)
+
+    def to_panel(self, symbols: Iterable[str] | None = None) -> Panel:
+        """The stored symbols (all by default) aligned into a `Panel` on the union of their dates."""
+        frames: dict[str, dict[str, pd.Series]] = {}
+        for symbol in symbols if symbols is not None else self.symbols():
+            columns = self.read(symbol)
+            dates = pd.DatetimeIndex(columns.pop("date"))
+            for name, values in columns.items():
+                frames.setdefault(name, {})[symbol] = pd.Series(values, index=dates)
+        return Panel.from_frames({name: pd.DataFrame(series) for name, series in frames.items()})
+
+
+class PanelStore:
+    def __init__(self, directory: Path | str) -> None:
+        self.directory = Path(directory)
+        self._arrays: dict[str, np.ndarray] = {}
+
+    @cached_property
+    def symbols(self) -> tuple[str, ...]:
+        return tuple(np.load(self.directory / "symbols.npy").tolist())
+
+    @cached_property
+    def dates(self) -> np.ndarray:
+        return np.load(self.directory / "dates.npy")
+
+    @cached_property
+    def rows(self) -> dict[str, int]:
+        return {symbol: row for row, symbol in enumerate(self.symbols)}
+
+    @property
+    def fields(self) -> list[str]:
+        return sorted(path.name[len("field.") : -len(".npy")] for path in self.directory.glob("field.*.npy"))
+
+    def field(self, name: str) -> np.ndarray:
+        """A whole field, memory-mapped read-only on first use; `C`, `Vol` and other abbreviations work."""
+        key = FIELD_ALIASES.get(name.lower(), name.lower())
+        if key not in self._arrays:
+            path = self.directory / f"field.{key}.npy"
+            if not path.exists():
+                raise KeyError(f"No field {name} in {self.directory}")
+            self._arrays[key] = np.load(path, mmap_mode="r")
+        return self._arrays[key]
+
+    def date_range(self, start: np.datetime64 | str | None = None, end: np.datetime64 | str | None = None) -> slice:
+        """Calendar positions from `start` to `end`, both inclusive."""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, "D")))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, "D"), "right"))
+        return slice(lo, hi)
+
+    def symbol_rows(self, symbols: Iterable[str] | None = None) -> "slice | np.ndarray":
+        """Rows of `symbols`: a slice when they are evenly spaced in store order, else an index array."""
+        if symbols is None:
+            return slice(None)
+        try:
+            rows = np.array([self.rows[symbol] for symbol in symbols], dtype=np.intp)
+        except KeyError as error:
+            raise KeyError(f"Symbol {error.args[0]} is not in {self.directory}") from None
+        steps = np.unique(np.diff(rows))
+        if len(rows) == 1 or (len(steps) == 1 and steps[0] > 0):
+            step = int(steps[0]) if len(rows) > 1 else 1
+            return slice(int(rows[0]), int(rows[-1]) + 1, step)
+        return rows
+
+    def panel(
+        self,
+        start: np.datetime64 | str | None = None,
+        end: np.datetime64 | str | None = None,
+        symbols: Iterable[str] | None = None,
+        fields: Iterable[str] | None = None,
+    ) -> Panel:
+        """A panel over part of the store: views of the mapped fields, unless `symbols` must be gathered."""
+        dates = self.date_range(start, end)
+        rows = self.symbol_rows(symbols)
+        names = [FIELD_ALIASES.get(name.lower(), name.lower()) for name in fields] if fields else self.fields
+        groups = {
+            path.name[len("group.") : -len(".npy")]: np.load(path)[rows]
+            for path in self.directory.glob("group.*.npy")
+        }
+        return Panel(
+            tuple(np.asarray(self.symbols, dtype=object)[rows].tolist()),
+            self.dates[dates],
+            {name: self.field(name)[rows, dates] for name in names},
+            groups,
+        )
+
+    @classmethod
+    def build(
+        cls,
+        directory: Path | str,
+        source: "SymbolStore | Panel",
+        dtype: "np.dtype | type" = np.float64,
+    ) -> "PanelStore":
+        """Write a store from an import's symbols, aligned on the union of their dates, or from a panel.
+
+        Symbols are copied in one at a time, so building needs memory for one
+        symbol, not for the panel. `np.float32` halves the size of the files.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for stale in directory.glob("*.npy"):
+            stale.unlink()
+        if isinstance(source, Panel):
+            source.to_npy_dir(directory, dtype)
+            return cls(directory)
+
+        symbols = source.symbols()
+        calendar: list[np.ndarray] = []
+        names: set[str] = set()
+        for symbol in symbols:
+            with np.load(source.path(symbol)) as columns:
+                calendar.append(columns["date"])
+                names.update(name for name in columns.files if name != "date")
+        dates = np.unique(np.concatenate(calendar)) if calendar else np.zeros(0, dtype="datetime64[D]")
+        np.save(directory / "symbols.npy", np.asarray(symbols, dtype=str))
+        np.save(directory / "dates.npy", dates.astype("datetime64[D]"))
+        arrays = {
+            name: np.lib.format.open_memmap(
+                directory / f"field.{name}.npy", mode="w+", dtype=dtype, shape=(len(symbols), len(dates))
+            )
+            for name in sorted(names)
+        }
+        for array in arrays.values():
+            array[:] = np.nan
+        for row, symbol in enumerate(symbols):
+            with np.load(source.path(symbol)) as columns:
+                positions = np.searchsorted(dates, columns["date"])
+                for name in columns.files:
+                    if name != "date":
+                        arrays[name][row, positions] = columns[name]
+        for array in arrays.values():
+            array.flush()
+        return cls(directory)
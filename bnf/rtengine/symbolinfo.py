@@ -0,0 +1,240 @@
+"""Per-symbol information (`InfoGICS`, `PointValue`, `?Sector`, `ListNum`) as arrays by symbol id.
+
+A symbol's id is its position in `SymbolInfo.symbols`. Numeric items are
+float64 arrays under their formula names, NaN where unknown, and text items
+object arrays keyed by their `?` name without the `?` (`sector` for
+`?Sector`), "" where unknown. Dates (`InfoExpiry`) are YYYYMMDD numbers, as
+in RealTest formulas. Looking up many symbols is one `searchsorted` over
+the sorted names, and attaching the table to a panel (`Panel.with_info`)
+aligns every item to the panel's symbol order once, so formulas read them
+as a column broadcast over the dates.
+
+Tables load from a RealTest SymInfoFile CSV (a Symbol column and any of
+the columns in `NUMERIC_COLUMNS` and `TEXT_COLUMNS`) or from watchlist
+definitions, which give `ListNum` and `InList(n)`, and `merge` combines
+them with later values winning, like several SymInfoFile statements.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+# SymInfoFile column -> formula name.
+NUMERIC_COLUMNS = {
+    "trbc": "infotrbc",
+    "gics": "infogics",
+    "shares": "infoshares",
+    "float": "infofloat",
+    "margin": "infomargin",
+    "pointvalue": "pointvalue",
+    "ticksize": "ticksize",
+    "assetid": "infoid",
+    "delistdate": "infoexpiry",
+    "expiry": "infoexpiry",
+    "listnum": "listnum",
+}
+DATE_COLUMNS = ("delistdate", "expiry")
+# SymInfoFile column -> `?` name.
+TEXT_COLUMNS = {
+    "name": "name",
+    "type": "type",
+    "equitytype": "equitytype",
+    "listingtype": "listingtype",
+    "exchange": "exchange",
+    "currency": "currency",
+    "reportingcurrency": "reportingcurrency",
+    "domicile": "domicile",
+    "econsect": "econsect",
+    "sector": "sector",
+    "indgroup": "indgroup",
+    "industry": "industry",
+    "induindex": "cii",
+    "cii": "cii",
+}
+ALIASES = {"infodelist": "infoexpiry"}
+# What a symbol without information trades as: a stock.
+DEFAULTS = {"pointvalue": 1.0, "ticksize": 0.01}
+CLASSIFICATIONS = ("trbc", "gics")
+# `#By...` group -> digits of the classification code and the name that also identifies it.
+LEVELS = {"econ": (2, "econsect"), "sector": (4, "sector"), "group": (6, "indgroup"), "industry": (8, "industry")}
+OTHER_GROUPS = {"cii": "cii", "market": "exchange"}
+
+
+def top_digits(values: np.ndarray, digits: int) -> np.ndarray:
+    """The leading `digits` digits of each value, as `Top(value, digits)`; NaN stays NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        length = np.floor(np.log10(np.abs(values))) + 1
+        return np.trunc(values / 10.0 ** np.maximum(length - digits, 0))
+
+
+def factorize(values: np.ndarray) -> np.ndarray:
+    """Integer codes of text values by first appearance, -1 for ""."""
+    codes, _ = pd.factorize(pd.Series(values, dtype=object).replace("", None))
+    return codes.astype(np.int64)
+
+
+@dataclass
+class SymbolInfo:
+    symbols: tuple[str, ...]
+    numbers: dict[str, np.ndarray] = field(default_factory=dict)
+    texts: dict[str, np.ndarray] = field(default_factory=dict)
+    lists: tuple[str, ...] = ()
+    membership: np.ndarray | None = None  # (symbols, lists) bool, for InList(n)
+
+    def __post_init__(self) -> None:
+        self.symbols = tuple(self.symbols)
+        count = len(self.symbols)
+        if len(set(self.symbols)) != count:
+            raise ValueError("Symbol information lists a symbol twice")
+        for name, values in {**self.numbers, **self.texts}.items():
+            if np.shape(values) != (count,):
+                raise ValueError(f"Symbol information {name} has shape {np.shape(values)}, expected ({count},)")
+        if self.membership is None:
+            self.membership = np.zeros((count, len(self.lists)), dtype=bool)
+        if self.membership.shape != (count, len(self.lists)):
+            expected = (count, len(self.lists))
+            raise ValueError(f"List membership has shape {self.membership.shape}, expected {expected}")
+
+    @cached_property
+    def _sorted(self) -> tuple[np.ndarray, np.ndarray]:
+        names = np.asarray(self.symbols, dtype=str)
+        order = np.argsort(names, kind="stable")
+        return names[order], order
+
+    def ids(self, symbols: Iterable[str]) -> np.ndarray:
+        """Ids of `symbols`, -1 for symbols the table does not have."""
+        names, order = self._sorted
+        wanted = np.asarray(list(symbols), dtype=str)
+        if not len(names):
+            return np.full(len(wanted), -1, dtype=np.intp)
+        positions = np.minimum(np.searchsorted(names, wanted), len(names) - 1)
+        return np.where(names[positions] == wanted, order[positions], -1)
+
+    def number(self, name: str, ids: np.ndarray | None = None) -> np.ndarray | None:
+        """A numeric item by formula name (`InfoGICS`, `PointValue`) for `ids` (all by default), or None."""
+        key = ALIASES.get(name.lower(), name.lower())
+        if key not in self.numbers and key not in DEFAULTS:
+            return None
+        values = self.numbers.get(key)
+        if values is None:
+            values = np.full(len(self.symbols), np.nan)
+        values = np.where(np.isnan(values), DEFAULTS.get(key, np.nan), values)
+        return values if ids is None else np.where(ids >= 0, values[ids], DEFAULTS.get(key, np.nan))
+
+    def text(self, name: str, ids: np.ndarray | None = None) -> np.ndarray | None:
+        """A text item by `?` name (`?Sector` or `sector`) for `ids` (all by default), or None."""
+        values = self.texts.get(name.lstrip("?").lower())
+        if values is None:
+            return None
+        return values if ids is None else np.where(ids >= 0, values[ids], "")
+
+    def reindex(self, symbols: Iterable[str]) -> "SymbolInfo":
+        """The table in the order of `symbols`, with nothing known about the ones it lacks."""
+        symbols = tuple(symbols)
+        ids = self.ids(symbols)
+        known = ids >= 0
+        if not len(self.symbols):
+            return SymbolInfo(symbols, lists=self.lists)
+        return SymbolInfo(
+            symbols,
+            {name: np.where(known, values[ids], np.nan) for name, values in self.numbers.items()},
+            {name: np.where(known, values[ids], "").astype(object) for name, values in self.texts.items()},
+            self.lists,
+            self.membership[ids] & known[:, None],
+        )
+
+    def merge(self, other: "SymbolInfo") -> "SymbolInfo":
+        """Both tables over the union of their symbols, `other`'s known values winning."""
+        known = set(self.symbols)
+        symbols = self.symbols + tuple(symbol for symbol in other.symbols if symbol not in known)
+        left, right = self.reindex(symbols), other.reindex(symbols)
+        numbers = {**left.numbers}
+        for name, values in right.numbers.items():
+            numbers[name] = np.where(np.isnan(values), numbers.get(name, np.nan), values)
+        texts = {**left.texts}
+        for name, values in right.texts.items():
+            texts[name] = np.where(values == "", texts.get(name, ""), values).astype(object)
+        lists = left.lists + tuple(name for name in right.lists if name not in left.lists)
+        membership = np.zeros((len(symbols), len(lists)), dtype=bool)
+        membership[:, : len(left.lists)] = left.membership
+        for column, name in enumerate(right.lists):
+            membership[:, lists.index(name)] |= right.membership[:, column]
+        return SymbolInfo(symbols, numbers, texts, lists, membership)
+
+    def group_codes(self, classification: str = "TRBC") -> dict[str, np.ndarray]:
+        """Integer codes per symbol for the `#By...` groups, -1 where unknown.
+
+        Classification levels come from the leading digits of the TRBC or GICS
+        code; where a symbol has no code, its level name (`?Sector`, ...)
+        decides, coded after every numeric code so the two cannot collide.
+        """
+        scheme = classification.lower()
+        if scheme not in CLASSIFICATIONS:
+            raise ValueError(f"Unknown classification {classification}; use TRBC or GICS")
+        code = self.numbers.get(f"info{scheme}", np.full(len(self.symbols), np.nan))
+        groups: dict[str, np.ndarray] = {}
+        for key, (digits, name) in LEVELS.items():
+            prefix = top_digits(code, digits)
+            named = factorize(self.texts.get(name, np.full(len(self.symbols), "", dtype=object)))
+            offset = 10**digits
+            by_name = np.where(named >= 0, offset + named, -1)
+            groups[key] = np.where(np.isnan(prefix), by_name, np.nan_to_num(prefix, nan=-1).astype(np.int64))
+        for key, name in OTHER_GROUPS.items():
+            if name in self.texts:
+                groups[key] = factorize(self.texts[name])
+        if "listnum" in self.numbers:
+            groups["listnum"] = np.nan_to_num(self.numbers["listnum"], nan=-1).astype(np.int64)
+        return groups
+
+    @classmethod
+    def from_csv(cls, path: Path | str) -> "SymbolInfo":
+        """A SymInfoFile: a Symbol column and any known numeric, date or text columns."""
+        frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+        columns = {name.strip().lower(): name for name in frame.columns}
+        if "symbol" not in columns:
+            raise ValueError(f"{path} has no Symbol column")
+        frame = frame.drop_duplicates(columns["symbol"], keep="last")
+        numbers: dict[str, np.ndarray] = {}
+        texts: dict[str, np.ndarray] = {}
+        for key, column in columns.items():
+            item = key[len("info") :] if key.startswith("info") and key[len("info") :] in NUMERIC_COLUMNS else key
+            values = frame[column].str.strip()
+            if item in DATE_COLUMNS:
+                dates = pd.to_datetime(values.replace("", None), format="mixed", errors="coerce")
+                numbers[NUMERIC_COLUMNS[item]] = (
+                    (dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day).to_numpy(dtype=np.float64)
+                )
+            elif item in NUMERIC_COLUMNS:
+                numbers[NUMERIC_COLUMNS[item]] = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+            elif item in TEXT_COLUMNS:
+                texts[TEXT_COLUMNS[item]] = values.to_numpy(dtype=object)
+        return cls(tuple(frame[columns["symbol"]].str.strip()), numbers, texts)
+
+    @classmethod
+    def from_watchlists(
+        cls, path: Path | str, members: Mapping[str, Iterable[str]] | None = None
+    ) -> "SymbolInfo":
+        """List numbers from a watchlists file (`{"watchlists": [{"name": ..., "symbols": [...]}]}`).
+
+        A list's symbols are its `symbols` entry, or `members[name]` for lists
+        defined only by name and size, as in `archive/watchlists.json`. A
+        symbol's `ListNum` is the first list holding it, counting from 1.
+        """
+        entries = json.loads(Path(path).read_text())["watchlists"]
+        lists = tuple(entry["name"] for entry in entries)
+        held = [list(entry.get("symbols") or (members or {}).get(entry["name"], ())) for entry in entries]
+        symbols = tuple(dict.fromkeys(symbol for group in held for symbol in group))
+        rows = {symbol: row for row, symbol in enumerate(symbols)}
+        membership = np.zeros((len(symbols), len(lists)), dtype=bool)
+        for column, group in enumerate(held):
+            membership[[rows[symbol] for symbol in group], column] = True
+        first = np.where(membership.any(axis=1), membership.argmax(axis=1) + 1.0, np.nan)
+        return cls(symbols, {"listnum": first}, {}, lists, membership)
@@ -0,0 +1,126 @@
+"""Backtest fills, slots and exits on panels small enough to trade by hand."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rtengine import Backtest, Panel, parse_script
+
+DATES = np.arange("2021-03-01", "2021-03-06", dtype="datetime64[D]")
+
+LIMITS = """
+Strategy: limits
+	Side: Long
+	EntrySetup: Signal
+	SetupScore: Score
+	EntryLimit: Limit
+	ExitRule: select(Drop, "drop", BarsHeld >= 2, "time")
+	ExitStop: FillPrice - 1
+	MaxPositions: 2
+	Quantity: 100
+	QtyType: Shares
+"""
+
+
+def trade_panel(bars: dict[str, dict[str, list[float]]]) -> Panel:
+    symbols = tuple(bars)
+    names = {name for fields in bars.values() for name in fields}
+    fields = {name: np.array([bars[symbol][name] for symbol in symbols], dtype=np.float64) for name in names}
+    return Panel(symbols, DATES[: fields["close"].shape[1]], fields)
+
+
+def trades(script: str, panel: Panel, name: str) -> list[tuple]:
+    result = Backtest(parse_script(script), panel).run(name).trades
+    dates = pd.DatetimeIndex(panel.dates)
+    return [
+        (row.Symbol, dates.get_loc(row.DateIn), row.PriceIn, dates.get_loc(row.DateOut), row.PriceOut, row.Reason)
+        for row in result.itertuples()
+    ]
+
+
+@pytest.fixture
+def limit_panel() -> Panel:
+    """Four setups on bar 0 for two slots, a gap fill on bar 2, a stop and a freed slot on bar 3."""
+    flat = {"open": [10] * 5, "high": [11] * 5, "close": [10] * 5, "drop": [0] * 5}
+    return trade_panel(
+        {
+            # Best score, but its limit of 9 is not reached on bar 1: the order still takes a slot.
+            "AAA": {**flat, "low": [9.5] * 5, "signal": [1, 1, 0, 0, 0], "score": [4, 1, 0, 0, 0], "limit": [9] * 5},
+            # Fills at its limit on bar 1; Drop (3 is true) and BarsHeld >= 2 hold at bar 3's close.
+            "BBB": {
+                **flat,
+                "low": [9.5, 8.9, 9.5, 9.5, 9.5],
+                "signal": [2, 0, 0, 0, 0],
+                "score": [3, 0, 0, 0, 0],
+                "limit": [9] * 5,
+                "drop": [0, 0, 0, 3, 0],
+            },
+            # Would fill on bar 1 but ranks third; on bar 2 it gaps below its limit and fills at the open,
+            # then its stop at 8.5 - 1 is hit on bar 3.
+            "CCC": {
+                **flat,
+                "open": [10, 10, 8.5, 8, 8],
+                "low": [9.5, 8.9, 8.4, 7, 7.8],
+                "close": [10, 10, 9, 8, 8],
+                "signal": [1, 1, 0, 0, 0],
+                "score": [2, 5, 0, 0, 0],
+                "limit": [9] * 5,
+            },
+            # Enters on bar 3 in the slot the stop freed, and is still open at the end.
+            "DDD": {
+                "open": [20] * 5,
+                "high": [21] * 5,
+                "low": [19.5] * 5,
+                "close": [20, 20, 20, 20, 21],
+                "signal": [1, 0, 1, 0, 0],
+                "score": [1, 0, 1, 0, 0],
+                "limit": [9, 9, 100, 100, 100],
+                "drop": [0] * 5,
+            },
+        }
+    )
+
+
+def test_limit_fills_slots_and_exit_order(limit_panel: Panel) -> None:
+    assert trades(LIMITS, limit_panel, "limits") == [
+        ("BBB", 1, 9.0, 4, 10.0, "drop"),
+        ("CCC", 2, 8.5, 3, 7.5, "stop"),
+        ("DDD", 3, 20.0, 4, 21.0, "end of test"),
+    ]
+
+
+def test_short_limit_fills_above_the_limit_plus_extra() -> None:
+    panel = trade_panel(
+        {
+            "AAA": {
+                "open": [10, 10, 10, 12, 10],
+                "high": [10.5, 10.9, 11.2, 12.5, 10.5],
+                "low": [9.5] * 5,
+                "close": [10] * 5,
+            }
+        }
+    )
+    script = """
+Strategy: short
+	Side: Short
+	EntrySetup: 1
+	EntryLimit: C + 1
+	LimitExtra: 0.1
+	ExitRule: BarsHeld
+	Quantity: 1
+"""
+    # The limit is 11: bar 1 trades short of it, bar 2 reaches 11.1 and fills at 11; bar 3 gaps above it.
+    assert trades(script, panel, "short") == [("AAA", 2, 11.0, 4, 10.0, "exit rule")]
+
+
+def test_any_nonzero_value_is_true() -> None:
+    # C > O on every bar, so Sum(C > O, 2) is 2 from bar 1 on and never exactly 1.
+    panel = trade_panel({"AAA": {"open": [10] * 5, "high": [12] * 5, "low": [9] * 5, "close": [11] * 5}})
+    script = """
+Strategy: sum
+	EntrySetup: Sum(C > O, 2)
+	ExitRule: BarsHeld
+	Quantity: 1
+"""
+    # BarsHeld is 0 at the entry bar's close and 1 at the next, so the exit is two bars after the entry.
+    assert trades(script, panel, "sum") == [("AAA", 2, 10.0, 4, 10.0, "exit rule")]
@@ -0,0 +1,90 @@
+"""Evaluator functions against hand-computed values, NaN logic and sub-expression sharing."""
+
+import numpy as np
+import pytest
+
+from rtengine import Evaluator, Panel, parse_formula
+from rtengine.cache import repeated_subexpressions
+
+NAN = np.nan
+
+
+@pytest.fixture
+def panel() -> Panel:
+    """One symbol, seven bars: true ranges 2, 2, 2, 4, 2, 4, 2."""
+    fields = {
+        "open": [10, 11, 12, 13, 14, 13, 12],
+        "high": [11, 12, 13, 16, 15, 14, 13],
+        "low": [9, 10, 11, 12, 13, 10, 11],
+        "close": [10, 11, 12, 13, 14, 13, 12],
+        "volume": [100] * 7,
+    }
+    dates = np.arange("2020-01-01", "2020-01-08", dtype="datetime64[D]")
+    return Panel(("AAA",), dates, {name: np.array([values], dtype=np.float64) for name, values in fields.items()})
+
+
+@pytest.mark.parametrize(
+    "formula, expected",
+    [
+        # Seeded with MA(C, 3) = 11, then smoothed by 2 / (3 + 1).
+        ("EMA(C, 3)", [NAN, NAN, 11, 12, 13, 13, 12.5]),
+        # Wilder's ATR(2) is EMA(TR, 3): seeded at 2, then 2 + (4 - 2) / 2 = 3, ...
+        ("ATR(2)", [NAN, NAN, 2, 3, 2.5, 3.25, 2.625]),
+        ("ROC(C, 2)", [NAN, NAN, 20, 100 * (13 / 11 - 1), 100 * (14 / 12 - 1), 0, 100 * (12 / 14 - 1)]),
+        ("Highest(H, 3)", [NAN, NAN, 13, 16, 16, 16, 15]),
+        ("Lowest(L, 3)", [NAN, NAN, 9, 10, 11, 10, 10]),
+    ],
+)
+def test_functions_match_hand_computed_values(panel: Panel, formula: str, expected: list[float]) -> None:
+    np.testing.assert_allclose(Evaluator(panel).evaluate(formula)[0], expected, rtol=1e-12)
+
+
+@pytest.mark.parametrize(
+    "formula, expected",
+    [
+        # C[1] is NaN on the first bar, which makes and/or NaN whatever the other side is.
+        ("C > 11 and C[1] > 10", [NAN, 0, 1, 1, 1, 1, 1]),
+        ("C < 11 and C[1] > 10", [NAN, 0, 0, 0, 0, 0, 0]),
+        ("C < 11 or C[1] > 10", [NAN, 0, 1, 1, 1, 1, 1]),
+        ("C > 11 or C[1] > 10", [NAN, 0, 1, 1, 1, 1, 1]),
+        # Any nonzero value is true.
+        ("(C - 10) and 2", [0, 1, 1, 1, 1, 1, 1]),
+        ("not (C - 10)", [1, 0, 0, 0, 0, 0, 0]),
+        ("not C[1]", [NAN, 0, 0, 0, 0, 0, 0]),
+    ],
+)
+def test_logic_propagates_nan(panel: Panel, formula: str, expected: list[float]) -> None:
+    np.testing.assert_array_equal(Evaluator(panel).evaluate(formula)[0], expected)
+
+
+def test_formulas_are_parsed_once() -> None:
+    parse_formula.cache_clear()
+    first = parse_formula("EMA(C, 3) > C[1]")
+    assert parse_formula("EMA(C, 3) > C[1]") is first
+    assert parse_formula.cache_info().hits == 1
+    # Names are case-insensitive, so differently written formulas give equal, equally hashed trees.
+    assert parse_formula("ema(c,3)") == first.left
+    assert hash(parse_formula("ema(c,3)")) == hash(first.left)
+
+
+def test_shared_subexpression_is_computed_once(panel: Panel) -> None:
+    formulas = {"EMA3": "EMA(C, 3)", "Fast": "EMA3 + 1", "Slow": "ema(c,3) * 2"}
+    evaluator = Evaluator(panel, formulas)
+    fast = evaluator.evaluate("Fast")
+    assert evaluator.cache.stats.hits == 0
+    slow = evaluator.evaluate("Slow")
+    stats = evaluator.cache.stats
+    assert (stats.hits, stats.misses, stats.entries) == (1, 3, 3)  # EMA(C, 3) comes from the cache
+    np.testing.assert_allclose(slow, 2 * (fast - 1))
+
+    repeats = repeated_subexpressions(evaluator.expand(name) for name in ("Fast", "Slow"))
+    assert repeats == {parse_formula("EMA(C, 3)"): 2}
+
+
+def test_parameters_share_the_subtrees_that_do_not_use_them(panel: Panel) -> None:
+    formulas = {"Signal": "EMA(C, 3) > Level"}
+    first = Evaluator(panel, formulas, {"Level": 11})
+    first.evaluate("Signal")
+    second = Evaluator(panel, formulas, {"Level": 12}, cache=first.cache)
+    np.testing.assert_array_equal(second.evaluate("Signal")[0], [NAN, NAN, 0, 0, 1, 1, 1])
+    assert second.cache.stats.hits == 1
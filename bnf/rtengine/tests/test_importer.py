@@ -0,0 +1,83 @@
+"""run_import over CSV sources written into a temporary folder."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rtengine import SymbolStore, parse_script, run_import
+
+ROWS = {
+    "AAA": [("2020-01-02", 10.0), ("2020-01-03", 11.0)],
+    "BBB": [("2020-01-02", 20.0)],
+}
+
+
+def import_script(tmp_path: Path, body: str) -> dict[str, str]:
+    """Run an import into `tmp_path / "store"`; the status of each source file by name."""
+    script = parse_script(f"Import:\n\tDataSource:\tCSV\n{body}\tSaveAs:\tstore.rtd\n", tmp_path / "import.rts")
+    report = run_import(script, workers=0)
+    return {Path(source).stem: status for source, status in zip(report["Source"], report["Status"])}
+
+
+def closes(store: Path) -> dict[str, list[tuple[str, float]]]:
+    symbols = SymbolStore(store)
+    return {
+        symbol: [(str(date), close) for date, close in zip(columns["date"], columns["close"])]
+        for symbol, columns in ((symbol, symbols.read(symbol)) for symbol in symbols.symbols())
+    }
+
+
+@pytest.mark.parametrize("header", [False, True])
+def test_per_symbol_files(tmp_path: Path, header: bool) -> None:
+    folder = tmp_path / "data"
+    folder.mkdir()
+    for symbol, rows in ROWS.items():
+        lines = ["Date,Open,High,Low,Close,Volume"] * header
+        lines += [f"{date},1,2,0.5,{close},100" for date, close in rows]
+        (folder / f"{symbol}.csv").write_text("\n".join(lines) + "\n")
+    import_script(tmp_path, "\tDataPath:\tdata\n")
+    assert closes(tmp_path / "store") == ROWS
+
+
+@pytest.mark.parametrize("header", [False, True])
+def test_multi_symbol_file(tmp_path: Path, header: bool) -> None:
+    lines = ["Symbol,Date,Open,High,Low,Close,Volume"] * header
+    lines += [f"{symbol},{date},1,2,0.5,{close},100" for symbol, rows in ROWS.items() for date, close in rows]
+    (tmp_path / "all.csv").write_text("\n".join(lines) + "\n")
+    import_script(tmp_path, "\tCSVFields:\tSymbol,Date,Open,High,Low,Close,Volume\n\tCSVFile:\tall.csv\n")
+    assert closes(tmp_path / "store") == ROWS
+    assert SymbolStore(tmp_path / "store").read("AAA")["date"].dtype == np.dtype("datetime64[D]")
+
+
+def test_unchanged_files_are_skipped(tmp_path: Path) -> None:
+    folder = tmp_path / "data"
+    folder.mkdir()
+    for symbol, rows in ROWS.items():
+        (folder / f"{symbol}.csv").write_text("".join(f"{date},1,2,0.5,{close},100\n" for date, close in rows))
+    aaa = folder / "AAA.csv"
+
+    def statuses(settings: str = "") -> dict[str, str]:
+        return import_script(tmp_path, f"\tDataPath:\tdata\n{settings}")
+
+    def touch(path: Path) -> None:
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert statuses() == {"AAA": "imported", "BBB": "imported"}
+    assert statuses() == {"AAA": "unchanged", "BBB": "unchanged"}
+
+    touch(aaa)  # same size, new mtime, same SHA-1
+    assert statuses() == {"AAA": "unchanged", "BBB": "unchanged"}
+
+    aaa.write_text(aaa.read_text().replace("11.0", "12.0"))  # same size, new content
+    touch(aaa)
+    assert statuses() == {"AAA": "imported", "BBB": "unchanged"}
+    assert closes(tmp_path / "store")["AAA"][-1] == ("2020-01-03", 12.0)
+
+    aaa.write_text(aaa.read_text() + "2020-01-06,1,2,0.5,13.0,100\n")  # new size
+    assert statuses() == {"AAA": "imported", "BBB": "unchanged"}
+
+    assert statuses("\tStartDate:\t2020-01-03\n") == {"AAA": "imported", "BBB": "imported"}
+    assert closes(tmp_path / "store") == {"AAA": [("2020-01-03", 12.0), ("2020-01-06", 13.0)], "BBB": []}
@@ -0,0 +1,77 @@
+"""`Parameters:` declarations in every form the grammar accepts, and the sample scripts' own."""
+
+import math
+from pathlib import Path
+
+import pytest
+
+from rtengine import FormulaError, Parameter, default_parameters, parameter_grid, parse_script
+
+SAMPLES = Path(__file__).resolve().parents[2] / "samples"
+
+DERIVED = """
+Parameters:
+	Fast:	from 5 to 10 step 5
+	Slow:	Fast * 4
+	Pct:	2.5 / 100
+"""
+
+
+def sample_declarations() -> list[tuple[str, str, str]]:
+    found = []
+    for path in sorted(SAMPLES.rglob("*.rts")):
+        script = parse_script(path.read_text(encoding="utf-8", errors="replace"), path)
+        for section in script.sections_of("Parameters"):
+            found.extend((path.name, declaration.name, declaration.text) for declaration in section.declarations)
+    return found
+
+
+@pytest.mark.parametrize(
+    "text, values, default",
+    [
+        ("from 5 to 20 step 5 def 10", (5, 10, 15, 20), 10),
+        ("FROM 1 TO 3", (1, 2, 3), 1),
+        ("from 1 to 1.3 step 0.1", (1, 1.1, 1.2, 1.3), 1),
+        ("from 20 to 5 step -5", (20, 15, 10, 5), 20),
+        ("from -1 to 1 step 0.5 def -0.5", (-1, -0.5, 0, 0.5, 1), -0.5),
+        ("20, 50, 100", (20, 50, 100), 20),
+        ("-6", (-6,), -6),
+        ("1e-3", (0.001,), 0.001),
+        ("2 * 10", (20,), 20),
+        ("Max(3, 7) - 1", (6,), 6),
+    ],
+)
+def test_declarations_parse(text: str, values: tuple[float, ...], default: float) -> None:
+    parameter = Parameter.parse("P", text)
+    assert parameter.values == pytest.approx(values)
+    assert parameter.default == pytest.approx(default)
+    assert parameter.formula is None
+
+
+@pytest.mark.parametrize("text", ["from 5 to 20 step 0", "from 5 to 20 step -5", "10, 20,", "2 *"])
+def test_bad_declarations_are_formula_errors(text: str) -> None:
+    with pytest.raises(FormulaError):
+        Parameter.parse("P", text)
+
+
+def test_expressions_of_other_parameters_follow_them() -> None:
+    script = parse_script(DERIVED)
+    assert default_parameters(script) == {"Fast": 5, "Slow": 20, "Pct": 0.025}
+    assert default_parameters(script, {"fast": 10}) == {"Fast": 10, "Slow": 40, "Pct": 0.025}
+    assert default_parameters(script, {"Slow": 30, "Other": 1}) == {"Fast": 5, "Slow": 30, "Pct": 0.025, "Other": 1}
+    assert [point["Slow"] for point in parameter_grid(script)] == [20, 40]
+    with pytest.raises(FormulaError, match="Slow"):
+        list(parameter_grid(script, ["Slow"]))
+
+
+def test_unknown_names_fail_when_worked_out() -> None:
+    script = parse_script("Parameters:\n\tLen:\tMissing + 1\n")
+    with pytest.raises(FormulaError, match="Len"):
+        default_parameters(script)
+
+
+@pytest.mark.parametrize("sample, name, text", sample_declarations())
+def test_sample_declarations_parse(sample: str, name: str, text: str) -> None:
+    parameter = Parameter.parse(name, text)
+    assert parameter.values
+    assert math.isfinite(parameter.default)
@@ -0,0 +1,59 @@
+"""scan over the trailing bars against the same formulas over the whole history."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rtengine import Evaluator, Panel, parse_script, scan
+
+SCRIPT = """
+Data:
+	Trend:	EMA(C, 10) > Avg(C, 50)
+	Stretch:	ROC(C, 5)
+Scan:
+	Filter:	Trend and C > C[1]
+	Fast:	EMA(C, 10)
+	Stretch:	Stretch
+	Range:	Highest(H, 20) - Lowest(L, 20)
+	ATR:	ATR(14)
+	Sort:	-Stretch, Symbol
+"""
+COLUMNS = {"Fast": "EMA(C, 10)", "Stretch": "Stretch", "Range": "Highest(H, 20) - Lowest(L, 20)", "ATR": "ATR(14)"}
+
+
+@pytest.fixture
+def panel() -> Panel:
+    rng = np.random.default_rng(3)
+    shape = (12, 400)
+    close = 50 * np.exp(np.cumsum(rng.normal(0.001, 0.02, shape), axis=1))
+    close[4, :150] = np.nan  # listed part-way through
+    fields = {
+        "open": close * (1 + rng.normal(0, 0.01, shape)),
+        "high": close * (1 + rng.uniform(0, 0.03, shape)),
+        "low": close * (1 - rng.uniform(0, 0.03, shape)),
+        "close": close,
+        "volume": rng.uniform(1e5, 1e6, shape),
+    }
+    dates = pd.bdate_range("2020-01-01", periods=shape[1]).to_numpy(dtype="datetime64[D]")
+    return Panel(tuple(f"S{number:02d}" for number in range(shape[0])), dates, fields)
+
+
+@pytest.mark.parametrize("days", [1, 5, 60])
+def test_trailing_scan_matches_full_history(panel: Panel, days: int) -> None:
+    script = parse_script(SCRIPT)
+    result = scan(script, panel, num_days=days)
+
+    full = Evaluator(panel, script.formulas())
+    passed = full.evaluate("Trend and C > C[1]")[:, -days:]
+    rows, bars = np.nonzero(~np.isnan(passed) & (passed != 0))
+    expected = pd.DataFrame({"Symbol": np.array(panel.symbols, dtype=object)[rows], "Date": panel.dates[-days:][bars]})
+    for name, formula in COLUMNS.items():
+        expected[name] = full.evaluate(formula)[:, -days:][rows, bars]
+    expected = expected.sort_values(["Stretch", "Symbol"], ascending=[False, True], ignore_index=True)
+
+    assert len(result) > days
+    pd.testing.assert_frame_equal(result[["Symbol", "Date"]], expected[["Symbol", "Date"]], check_dtype=False)
+    # Windows and shifts are exact; exponential averages are cut once the dropped bars weigh under 1e-9.
+    np.testing.assert_array_equal(result["Stretch"], expected["Stretch"])
+    np.testing.assert_array_equal(result["Range"], expected["Range"])
+    np.testing.assert_allclose(result[["Fast", "ATR"]], expected[["Fast", "ATR"]], rtol=1e-8)
@@ -0,0 +1,63 @@
+"""PanelStore: lazy opening, views of the mapped fields, and building from imported symbols."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rtengine import Panel, PanelStore, SymbolStore
+
+
+@pytest.fixture
+def panel() -> Panel:
+    shape = (6, 40)
+    close = np.arange(np.prod(shape), dtype=np.float64).reshape(shape)
+    dates = np.arange("2022-01-01", "2022-02-10", dtype="datetime64[D]")
+    return Panel(tuple(f"S{row}" for row in range(shape[0])), dates, {"close": close, "volume": close * 10})
+
+
+@pytest.fixture
+def store(tmp_path: Path, panel: Panel) -> PanelStore:
+    PanelStore.build(tmp_path / "panel", panel)
+    return PanelStore(tmp_path / "panel")
+
+
+def test_opening_reads_nothing(store: PanelStore) -> None:
+    assert not {"symbols", "dates", "rows"} & set(vars(store))
+    assert store.fields == ["close", "volume"]
+    assert not store._arrays
+    assert isinstance(store.field("C"), np.memmap)
+
+
+@pytest.mark.parametrize("symbols", [None, ["S1", "S2", "S3"], ["S0", "S2", "S4"], ["S5"]])
+def test_date_ranges_and_runs_of_symbols_are_views(store: PanelStore, panel: Panel, symbols: list[str] | None) -> None:
+    window = store.panel("2022-01-05", "2022-01-20", symbols)
+    rows = [panel.symbols.index(symbol) for symbol in symbols] if symbols else slice(None)
+    assert window.symbols == (panel.symbols if symbols is None else tuple(symbols))
+    np.testing.assert_array_equal(window.dates, panel.dates[4:20])
+    for name in ("close", "volume"):
+        np.testing.assert_array_equal(window.fields[name], panel.fields[name][rows, 4:20])
+        assert np.shares_memory(window.fields[name], store.field(name))
+
+
+def test_scattered_symbols_are_gathered(store: PanelStore, panel: Panel) -> None:
+    window = store.panel(symbols=["S3", "S0", "S4"], fields=["C"])
+    assert list(window.fields) == ["close"]
+    np.testing.assert_array_equal(window.fields["close"], panel.fields["close"][[3, 0, 4]])
+    assert not np.shares_memory(window.fields["close"], store.field("close"))
+    with pytest.raises(KeyError, match="S9"):
+        store.panel(symbols=["S9"])
+
+
+def test_build_from_imported_symbols(tmp_path: Path) -> None:
+    imported = SymbolStore(tmp_path / "import")
+    days = np.array(["2022-01-03", "2022-01-04", "2022-01-05"], dtype="datetime64[D]")
+    imported.write("AAA", {"date": days[:2], "close": np.array([1.0, 2.0])})
+    imported.write("BBB", {"date": days[1:], "close": np.array([3.0, 4.0]), "volume": np.array([5.0, 6.0])})
+    store = PanelStore.build(tmp_path / "panel", imported, np.float32)
+
+    assert store.symbols == ("AAA", "BBB")
+    np.testing.assert_array_equal(store.dates, days)
+    assert store.field("close").dtype == np.float32
+    np.testing.assert_array_equal(store.field("close"), [[1, 2, np.nan], [np.nan, 3, 4]])
+    np.testing.assert_array_equal(store.field("volume"), [[np.nan] * 3, [np.nan, 5, 6]])
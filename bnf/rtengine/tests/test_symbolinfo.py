@@ -0,0 +1,83 @@
+"""SymbolInfo lookups by id, merging tables, and the codes behind `#By...` groups."""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rtengine import Evaluator, Panel, SymbolInfo
+
+NAN = np.nan
+
+
+@pytest.fixture
+def info(tmp_path: Path) -> SymbolInfo:
+    path = tmp_path / "syminfo.csv"
+    path.write_text(
+        "Symbol,Name,TRBC,Sector,Exchange,PointValue,DelistDate\n"
+        "MSFT,Microsoft,57201010,Technology,NASDAQ,,\n"
+        "XOM,Exxon,50102010,Energy,NYSE,,\n"
+        "CVX,Chevron,50102020,Energy,NYSE,,2031-03-04\n"
+        "ES,E-mini,,Index,CME,50,\n"
+        "NEW,Newco,,,NYSE,,\n"
+    )
+    return SymbolInfo.from_csv(path)
+
+
+def test_ids_look_up_many_symbols(info: SymbolInfo) -> None:
+    np.testing.assert_array_equal(info.ids(["CVX", "nope", "MSFT", "CVX", "ES"]), [2, -1, 0, 2, 3])
+    assert len(info.ids([])) == 0
+    np.testing.assert_array_equal(SymbolInfo(()).ids(["MSFT"]), [-1])
+
+
+def test_items_by_id_with_defaults(info: SymbolInfo) -> None:
+    ids = info.ids(["ES", "XOM", "nope"])
+    np.testing.assert_array_equal(info.number("PointValue", ids), [50, 1, 1])  # a stock by default
+    np.testing.assert_array_equal(info.number("InfoTRBC", ids), [NAN, 50102010, NAN])
+    np.testing.assert_array_equal(info.number("InfoDelist"), [NAN, NAN, 20310304, NAN, NAN])
+    assert list(info.text("?Sector", ids)) == ["Index", "Energy", ""]
+    assert info.number("InfoFloat") is None
+    assert info.text("?Currency") is None
+
+
+def test_merge_keeps_known_values_and_unions_symbols(info: SymbolInfo) -> None:
+    other = SymbolInfo(
+        ("XOM", "ZZZ"),
+        {"pointvalue": np.array([NAN, 10.0]), "infotrbc": np.array([50102030.0, NAN])},
+        {"sector": np.array(["", "Other"], dtype=object), "cii": np.array(["Oil", ""], dtype=object)},
+        ("Favourites",),
+        np.array([[True], [True]]),
+    )
+    merged = info.merge(other)
+    assert merged.symbols == ("MSFT", "XOM", "CVX", "ES", "NEW", "ZZZ")
+    np.testing.assert_array_equal(merged.number("InfoTRBC"), [57201010, 50102030, 50102020, NAN, NAN, NAN])
+    np.testing.assert_array_equal(merged.number("PointValue"), [1, 1, 1, 50, 1, 10])
+    assert list(merged.text("sector")) == ["Technology", "Energy", "Energy", "Index", "", "Other"]
+    assert list(merged.text("cii")) == ["", "Oil", "", "", "", ""]
+    assert merged.lists == ("Favourites",)
+    np.testing.assert_array_equal(merged.membership[:, 0], [False, True, False, False, False, True])
+
+
+def test_group_codes_use_the_classification_then_names(info: SymbolInfo) -> None:
+    groups = info.group_codes("TRBC")
+    # ES has no TRBC code, so its ?Sector name decides, coded past every 4-digit prefix.
+    np.testing.assert_array_equal(groups["sector"], [5720, 5010, 5010, 10**4 + 2, -1])
+    # Nor does it have an ?EconSect or ?Industry name.
+    np.testing.assert_array_equal(groups["econ"], [57, 50, 50, -1, -1])
+    np.testing.assert_array_equal(groups["industry"], [57201010, 50102010, 50102020, -1, -1])
+    np.testing.assert_array_equal(groups["market"], [0, 1, 1, 2, 1])
+    with pytest.raises(ValueError, match="classification"):
+        info.group_codes("NAICS")
+
+
+def test_panel_formulas_read_info_by_panel_order(info: SymbolInfo) -> None:
+    dates = np.arange("2024-01-01", "2024-01-04", dtype="datetime64[D]")
+    close = np.array([[10.0, 11, 12], [20, 21, 22], [30, 31, 29], [5, 5, 5]])
+    panel = Panel(("CVX", "XOM", "MSFT", "QQQ"), dates, {"close": close}).with_info(info)
+    assert panel.info.symbols == panel.symbols
+    evaluator = Evaluator(panel)
+    np.testing.assert_array_equal(evaluator.evaluate("Top(InfoTRBC, 2)")[:, 0], [50, 50, 57, NAN])
+    np.testing.assert_array_equal(evaluator.evaluate("C * PointValue")[:, 0], [10, 20, 30, 5])
+    # CVX and XOM share an economic sector, where XOM's higher close ranks first; MSFT is alone in its
+    # sector, and QQQ alone among the symbols without one.
+    np.testing.assert_array_equal(evaluator.evaluate("#Rank #ByEcon C")[:, -1], [2, 1, 1, 1])
@@ -0,0 +1,223 @@
+"""Walk-forward tests driven by a script's `WalkForward:` section.
+
+The section's `Dates:` list starts with the first in-sample date, and each
+later date starts an out-of-sample period that runs to the next date (the
+last one to the end of the data). The in-sample period before it is
+`OptTestLength` `OptTimeUnit`s long (from `OptimizeSettings:`), or
+everything since the first date when those are not set. The section's
+other lists hold the value RealTest chose for each out-of-sample period;
+`replay=True` trades those instead of optimizing.
+
+A walk-forward run is many short backtests of few parameter combinations,
+so the work is split by combination, not by window: each task evaluates
+one combination's signals over the whole panel once and then replays the
+position loop over every window's in-sample and out-of-sample dates.
+Adjacent windows overlap almost entirely, and this way they share every
+indicator series instead of recomputing it (and need no warm-up bars).
+Combinations run concurrently on the optimizer's worker pool; the best
+in-sample score picks each window's out-of-sample run, and those runs are
+stitched into one equity curve, compounding from window to window.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from .backtest import BacktestResult, account_size, combine
+from .cache import DEFAULT_CACHE_BYTES
+from .formula import FormulaError
+from .optimize import map_workers, parameter_grid, worker_backtest
+from .panel import Panel
+from .parameters import default_parameters
+from .script import Script
+
+TIME_UNITS = {"days": "days", "weeks": "weeks", "months": "months", "years": "years"}
+LOWER_IS_BETTER = ("MaxDD",)
+SCORES = ("NetProfit", "Sharpe", "PctWins", "MaxDD", "Trades")
+
+
+@dataclass(frozen=True)
+class Window:
+    number: int
+    in_start: np.datetime64
+    out_start: np.datetime64  # also where the in-sample period ends
+    out_end: np.datetime64 | None  # None runs to the last bar
+    recorded: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class WalkForwardResult:
+    windows: pd.DataFrame
+    equity: pd.Series
+    trades: pd.DataFrame
+    signal_seconds: float
+
+
+def parse_dates(text: str) -> list[np.datetime64]:
+    items = [item.strip() for item in text.split(",") if item.strip()]
+    try:
+        return list(pd.to_datetime(items, format="mixed").to_numpy(dtype="datetime64[D]"))
+    except ValueError as error:
+        raise FormulaError(f"WalkForward Dates: {error}") from None
+
+
+def walkforward_windows(script: Script, first_date: np.datetime64) -> list[Window]:
+    """Windows of the script's last `WalkForward:` section (RealTest also uses only the last)."""
+    sections = script.sections_of("WalkForward")
+    if not sections:
+        raise FormulaError("Script has no WalkForward: section")
+    section = sections[-1]
+    dates_text = section.get("Dates")
+    if dates_text is None:
+        raise FormulaError("WalkForward: section has no Dates list")
+    dates = parse_dates(dates_text)
+    recorded = {
+        declaration.name: [float(item) for item in declaration.text.split(",") if item.strip()]
+        for declaration in section.declarations
+        if declaration.name.lower() != "dates"
+    }
+
+    settings = script.section("OptimizeSettings")
+    length = settings.get("OptTestLength") if settings is not None else None
+    unit = (settings.get("OptTimeUnit", "Months") if settings is not None else "Months").strip().lower()
+    if unit not in TIME_UNITS:
+        raise FormulaError(f"Unsupported OptTimeUnit: {unit}")
+    offset = pd.DateOffset(**{TIME_UNITS[unit]: int(float(length))}) if length else None
+
+    windows = []
+    for number in range(1, len(dates)):
+        out_start = dates[number]
+        if offset is None:
+            in_start = np.datetime64(first_date, "D")
+        else:
+            in_start = max(np.datetime64(first_date, "D"), (pd.Timestamp(out_start) - offset).to_datetime64())
+        out_end = dates[number + 1] if number + 1 < len(dates) else None
+        values = {name: items[number - 1] for name, items in recorded.items() if number <= len(items)}
+        windows.append(Window(number, np.datetime64(in_start, "D"), out_start, out_end, values))
+    return windows
+
+
+def run_windows(
+    index: int,
+    parameters: dict[str, float],
+    strategies: Sequence[str] | None,
+    windows: Sequence[Window],
+    in_sample: bool,
+) -> tuple[int, float, list[dict]]:
+    """One combination over many windows, in a worker: (index, signal seconds, row per window)."""
+    started = time.perf_counter()
+    backtest = worker_backtest(parameters)
+    names = strategies or backtest.strategies()
+    for name in names:
+        backtest.signals(name)
+    signal_seconds = time.perf_counter() - started
+
+    def traded(start: np.datetime64, end: np.datetime64 | None):
+        return combine([backtest.run(name, start, end) for name in names], backtest.account_size)
+
+    rows = []
+    for window in windows:
+        row: dict = {"Window": window.number}
+        if in_sample:
+            started = time.perf_counter()
+            row["InSample"] = traded(window.in_start, window.out_start).summary()
+            row["InSeconds"] = time.perf_counter() - started
+        started = time.perf_counter()
+        row["OutOfSample"] = traded(window.out_start, window.out_end)
+        row["OutSeconds"] = time.perf_counter() - started
+        rows.append(row)
+    return index, signal_seconds, rows
+
+
+def stitch(results: Sequence[BacktestResult], account_size: float) -> pd.Series:
+    """Out-of-sample equity curves chained so each window compounds on the last."""
+    level = account_size
+    pieces = []
+    for result in results:
+        growth = result.equity / account_size
+        if not len(growth):
+            continue
+        pieces.append(level * growth)
+        level = float(pieces[-1].iloc[-1])
+    return pd.concat(pieces).rename("WalkForward") if pieces else pd.Series(dtype=float, name="WalkForward")
+
+
+def walkforward(
+    script: Script,
+    panel: Panel,
+    strategies: Sequence[str] | None = None,
+    sweep: Sequence[str] | None = None,
+    score: str | None = None,
+    replay: bool = False,
+    workers: int | None = None,
+    cache_bytes: int = DEFAULT_CACHE_BYTES,
+) -> WalkForwardResult:
+    """Optimize on each in-sample period and trade the winner out of sample.
+
+    `score` is a `BacktestResult.summary` column, by default the script's
+    `OptScoreCol` or else NetProfit. With `replay`, each window trades the
+    values recorded in the `WalkForward:` section and nothing is optimized.
+    """
+    windows = walkforward_windows(script, panel.dates[0])
+    settings = script.section("OptimizeSettings")
+    score = score or (settings.get("OptScoreCol") if settings is not None else None) or "NetProfit"
+    if score not in SCORES:
+        raise FormulaError(f"Cannot score walk-forward windows by {score}; use one of {', '.join(SCORES)}")
+
+    if replay:
+        combinations: list[dict[str, float]] = []
+        assigned: dict[int, list[Window]] = {}
+        for window in windows:
+            if not window.recorded:
+                raise FormulaError(f"WalkForward window {window.number} has no recorded parameter values")
+            parameters = default_parameters(script, window.recorded)
+            if parameters not in combinations:
+                combinations.append(parameters)
+            assigned.setdefault(combinations.index(parameters), []).append(window)
+        tasks = [(index, combinations[index], strategies, assigned[index], False) for index in assigned]
+    else:
+        combinations = list(parameter_grid(script, sweep))
+        tasks = [(index, parameters, strategies, windows, True) for index, parameters in enumerate(combinations)]
+
+    by_window: dict[int, list[tuple[int, dict]]] = {window.number: [] for window in windows}
+    signal_seconds = 0.0
+    for index, seconds, rows in map_workers(script, panel, run_windows, tasks, workers, cache_bytes):
+        signal_seconds += seconds
+        for row in rows:
+            by_window[row["Window"]].append((index, row))
+
+    sign = -1.0 if score in LOWER_IS_BETTER else 1.0
+    report = []
+    chosen = []
+    for window in windows:
+        candidates = sorted(by_window[window.number], key=lambda item: item[0])
+        if replay:
+            index, best = candidates[0]
+        else:
+            # max() keeps the first of equal scores, i.e. the earliest combination in the grid.
+            index, best = max(candidates, key=lambda item: sign * item[1]["InSample"][score])
+        result = best["OutOfSample"]
+        chosen.append(result)
+        out_summary = result.summary()
+        report.append(
+            {
+                "Window": window.number,
+                "InStart": window.in_start,
+                "OutStart": window.out_start,
+                "OutEnd": window.out_end,
+                **combinations[index],
+                f"In{score}": best["InSample"][score] if not replay else np.nan,
+                "OutNetProfit": out_summary["NetProfit"],
+                "OutTrades": out_summary["Trades"],
+                "InSeconds": sum(row.get("InSeconds", 0.0) for _, row in candidates),
+                "OutSeconds": best["OutSeconds"],
+            }
+        )
+
+    trades = pd.concat([result.trades for result in chosen], ignore_index=True) if chosen else pd.DataFrame()
+    return WalkForwardResult(pd.DataFrame(report), stitch(chosen, account_size(script)), trades, signal_seconds)
@@ -0,0 +1,153 @@
+"""Array helpers for the GPMv_V2 notebook.
+
+`basket_index` builds the notebook's `mean` column, the risky-basket price
+index, as a float64 cumulative product with optional weights and
+rebalancing frequency.
+
+The notebook scores each asset by its blended momentum, discounted by how
+closely the asset tracks the equal-weight risky basket over the previous 12
+months: `zscore = score * (1 - corr(asset, basket))`. It used to call
+`mondata[-12-j:-j].corr()` twelve times, building the full N×N matrix for each
+window just to read one column. `rolling_basket_corr` computes every window's
+asset-vs-basket correlation in one pass from windowed sums, so z-scores are
+available over the whole history rather than the last 12 months only.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+CORR_WINDOW = 12
+BASKET_BASE = 100.0
+
+
+def basket_weights(columns: pd.Index, weights: dict[str, float] | pd.Series | None) -> np.ndarray | None:
+    if weights is None:
+        return None
+    weights = pd.Series(weights, dtype=float)
+    missing = sorted(set(columns) - set(weights.index))
+    if missing:
+        raise ValueError(f"No basket weight for: {', '.join(missing)}")
+    vector = weights.reindex(columns).to_numpy(dtype=np.float64)
+    if not vector.sum() > 0:
+        raise ValueError("Basket weights must sum to a positive number")
+    return vector / vector.sum()
+
+
+def basket_index(
+    prices: pd.DataFrame,
+    weights: dict[str, float] | pd.Series | None = None,
+    rebalance: str | None = None,
+    base: float = BASKET_BASE,
+) -> pd.Series:
+    """Price index of a basket of `prices` columns, starting at `base`.
+
+    With `rebalance=None` the basket is reset to its target weights every
+    row, which for equal weights is the notebook's `data['mean']`:
+    index[i] = index[i-1] * (1 + mean return from i-1 to i). Given a pandas
+    frequency such as "BME" or "QE", holdings drift with prices between
+    rebalances at the last row of each period instead.
+
+    The index starts on the first row where every column has a price and is
+    NaN before it; a missing price after that raises ValueError rather than
+    being skipped.
+    """
+    values = prices.to_numpy(dtype=np.float64)
+    complete = np.isfinite(values).all(axis=1)
+    if not complete.any():
+        raise ValueError("No row has a price for every basket column")
+    start = int(np.argmax(complete))
+    gaps = np.flatnonzero(~complete[start:])
+    if gaps.size:
+        row = start + int(gaps[0])
+        missing = prices.columns[~np.isfinite(values[row])].tolist()
+        raise ValueError(f"Missing prices on {prices.index[row]} for: {', '.join(missing)}")
+
+    vector = basket_weights(prices.columns, weights)
+    returns = values[start + 1 :] / values[start:-1] - 1.0
+
+    index = np.full(values.shape[0], np.nan)
+    if rebalance is None:
+        step = returns.mean(axis=1) if vector is None else returns @ vector
+        # Same left-to-right products as the notebook's loop, bit for bit.
+        index[start:] = np.cumprod(np.r_[base, 1.0 + step])
+    else:
+        if vector is None:
+            vector = np.full(values.shape[1], 1.0 / values.shape[1])
+        # Holdings are reset at the close of each period's last row, so a
+        # return belongs to the period its end row falls in.
+        periods = pd.Series(0, index=prices.index[start + 1 :]).groupby(pd.Grouper(freq=rebalance)).ngroup()
+        segment = periods.to_numpy()
+        drift = pd.DataFrame(1.0 + returns).groupby(segment).cumprod().to_numpy() @ vector
+        last = np.r_[segment[1:] != segment[:-1], True]
+        starts = np.r_[base, base * np.cumprod(drift[last])[:-1]]
+        index[start] = base
+        index[start + 1 :] = starts[np.cumsum(np.r_[True, last[:-1]]) - 1] * drift
+    return pd.Series(index, index=prices.index, name="basket")
+
+
+def window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of each trailing `window` rows, via differences of a running total."""
+    totals = np.cumsum(values, axis=0)
+    sums = totals.copy()
+    sums[window:] -= totals[:-window]
+    return sums
+
+
+def rolling_basket_corr(values: np.ndarray, basket: np.ndarray, window: int = CORR_WINDOW) -> np.ndarray:
+    """Correlation of each column of `values` (months, assets) with `basket` (months,).
+
+    Row r covers rows r-window+1..r. Like `DataFrame.corr`, each pair only
+    uses months where both sides are present, needs at least two of them,
+    and is NaN when either side is constant. Rows before the first full
+    window are NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    basket = np.asarray(basket, dtype=float)[:, None]
+    valid = np.isfinite(values) & np.isfinite(basket)
+
+    # Centering on the full-sample means keeps the sum-of-squares formulas
+    # well conditioned for small monthly returns.
+    x = np.where(valid, values - np.nanmean(np.where(valid, values, np.nan), axis=0), 0.0)
+    y = np.where(valid, basket - np.nanmean(np.where(valid, basket, np.nan), axis=0), 0.0)
+
+    count = window_sums(valid.astype(float), window)
+    sum_x = window_sums(x, window)
+    sum_y = window_sums(y, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = window_sums(x * y, window) - sum_x * sum_y / count
+        var_x = window_sums(x * x, window) - sum_x * sum_x / count
+        var_y = window_sums(y * y, window) - sum_y * sum_y / count
+        corr = cov / np.sqrt(var_x * var_y)
+
+    corr[(count < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+    corr[: window - 1] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def basket_correlations(
+    mondata: pd.DataFrame,
+    columns: list[str],
+    basket: str = "mean",
+    window: int = CORR_WINDOW,
+) -> pd.DataFrame:
+    """Trailing-window correlation of each of `columns` with the `basket` column."""
+    corr = rolling_basket_corr(mondata[columns].to_numpy(), mondata[basket].to_numpy(), window)
+    return pd.DataFrame(corr, index=mondata.index, columns=columns)
+
+
+def gpm_zscores(
+    score: pd.DataFrame,
+    mondata: pd.DataFrame,
+    columns: list[str],
+    basket: str = "mean",
+    window: int = CORR_WINDOW,
+) -> pd.DataFrame:
+    """`score * (1 - corr)` for every month, as the notebook's z-score loop.
+
+    The correlation window for a month ends the month before it (the loop
+    paired `score.iloc[-j]` with `mondata[-12-j:-j]`).
+    """
+    corr = basket_correlations(mondata, columns, basket, window).shift(1)
+    return score[columns] * (1 - corr)
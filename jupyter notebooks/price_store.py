@@ -0,0 +1,286 @@
+"""Local OHLCV store so the notebooks stop re-downloading full histories.
+
+Each symbol lives in its own directory under the store root:
+
+    <root>/<SYMBOL>/dates.npy    datetime64[D], ascending
+    <root>/<SYMBOL>/values.npy   float64 (dates, FIELDS)
+    <root>/<SYMBOL>/meta.json    provider, requested start, last fetch
+
+Both arrays are opened memory-mapped, so reading one column of a long
+history touches only the pages it needs. When a request reaches outside what
+is stored, only the missing head or tail is fetched from the provider. A
+tail fetch starts at the last stored bar, since that bar may have been taken
+intraday. If the refreshed bar's adjusted close disagrees with the stored
+one (a new dividend or split re-based the history), the whole range is
+fetched again.
+
+Providers are small objects with a `name` and
+`fetch(symbol, start, end) -> DataFrame` (end exclusive, columns a subset of
+FIELDS):
+
+- `YFinanceProvider` downloads from Yahoo Finance (needs network);
+- `CSVProvider` reads `<directory>/<SYMBOL>.csv` with a Date column;
+- `NorgateProvider` reads Norgate Data Updater ASCII exports (headered, or
+  headerless `YYYYMMDD,Open,High,Low,Close,Volume` rows).
+
+Setting PRICE_FIXTURES to a directory of CSV files makes `default_store()`
+fully offline: the store is backed by those fixtures and never touches the
+network. `write_fixtures()` generates deterministic synthetic fixtures.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterable, Protocol
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+DATES_NAME = "dates.npy"
+VALUES_NAME = "values.npy"
+META_NAME = "meta.json"
+DEFAULT_ROOT = Path("price_data")
+FIXTURES_ENV = "PRICE_FIXTURES"
+# Relative tolerance when checking a refreshed bar against the stored one.
+REBASE_TOLERANCE = 1e-6
+
+NORGATE_COLUMNS = ("Date", "Open", "High", "Low", "Close", "Volume")
+
+
+class PriceProvider(Protocol):
+    name: str
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        ...
+
+
+def normalize_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Date-indexed float frame with every FIELDS column, ascending and de-duplicated."""
+    frame = frame.copy()
+    frame.index = pd.DatetimeIndex(frame.index).tz_localize(None).normalize()
+    frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+    if "Adj Close" not in frame.columns and "Close" in frame.columns:
+        frame["Adj Close"] = frame["Close"]
+    return frame.reindex(columns=list(FIELDS)).astype(np.float64)
+
+
+class YFinanceProvider:
+    name = "yfinance"
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        import yfinance as yf
+
+        frame = yf.download(
+            symbol,
+            start=start.strftime("%Y-%m-%d"),
+            end=end.strftime("%Y-%m-%d"),
+            auto_adjust=False,
+            progress=False,
+        )
+        if isinstance(frame.columns, pd.MultiIndex):
+            frame.columns = frame.columns.get_level_values(0)
+        return frame
+
+
+@dataclass
+class CSVProvider:
+    directory: Path
+    pattern: str = "{symbol}.csv"
+    name: str = "csv"
+
+    def path_for(self, symbol: str) -> Path:
+        return Path(self.directory) / self.pattern.format(symbol=symbol)
+
+    def read(self, path: Path) -> pd.DataFrame:
+        return pd.read_csv(path, index_col="Date", parse_dates=["Date"])
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        path = self.path_for(symbol)
+        if not path.is_file():
+            raise FileNotFoundError(f"No price file for {symbol}: {path}")
+        frame = self.read(path)
+        return frame[(frame.index >= start) & (frame.index < end)]
+
+
+@dataclass
+class NorgateProvider(CSVProvider):
+    """Per-symbol ASCII exports from the Norgate Data Updater."""
+
+    pattern: str = "{symbol}.txt"
+    name: str = "norgate"
+
+    def read(self, path: Path) -> pd.DataFrame:
+        with path.open("r", encoding="utf-8") as handle:
+            first = handle.readline()
+        if first[:1].isdigit():
+            frame = pd.read_csv(path, header=None, names=list(NORGATE_COLUMNS), usecols=range(6))
+            frame["Date"] = pd.to_datetime(frame["Date"].astype(str), format="%Y%m%d")
+        else:
+            frame = pd.read_csv(path)
+            frame = frame.rename(columns={column: column.strip().title() for column in frame.columns})
+            frame["Date"] = pd.to_datetime(frame["Date"])
+        return frame.set_index("Date")
+
+
+class PriceStore:
+    def __init__(self, root: Path | str = DEFAULT_ROOT, provider: PriceProvider | None = None) -> None:
+        self.root = Path(root)
+        self.provider = provider if provider is not None else YFinanceProvider()
+        self.fetches: list[tuple[str, str, str]] = []
+
+    def symbol_dir(self, symbol: str) -> Path:
+        return self.root / symbol.replace("/", "_")
+
+    def read_meta(self, symbol: str) -> dict | None:
+        path = self.symbol_dir(symbol) / META_NAME
+        if not path.is_file():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def frame(self, symbol: str, mmap_mode: str | None = "r") -> pd.DataFrame:
+        """Everything stored for `symbol`, backed by memory-mapped arrays unless `mmap_mode` is None."""
+        directory = self.symbol_dir(symbol)
+        if not (directory / DATES_NAME).is_file():
+            return pd.DataFrame(columns=list(FIELDS), index=pd.DatetimeIndex([], name="Date"), dtype=np.float64)
+        dates = np.load(directory / DATES_NAME, mmap_mode=mmap_mode)
+        values = np.load(directory / VALUES_NAME, mmap_mode=mmap_mode)
+        return pd.DataFrame(values, index=pd.DatetimeIndex(dates, name="Date"), columns=list(FIELDS), copy=False)
+
+    def write(self, symbol: str, frame: pd.DataFrame, requested_start: pd.Timestamp) -> None:
+        directory = self.symbol_dir(symbol)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, array in (
+            (DATES_NAME, frame.index.to_numpy(dtype="datetime64[D]")),
+            (VALUES_NAME, np.ascontiguousarray(frame.to_numpy(dtype=np.float64))),
+        ):
+            tmp_path = directory / (name + ".tmp")
+            with tmp_path.open("wb") as handle:
+                np.save(handle, array)
+            tmp_path.replace(directory / name)
+        meta = {
+            "symbol": symbol,
+            "provider": self.provider.name,
+            "requested_start": requested_start.strftime("%Y-%m-%d"),
+            "fetched_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+            "rows": int(len(frame)),
+        }
+        (directory / META_NAME).write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+
+    def fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        self.fetches.append((symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")))
+        return normalize_frame(self.provider.fetch(symbol, start, end))
+
+    def update(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """Make sure [start, end) is stored for `symbol`, fetching only what is missing.
+
+        The files are rewritten only when a fetch adds bars or revises the
+        last one; `write` replaces them, and Windows cannot replace a mapped
+        file, so every reference to the mapped frame is dropped first.
+        """
+        meta = self.read_meta(symbol)
+        stored = self.frame(symbol) if meta is not None else None
+        if stored is None or stored.empty:
+            del stored
+            merged = self.fetch(symbol, start, end)
+            self.write(symbol, merged, start)
+            return self.frame(symbol)
+
+        covered_start = pd.Timestamp(meta["requested_start"])
+        last_bar = stored.index[-1]
+        new_start = min(start, covered_start)
+        head = self.fetch(symbol, start, covered_start) if start < covered_start else None
+        tail = None
+        if end > last_bar + pd.Timedelta(days=1):
+            tail = self.fetch(symbol, last_bar, end)
+            if last_bar in tail.index and not np.allclose(
+                tail.at[last_bar, "Adj Close"] / tail.at[last_bar, "Close"],
+                stored.at[last_bar, "Adj Close"] / stored.at[last_bar, "Close"],
+                rtol=REBASE_TOLERANCE,
+                equal_nan=True,
+            ):
+                # Adjustments moved under the stored history; take a fresh copy.
+                del stored
+                merged = self.fetch(symbol, new_start, end)
+                self.write(symbol, merged, new_start)
+                return self.frame(symbol)
+            revised = last_bar in tail.index and not np.array_equal(
+                tail.loc[last_bar].to_numpy(), stored.iloc[-1].to_numpy(), equal_nan=True
+            )
+            if not revised and not (tail.index > last_bar).any():
+                tail = None  # a weekend, a holiday or a repeated run: nothing new
+
+        if head is None and tail is None:
+            return stored
+        # Concatenating copies the mapped rows into memory.
+        merged = pd.concat([part for part in (head, stored, tail) if part is not None and not part.empty])
+        del stored
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        self.write(symbol, merged, new_start)
+        return self.frame(symbol)
+
+    def prices(
+        self,
+        symbols: Iterable[str],
+        start: str | date,
+        end: str | date | None = None,
+        field: str = "Adj Close",
+    ) -> pd.DataFrame:
+        """One `field` column per symbol over [start, end), like the notebooks' download.
+
+        `end` defaults to tomorrow so today's bar is included.
+        """
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp(date.today() + timedelta(days=1))
+        columns = {}
+        for symbol in symbols:
+            frame = self.update(symbol, start, end)
+            columns[symbol] = frame.loc[(frame.index >= start) & (frame.index < end), field]
+        return pd.DataFrame(columns).sort_index()
+
+
+def default_store(root: Path | str = DEFAULT_ROOT) -> PriceStore:
+    """Yahoo Finance behind a local store, or fixtures only when PRICE_FIXTURES is set."""
+    fixtures = os.environ.get(FIXTURES_ENV)
+    if fixtures:
+        return PriceStore(Path(root) / "offline", CSVProvider(Path(fixtures)))
+    return PriceStore(root, YFinanceProvider())
+
+
+def write_fixtures(
+    directory: Path | str,
+    symbols: Iterable[str],
+    start: str = "2015-01-01",
+    end: str | None = None,
+    seed: int = 0,
+) -> list[Path]:
+    """Write deterministic synthetic daily OHLCV CSVs for offline runs."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    index = pd.bdate_range(start, end or date.today(), name="Date")
+    paths = []
+    for offset, symbol in enumerate(sorted(symbols)):
+        rng = np.random.default_rng(seed + offset)
+        close = 50.0 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, len(index))))
+        spread = np.abs(rng.normal(0.0, 0.006, (len(index), 2)))
+        frame = pd.DataFrame(
+            {
+                "Open": close * (1 + rng.normal(0.0, 0.003, len(index))),
+                "High": close * (1 + spread[:, 0]),
+                "Low": close * (1 - spread[:, 1]),
+                "Close": close,
+                "Adj Close": close,
+                "Volume": rng.integers(100_000, 5_000_000, len(index)).astype(float),
+            },
+            index=index,
+        )
+        frame["High"] = frame[["Open", "High", "Close"]].max(axis=1)
+        frame["Low"] = frame[["Open", "Low", "Close"]].min(axis=1)
+        path = directory / f"{symbol}.csv"
+        frame.round(4).to_csv(path)
+        paths.append(path)
+    return paths
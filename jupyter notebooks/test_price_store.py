@@ -0,0 +1,76 @@
+"""PriceStore over CSV fixtures: which ranges it fetches, and when it rewrites the store."""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from price_store import CSVProvider, PriceStore, write_fixtures
+
+
+@pytest.fixture
+def fixtures(tmp_path: Path) -> Path:
+    write_fixtures(tmp_path / "fixtures", ["AAA"], start="2020-01-01", end="2020-06-30")
+    return tmp_path / "fixtures"
+
+
+@pytest.fixture
+def store(tmp_path: Path, fixtures: Path) -> PriceStore:
+    return PriceStore(tmp_path / "store", CSVProvider(fixtures))
+
+
+def fixture_prices(fixtures: Path, start: str, stop: str) -> pd.Series:
+    """The fixture's adjusted closes from `start` to `stop`, both inclusive."""
+    return pd.read_csv(fixtures / "AAA.csv", index_col="Date", parse_dates=["Date"])["Adj Close"][start:stop]
+
+
+def assert_prices(prices: pd.DataFrame, expected: pd.Series) -> None:
+    pd.testing.assert_series_equal(prices["AAA"], expected, check_names=False, check_index_type=False)
+
+
+def written(store: PriceStore) -> int:
+    return (store.symbol_dir("AAA") / "values.npy").stat().st_mtime_ns
+
+
+def test_first_request_fetches_the_whole_range(store: PriceStore, fixtures: Path) -> None:
+    prices = store.prices(["AAA"], "2020-02-03", "2020-03-02")
+    assert store.fetches == [("AAA", "2020-02-03", "2020-03-02")]
+    assert_prices(prices, fixture_prices(fixtures, "2020-02-03", "2020-02-28"))
+
+
+def test_covered_requests_fetch_nothing(store: PriceStore) -> None:
+    store.prices(["AAA"], "2020-02-03", "2020-03-02")
+    before = written(store)
+    store.prices(["AAA"], "2020-02-10", "2020-02-20")
+    store.prices(["AAA"], "2020-02-03", "2020-02-29")  # a weekend after the last bar, 2020-02-28
+    assert len(store.fetches) == 1
+    assert written(store) == before
+
+
+def test_tail_without_new_bars_is_not_written(store: PriceStore) -> None:
+    store.prices(["AAA"], "2020-02-03", "2020-02-29")
+    before = written(store)
+    # Monday's bar is not out yet: the tail fetch returns only the stored last bar, unchanged.
+    store.prices(["AAA"], "2020-02-03", "2020-03-02")
+    assert store.fetches[-1] == ("AAA", "2020-02-28", "2020-03-02")
+    assert written(store) == before
+
+
+def test_missing_head_and_tail_are_fetched(store: PriceStore, fixtures: Path) -> None:
+    store.prices(["AAA"], "2020-02-03", "2020-03-02")
+    prices = store.prices(["AAA"], "2020-01-06", "2020-03-10")
+    assert store.fetches[1:] == [("AAA", "2020-01-06", "2020-02-03"), ("AAA", "2020-02-28", "2020-03-10")]
+    assert_prices(prices, fixture_prices(fixtures, "2020-01-06", "2020-03-09"))
+    assert store.read_meta("AAA")["requested_start"] == "2020-01-06"
+
+
+def test_rebased_history_is_fetched_again(store: PriceStore, fixtures: Path) -> None:
+    store.prices(["AAA"], "2020-02-03", "2020-03-02")
+    path = fixtures / "AAA.csv"
+    frame = pd.read_csv(path, index_col="Date")
+    frame["Adj Close"] = frame["Close"] * 0.98  # a dividend re-bases the adjusted history
+    frame.to_csv(path)
+
+    prices = store.prices(["AAA"], "2020-02-03", "2020-03-10")
+    assert store.fetches[1:] == [("AAA", "2020-02-28", "2020-03-10"), ("AAA", "2020-02-03", "2020-03-10")]
+    assert_prices(prices, fixture_prices(fixtures, "2020-02-03", "2020-03-09"))
@@ -0,0 +1,73 @@
+"""leverage_slot against the Triad_+ / Triad_++ notebook loop it replaced."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from triad import TRIAD_GROUPS, add_triad_signals, leverage_slot, monthly_scores, smart_leverage_flags
+
+
+def notebook_loop(score: pd.DataFrame, levered: str, base: str = "IWB") -> pd.Series:
+    """The notebooks' original cell, with the S1 column found by name instead of hard-coded as 16."""
+    score = score.copy()
+    column = score.columns.get_loc("S1")
+    for i in range(8, len(score)):
+        if score.iloc[i][f"{base}_dist"] >= 0:
+            if score.iloc[i - 1]["S1"] == levered:
+                score.iloc[i, column] = levered
+                we_continue = False
+                for j in range(13):
+                    if score.iloc[i - j, column] != levered:
+                        we_continue = True
+                if not we_continue:
+                    score.iloc[i, column] = base
+            else:
+                if score.iloc[i]["SmartLeverage"] == True:  # noqa: E712 - the notebook's test
+                    score.iloc[i, column] = levered
+                else:
+                    score.iloc[i, column] = base
+    return score["S1"]
+
+
+@pytest.fixture
+def prices() -> pd.DataFrame:
+    """Four years of business days: a 25% IWB drawdown, then a two-year rally that hits the 12-month cap."""
+    dates = pd.bdate_range("2015-01-01", "2018-12-31", name="Date")
+    rng = np.random.default_rng(1)
+    steps = np.full(len(dates), 0.0004)
+    steps[150:260] = -0.0028
+    steps[260:] = 0.0015
+    frame = {"IWB": 100.0 * np.exp(np.cumsum(steps))}
+    for offset, ticker in enumerate(ticker for ticker in TRIAD_GROUPS.assets if ticker != "IWB"):
+        frame[ticker] = 50.0 * np.exp(np.cumsum(rng.normal(0.0001 * offset, 0.006, len(dates))))
+    return pd.DataFrame(frame, index=dates)[TRIAD_GROUPS.assets]
+
+
+@pytest.fixture
+def score(prices: pd.DataFrame) -> pd.DataFrame:
+    score = add_triad_signals(monthly_scores(prices))
+    score["SmartLeverage"] = smart_leverage_flags(score["IWB"])
+    return score
+
+
+@pytest.mark.parametrize("levered", ["SSO", "UPRO"])
+def test_leverage_slot_matches_notebook_loop(score: pd.DataFrame, levered: str) -> None:
+    assert score.columns.get_loc("S1") == 16
+    expected = notebook_loop(score, levered)
+    result = leverage_slot(score, levered)
+    pd.testing.assert_series_equal(result, expected, check_dtype=False)
+    assert (result == levered).any()
+
+
+def test_leverage_run_is_capped_at_twelve_months(score: pd.DataFrame) -> None:
+    score = score.copy()
+    score["IWB_dist"] = 0.01
+    score["SmartLeverage"] = True
+    expected = notebook_loop(score, "SSO")
+    result = leverage_slot(score, "SSO")
+    pd.testing.assert_series_equal(result, expected, check_dtype=False)
+
+    held = result.iloc[8:].eq("SSO").to_numpy()
+    runs = np.diff(np.flatnonzero(np.concatenate(([True], ~held, [True])))) - 1
+    assert runs.max() == 12
+    assert not held[12]
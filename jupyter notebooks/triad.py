@@ -0,0 +1,227 @@
+"""Vectorized Triad signal selection shared by the Triad notebooks.
+
+The notebooks used to fill S1–S4 with a row-by-row `score.iloc[i, 16..19]`
+loop. Here every slot is chosen for all months at once with `np.select` over
+the `_dist` columns, and the slots are described by asset groups instead of
+column positions, so the same code runs for any universe variant.
+
+The selection rules are exactly the notebook's:
+
+- the safe slot (S4) takes the first bond whose distance is strictly greater
+  than every other bond's, and otherwise the last bond listed;
+- every other slot takes the first candidate whose distance is >= 0 and >= the
+  other candidates', and otherwise falls back to the safe slot's pick;
+- rows before `warmup` are left as ''.
+
+The array functions take distances with the asset axis last, so a stack of
+variants shaped (variants, months, assets) is evaluated in one call.
+
+The SmartLeverage drawdown flag and the SSO/UPRO leverage rule of Triad_+
+and Triad_++ are here too, each computed in one linear pass; the leverage
+state machine is compiled with numba when it is installed.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the plain loop is already linear
+    def njit(function):
+        return function
+
+WINDOW = 7
+WARMUP = 8
+LEVERAGE_DRAWDOWN = 0.15
+LEVERAGE_MAX_RUN = 12
+
+
+@dataclass(frozen=True)
+class TriadGroups:
+    """Slot name -> candidate tickers, in the order the rules test them."""
+
+    slots: tuple[tuple[str, tuple[str, ...]], ...] = (
+        ("S1", ("IWB",)),
+        ("S2", ("IWS", "VXUS")),
+        ("S3", ("SGOL", "DBC")),
+    )
+    safe: tuple[str, tuple[str, ...]] = ("S4", ("VCSH", "VGSH", "VGIT"))
+
+    @property
+    def names(self) -> list[str]:
+        return [name for name, _ in self.slots] + [self.safe[0]]
+
+    @property
+    def assets(self) -> list[str]:
+        tickers = [ticker for _, candidates in self.slots for ticker in candidates]
+        return sorted(set(tickers) | set(self.safe[1]))
+
+
+TRIAD_GROUPS = TriadGroups()
+
+
+def month_end_prices(data: pd.DataFrame) -> pd.DataFrame:
+    """Last price of each business month ('BM' before pandas 2.2, 'BME' after)."""
+    try:
+        return data.resample("BME").last()
+    except ValueError:
+        return data.resample("BM").last()
+
+
+def monthly_scores(data: pd.DataFrame, window: int = WINDOW) -> pd.DataFrame:
+    """Month-end prices followed by one `<ticker>_7m` rolling mean per column."""
+    score = month_end_prices(data)
+    for ticker in list(score.columns):
+        score[f"{ticker}_7m"] = score[ticker].rolling(window).mean()
+    return score
+
+
+def safe_pick(dist: np.ndarray, columns: list[int], tickers: tuple[str, ...]) -> np.ndarray:
+    """First ticker strictly ahead of all others, else the last ticker."""
+    conditions = []
+    for position in columns[:-1]:
+        value = dist[..., position]
+        condition = np.ones(value.shape, dtype=bool)
+        for other in columns:
+            if other != position:
+                condition &= value > dist[..., other]
+        conditions.append(condition)
+    return np.select(conditions, list(tickers[:-1]), default=tickers[-1])
+
+
+def momentum_pick(
+    dist: np.ndarray,
+    columns: list[int],
+    tickers: tuple[str, ...],
+    fallback: np.ndarray,
+) -> np.ndarray:
+    """First ticker at or above its average and the other candidates, else `fallback`."""
+    conditions = []
+    for position in columns:
+        value = dist[..., position]
+        condition = value >= 0
+        for other in columns:
+            if other != position:
+                condition &= value >= dist[..., other]
+        conditions.append(condition)
+    return np.select(conditions, list(tickers), default=fallback)
+
+
+def select_slots(
+    dist: np.ndarray,
+    assets: list[str],
+    groups: TriadGroups = TRIAD_GROUPS,
+    warmup: int = WARMUP,
+) -> dict[str, np.ndarray]:
+    """Pick every slot for every row of `dist` (..., months, assets) at once."""
+    index = {ticker: position for position, ticker in enumerate(assets)}
+    safe_name, safe_tickers = groups.safe
+    safe = safe_pick(dist, [index[ticker] for ticker in safe_tickers], safe_tickers)
+
+    picks = {}
+    for name, tickers in groups.slots:
+        picks[name] = momentum_pick(dist, [index[ticker] for ticker in tickers], tickers, safe)
+    picks[safe_name] = safe
+
+    for name, values in picks.items():
+        values = values.astype(object)
+        values[..., :warmup] = ""
+        picks[name] = values
+    return picks
+
+
+def add_triad_signals(
+    score: pd.DataFrame,
+    groups: TriadGroups = TRIAD_GROUPS,
+    warmup: int = WARMUP,
+) -> pd.DataFrame:
+    """Append the slot columns and `<ticker>_dist` columns to a `monthly_scores` frame.
+
+    The column layout matches the notebooks (prices, `_7m`, S1–S4, `_dist`),
+    so positional cells further down keep working.
+    """
+    assets = [column for column in score.columns if f"{column}_7m" in score.columns]
+    dist = pd.DataFrame(
+        {f"{ticker}_dist": (score[ticker] - score[f"{ticker}_7m"]) / score[ticker] for ticker in assets},
+        index=score.index,
+    )
+    picks = select_slots(dist.to_numpy(dtype=float), assets, groups, warmup)
+    slots = pd.DataFrame({name: picks[name] for name in groups.names}, index=score.index)
+    return pd.concat([score, slots, dist], axis=1)
+
+
+def drawdown_since_peak(prices: pd.Series) -> pd.Series:
+    """Drop from the running high to the lowest close since that high, per row.
+
+    The peak is the first occurrence of the running maximum, as with
+    `idxmax()`, so a new segment starts only when a strictly higher close
+    appears; the trough is the cumulative minimum within each segment.
+    Missing closes carry the previous close, which changes neither.
+    """
+    prices = prices.ffill()
+    peak = prices.cummax()
+    new_high = prices > peak.shift(1).fillna(-np.inf)
+    segment = new_high.cumsum()
+    trough = prices.groupby(segment).cummin()
+    return (peak - trough) / peak
+
+
+def smart_leverage_flags(prices: pd.Series, threshold: float = LEVERAGE_DRAWDOWN) -> pd.Series:
+    """The notebooks' SmartLeverage column, computed in one pass.
+
+    Row i is True when the drawdown measured over rows 0..i-1 exceeds
+    `threshold`; the first row has no history and stays ''.
+    """
+    flags = (drawdown_since_peak(prices) > threshold).shift(1).astype(object)
+    flags.iloc[:1] = ""
+    return flags.rename("SmartLeverage")
+
+
+@njit
+def leverage_path(above: np.ndarray, smart: np.ndarray, start: int, max_run: int) -> np.ndarray:
+    """Months held levered, as a boolean array, in a single forward pass.
+
+    A month above its average stays levered if the previous month was, until
+    `max_run` consecutive levered months have been held; it then drops to the
+    unlevered ticker for one month. From an unlevered month it levers up when
+    the SmartLeverage flag is set. A month below its average is never levered.
+    """
+    levered = np.zeros(above.shape[0], dtype=np.bool_)
+    run = 0
+    for i in range(start, above.shape[0]):
+        if above[i]:
+            if run > 0:
+                levered[i] = run < max_run
+            else:
+                levered[i] = smart[i]
+        run = run + 1 if levered[i] else 0
+    return levered
+
+
+def leverage_slot(
+    score: pd.DataFrame,
+    levered: str,
+    base: str = "IWB",
+    slot: str = "S1",
+    max_run: int = LEVERAGE_MAX_RUN,
+    start: int = WARMUP,
+) -> pd.Series:
+    """The Triad_+/Triad_++ slot with `levered` (SSO, UPRO) swapped in for `base`.
+
+    Months where `base` is below its average keep the bond already in `slot`.
+    This matches the notebooks' loop, whose 13-row look-back amounts to
+    "the previous `max_run` months were all levered".
+    """
+    above = (score[f"{base}_dist"] >= 0).to_numpy(dtype=bool)
+    smart = score["SmartLeverage"].eq(True).to_numpy(dtype=bool)
+    path = leverage_path(above, smart, start, max_run)
+
+    values = score[slot].to_numpy(dtype=object).copy()
+    rows = np.flatnonzero(above)
+    rows = rows[rows >= start]
+    values[rows] = np.where(path[rows], levered, base)
+    return pd.Series(values, index=score.index, name=slot)